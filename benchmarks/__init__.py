@@ -0,0 +1 @@
+"""Benchmarks de la capa de datos y de los reportes (ver benchmarks/run.py)."""
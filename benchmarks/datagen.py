@@ -0,0 +1,143 @@
+"""Generador determinista de catálogos y ventas sintéticos.
+
+Con la misma semilla y los mismos tamaños genera exactamente los mismos
+datos, así los resultados de los benchmarks se pueden comparar entre
+commits. Los datos se insertan con executemany por tandas, igual que la
+importación de catálogos, sobre una base creada con las migraciones
+vigentes (índices, búsqueda FTS y resúmenes incluidos).
+"""
+import random
+from datetime import datetime, timedelta
+
+from database.connection import create_tables, set_database_path, transaction
+
+NOMBRES = [
+    "José", "María", "Inés", "Ramón", "Begoña", "Martín", "Lucía", "Sebastián", "Óscar", "Núria",
+    "Iñaki", "Verónica", "Julián", "Mónica", "Adrián", "Sofía", "Andrés", "Raúl", "Ángela", "Joaquín",
+]
+APELLIDOS = [
+    "García", "Martínez", "Muñoz", "Peña", "Ibáñez", "Gómez", "Fernández", "Sánchez", "Pérez", "Álvarez",
+    "Cortázar", "Güemes", "Rodríguez", "López", "Díaz", "Hernández", "Jiménez", "Ruiz", "Núñez", "Echeverría",
+]
+NACIONALIDADES = ["Argentina", "España", "México", "Chile", "Colombia", "Uruguay", "Perú"]
+GENEROS = ["Novela", "Cuento", "Poesía", "Ensayo", "Historia", "Ciencia ficción", "Policial", "Infantil", "Biografía"]
+
+PALABRAS = [
+    "sombra", "río", "ciudad", "corazón", "silencio", "jardín", "invierno", "canción", "memoria", "mañana",
+    "león", "árbol", "océano", "camino", "noche", "espejo", "sueño", "pájaro", "niño", "café",
+]
+ADJETIVOS = [
+    "perdido", "eterno", "último", "secreto", "dormido", "rojo", "lejano", "olvidado", "pequeño", "único",
+]
+
+# Período de las ventas generadas
+SALES_START = datetime(2024, 1, 1)
+SALES_DAYS = 366
+
+CHUNK_SIZE = 50000
+
+
+def _isbn(number):
+    """ISBN-13 válido (prefijo 978) para el número indicado."""
+    digits = f"978{number:09d}"
+    check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return f"{digits}{check}"
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_authors(rng, count):
+    """Autores únicos (nombre, nacionalidad) con nombres acentuados."""
+    seen = set()
+    while len(seen) < count:
+        name = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+        if name in seen:
+            name = f"{name} {rng.choice(APELLIDOS)}"
+        if name in seen:
+            name = f"{name} {len(seen)}"
+        seen.add(name)
+        yield name, rng.choice(NACIONALIDADES)
+
+
+def generate_books(rng, count, authors):
+    """Libros (título, autor_id, género, isbn, precio, stock)."""
+    for number in range(count):
+        title = f"{rng.choice(PALABRAS).capitalize()} {rng.choice(ADJETIVOS)}"
+        if rng.random() < 0.5:
+            title = f"El {title} de la {rng.choice(PALABRAS)}"
+        yield (
+            title,
+            rng.randint(1, authors),
+            rng.choice(GENEROS),
+            _isbn(number),
+            round(rng.uniform(5, 80), 2),
+            rng.randint(0, 500),
+        )
+
+
+def generate_sales(rng, count, books, prices):
+    """Ventas (libro_id, cantidad, fecha, monto_total) ordenadas por fecha."""
+    seconds_per_sale = SALES_DAYS * 86400 / max(count, 1)
+    for number in range(count):
+        # Distribución log-uniforme: los primeros libros se venden mucho más que el resto
+        libro_id = min(int(books ** rng.random()), books)
+        cantidad = rng.randint(1, 3)
+        fecha = SALES_START + timedelta(seconds=int(number * seconds_per_sale))
+        yield libro_id, cantidad, fecha.isoformat(timespec="seconds"), round(prices[libro_id - 1] * cantidad, 2)
+
+
+def generate_database(path, books=10000, sales=100000, authors=None, seed=42, progress=None):
+    """Crea en `path` una base con datos sintéticos y la deja como base activa.
+
+    `path` debe ser un archivo nuevo (los ids generados suponen tablas vacías).
+    `progress(etapa, filas)` se llama después de cada tanda.
+    """
+    rng = random.Random(seed)
+    authors = authors or max(10, books // 20)
+    set_database_path(path)
+    create_tables()
+
+    with transaction() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM libros")
+        if cursor.fetchone()[0]:
+            raise ValueError(f"La base {path} ya tiene datos")
+
+    stages = (
+        ("autores", "INSERT INTO autores (nombre, nacionalidad) VALUES (?, ?)",
+         generate_authors(rng, authors)),
+        ("libros", "INSERT INTO libros (titulo, autor_id, genero, isbn, precio, stock) VALUES (?, ?, ?, ?, ?, ?)",
+         generate_books(rng, books, authors)),
+    )
+    prices = []
+    for stage, sql, rows in stages:
+        inserted = 0
+        for chunk in _chunks(rows):
+            if stage == "libros":
+                prices.extend(row[4] for row in chunk)
+            with transaction() as cursor:
+                cursor.executemany(sql, chunk)
+            inserted += len(chunk)
+            if progress is not None:
+                progress(stage, inserted)
+
+    inserted = 0
+    for chunk in _chunks(generate_sales(rng, sales, books, prices)):
+        with transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO ventas (libro_id, cantidad, fecha, monto_total) VALUES (?, ?, ?, ?)", chunk
+            )
+        inserted += len(chunk)
+        if progress is not None:
+            progress("ventas", inserted)
+
+    with transaction() as cursor:
+        cursor.execute("ANALYZE")
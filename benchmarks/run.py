@@ -0,0 +1,248 @@
+"""Mide las funciones de la capa de datos y de los reportes sobre datos sintéticos.
+
+Uso:
+    python -m benchmarks.run --libros 100000 --ventas 1000000 --json antes.json
+    python -m benchmarks.run --libros 100000 --ventas 1000000 --comparar antes.json
+
+La base generada se guarda en un directorio temporal (o en --base, para
+reutilizarla entre corridas: la generación es determinista). Los casos se
+miden sobre una copia en el directorio temporal, así los que escriben no
+alteran --base; el directorio se borra al terminar. El reporte
+incluye el commit, las versiones de Python y SQLite y, por cada caso, el
+tiempo mínimo, la mediana y la media de las repeticiones.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.datagen import generate_database, SALES_START
+from database.connection import set_database_path, create_tables, close_connection
+from database import models, reports, aggregates
+from database.exporter import export_csv
+from reporting import sales_list_report, book_list_report
+
+DEFAULT_REPEAT = 5
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def _rows(result):
+    """Cantidad de filas de un resultado (None si no es una colección)."""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])  # (filas, siguiente_clave) de fetch_books_page
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def build_cases(workdir, books, month):
+    """Casos a medir: (nombre, función sin argumentos, repeticiones o None para el valor por defecto).
+
+    Los casos que escriben (ventas y libros) van al final para no alterar los datos de los de lectura.
+    """
+    middle = books // 2
+    start, end = month
+    return [
+        ("models.count_books", models.count_books, None),
+        ("models.fetch_books", models.fetch_books, 3),
+        ("models.fetch_books_page (primera)", lambda: models.fetch_books_page(), None),
+        ("models.fetch_books_page (por título)", lambda: models.fetch_books_page(order_by="titulo"), None),
+        ("models.fetch_books_page (mitad)", lambda: models.fetch_books_page(after=middle), None),
+        ("models.get_book_by_id (caché fría)",
+         lambda: (models.catalog_cache.clear(), models.get_book_by_id(middle))[1], None),
+        ("models.get_book_by_id (caché caliente)", lambda: models.get_book_by_id(middle), None),
+        ("models.search_books (palabra)", lambda: models.search_books("corazon"), None),
+        ("models.search_books (prefijo)", lambda: models.search_books("mar"), None),
+        ("models.search_books (autor y título)", lambda: models.search_books("garcia sombra"), None),
+        ("models.fetch_low_stock", lambda: models.fetch_low_stock(5), None),
+        ("models.fetch_sales", models.fetch_sales, 3),
+        ("models.fetch_sales (un mes)", lambda: models.fetch_sales(start, end), None),
+        ("models.fetch_sales_by_book", lambda: models.fetch_sales_by_book(1), None),
+        ("models.fetch_sales_report", models.fetch_sales_report, None),
+        ("reports.sales_report (por mes)", lambda: reports.sales_report("mes"), None),
+        ("reports.sales_report (por día, un mes con hora)",
+         lambda: reports.sales_report("dia", start + "T00:00:00", end + "T00:00:00"), None),
+        ("reports.sales_report (autor, top 10, un mes)", lambda: reports.sales_report("autor", start, end, top=10), None),
+        ("reports.sales_by_edition", reports.sales_by_edition, None),
+        ("reports.sales_by_title", reports.sales_by_title, None),
+        ("aggregates.check_aggregates", aggregates.check_aggregates, 1),
+        ("reporting: vista previa de ventas (página 1)",
+         lambda: sales_list_report(models.fetch_sales()).page(1), 3),
+        ("reporting: texto de ventas de un mes",
+         lambda: sales_list_report(models.fetch_sales(start, end)).write_text(io.StringIO()), None),
+        ("reporting: PDF del listado de libros",
+         lambda: book_list_report(models.fetch_books()).write_pdf(io.BytesIO()), 1),
+        ("exporter.export_csv (ventas)",
+         lambda: export_csv("ventas", os.path.join(workdir, "ventas.csv")), 1),
+        ("models.register_sale", lambda: models.register_sale(middle, 1), 50),
+        ("models.register_order (3 libros)", lambda: models.register_order([(1, 1), (2, 1), (middle, 1)]), 20),
+        ("models.insert_book", lambda: models.insert_book(("Libro nuevo", "Autor de prueba", "Novela", "0", 10.0, 5)), 20),
+    ]
+
+
+def run_case(func, repeat):
+    """Ejecuta `func` `repeat` veces y devuelve (tiempos en ms, filas del último resultado)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, _rows(result)
+
+
+def _copy_database(source, target):
+    """Copia la base con la API de respaldo de SQLite (incluye lo que aún esté en el WAL)."""
+    source_conn, target_conn = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        source_conn.close()
+        target_conn.close()
+
+
+def run(books, sales, seed=42, repeat=DEFAULT_REPEAT, base=None, only=None, log=print):
+    """Genera (o reutiliza) la base, ejecuta los casos y devuelve el reporte como diccionario."""
+    workdir = tempfile.mkdtemp(prefix="libreria-bench-")
+    try:
+        return _run(workdir, books, sales, seed, repeat, base, only, log)
+    finally:
+        close_connection()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run(workdir, books, sales, seed, repeat, base, only, log):
+    path = os.path.join(workdir, "bench.db")
+    generation = None
+    if base and os.path.exists(base):
+        log(f"Usando una copia de la base existente {base}")
+    else:
+        log(f"Generando {books} libros y {sales} ventas en {base or path}...")
+        started = time.perf_counter()
+        generate_database(base or path, books=books, sales=sales, seed=seed)
+        generation = time.perf_counter() - started
+        log(f"  listo en {generation:.1f} s")
+    if base:
+        close_connection()
+        _copy_database(base, path)
+    set_database_path(path)
+    create_tables()
+
+    month = (SALES_START.strftime("%Y-%m-01"), SALES_START.replace(month=2).strftime("%Y-%m-01"))
+    results = []
+    for name, func, case_repeat in build_cases(workdir, books, month):
+        if only and only not in name:
+            continue
+        timings, rows = run_case(func, case_repeat or repeat)
+        results.append({
+            "nombre": name,
+            "repeticiones": len(timings),
+            "min_ms": round(min(timings), 3),
+            "mediana_ms": round(statistics.median(timings), 3),
+            "media_ms": round(statistics.fmean(timings), 3),
+            "filas": rows,
+        })
+        log(f"  {name}: {results[-1]['mediana_ms']:.2f} ms")
+
+    return {
+        "commit": _git_commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "parametros": {"libros": books, "ventas": sales, "semilla": seed, "repeticiones": repeat},
+        "generacion_s": None if generation is None else round(generation, 2),
+        "resultados": results,
+    }
+
+
+def to_markdown(report, previous=None):
+    """Tabla markdown del reporte; con `previous` agrega la variación de la mediana."""
+    params = report["parametros"]
+    lines = [
+        f"## Benchmarks {report['commit'] or ''} ({report['fecha']})",
+        "",
+        f"{params['libros']} libros, {params['ventas']} ventas, semilla {params['semilla']}; "
+        f"Python {report['python']}, SQLite {report['sqlite']}.",
+        "",
+    ]
+    before = {}
+    if previous is not None:
+        before = {result["nombre"]: result for result in previous["resultados"]}
+        lines.append(f"Comparado con {previous['commit'] or previous['fecha']}.")
+        lines.append("")
+        lines.append("| Caso | Filas | Mín (ms) | Mediana (ms) | Antes (ms) | Variación |")
+        lines.append("|---|---:|---:|---:|---:|---:|")
+    else:
+        lines.append("| Caso | Filas | Mín (ms) | Mediana (ms) | Media (ms) |")
+        lines.append("|---|---:|---:|---:|---:|")
+
+    for result in report["resultados"]:
+        rows = "" if result["filas"] is None else result["filas"]
+        row = f"| {result['nombre']} | {rows} | {result['min_ms']:.2f} | {result['mediana_ms']:.2f} |"
+        if previous is None:
+            row += f" {result['media_ms']:.2f} |"
+        elif result["nombre"] in before:
+            old = before[result["nombre"]]["mediana_ms"]
+            change = (result["mediana_ms"] - old) / old * 100 if old else 0.0
+            row += f" {old:.2f} | {change:+.0f}% |"
+        else:
+            row += " | |"
+        lines.append(row)
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--libros", type=int, default=10000, help="Libros a generar (por defecto 10000).")
+    parser.add_argument("--ventas", type=int, default=100000, help="Ventas a generar (por defecto 100000).")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--base", help="Base a reutilizar (se genera si no existe).")
+    parser.add_argument("--solo", help="Ejecuta solo los casos cuyo nombre contiene este texto.")
+    parser.add_argument("--json", help="Guarda el reporte en este archivo JSON.")
+    parser.add_argument("--markdown", help="Guarda la tabla markdown en este archivo.")
+    parser.add_argument("--comparar", help="Reporte JSON anterior para comparar.")
+    args = parser.parse_args(argv)
+
+    log = lambda message: print(message, file=sys.stderr)
+    report = run(args.libros, args.ventas, seed=args.semilla, repeat=args.repeticiones,
+                 base=args.base, only=args.solo, log=log)
+
+    previous = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as file:
+            previous = json.load(file)
+    markdown = to_markdown(report, previous)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.markdown:
+        with open(args.markdown, "w", encoding="utf-8") as file:
+            file.write(markdown)
+    print(markdown)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Interfaz de línea de comandos para tareas por lotes (sin interfaz gráfica).
+
+No importa tkinter, así que arranca rápido y funciona en servidores sin
+pantalla (por ejemplo, desde cron).
+
+Ejemplos:
+    python cli.py importar proveedores.csv
+    python cli.py exportar ventas ventas.csv
+    python cli.py reporte --formato csv
+    python cli.py reporte --mes 2024-12 --agrupar genero
+    python cli.py stock --minimo 3
+    python cli.py mantenimiento --checkpoint --optimizar
+"""
+import argparse
+import csv
+import sqlite3
+import sys
+
+from logging_setup import setup_logging
+from database.connection import create_tables, get_connection, DB_PATH
+from database.importer import import_catalog, DEFAULT_CHUNK_SIZE
+from database.exporter import export_csv, EXPORTS
+from database.migrations import get_schema_version, MigrationError
+from database import maintenance
+from database.aggregates import rebuild_aggregates, check_aggregates
+from database.models import fetch_low_stock
+from database.reports import sales_report, sales_by_edition, sales_by_title, month_range, GROUPINGS
+
+
+def _print_progress(done, total=None):
+    print(f"  {done} filas procesadas...", file=sys.stderr)
+
+
+def cmd_import(args):
+    """Importa un catálogo de libros desde CSV/JSON."""
+    result = import_catalog(
+        args.archivo,
+        fmt=args.formato,
+        chunk_size=args.tanda,
+        errors_path=args.errores,
+        progress=_print_progress
+    )
+    print(f"Libros importados: {result.imported}")
+    print(f"Filas rechazadas: {result.rejected}")
+    if result.errors_path:
+        print(f"Detalle de errores: {result.errors_path}")
+    return 0 if not result.rejected else 1
+
+
+def cmd_export(args):
+    """Exporta libros, ventas o autores a CSV."""
+    total = export_csv(args.tabla, args.archivo, delimiter=args.separador)
+    print(f"Filas exportadas: {total}")
+    return 0
+
+
+def _print_table(headers, rows, fmt):
+    """Imprime filas como texto alineado o como CSV (para procesar con otras herramientas)."""
+    if fmt == "csv":
+        writer = csv.writer(sys.stdout, delimiter=";")
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("  ".join(f"{header:<{width}}" for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(f"{str(value):<{width}}" for value, width in zip(row, widths)))
+
+
+def month_arg(value):
+    """Tipo de argparse para --mes: AAAA-MM con el mes entre 1 y 12; devuelve (año, mes)."""
+    parts = value.split("-")
+    if len(parts) != 2 or len(parts[0]) != 4 or not all(part.isdigit() for part in parts):
+        raise argparse.ArgumentTypeError(f"mes no válido: {value!r} (use AAAA-MM, por ejemplo 2024-12)")
+    year, month = int(parts[0]), int(parts[1])
+    if not 1 <= month <= 12:
+        raise argparse.ArgumentTypeError(f"mes no válido: {value!r} (el mes va de 01 a 12)")
+    return year, month
+
+
+def cmd_report(args):
+    """Muestra el reporte de ventas por edición, por título, o agrupado por fecha/autor/género."""
+    start, end = args.desde, args.hasta
+    if args.mes:
+        start, end = month_range(*args.mes)
+
+    group_by = args.agrupar
+    if group_by == "edicion":
+        rows = [
+            (row.libro_id, row.titulo, row.autor, row.isbn, row.cantidad, f"{row.monto_total:.2f}")
+            for row in sales_by_edition(start, end, top=args.top)
+        ]
+        _print_table(["ID", "Título", "Autor", "ISBN", "Cantidad Vendida", "Total Ganado"], rows, args.formato)
+        return 0
+    if group_by == "titulo":
+        rows = [
+            (row.titulo, row.ediciones, row.cantidad, f"{row.monto_total:.2f}")
+            for row in sales_by_title(start, end, top=args.top)
+        ]
+        _print_table(["Título", "Ediciones", "Cantidad Vendida", "Total Ganado"], rows, args.formato)
+        return 0
+
+    report = sales_report(group_by, start, end, top=args.top)
+    rows = [
+        (row.clave, row.num_ventas, row.cantidad, f"{row.monto_total:.2f}", f"{row.acumulado:.2f}")
+        for row in report
+    ]
+    _print_table([group_by.capitalize(), "Ventas", "Cantidad", "Monto", "Acumulado"], rows, args.formato)
+    return 0
+
+
+def cmd_stock(args):
+    """Lista los libros con stock bajo; termina con código 2 si hay alguno."""
+    books = fetch_low_stock(args.minimo)
+    rows = [(book[0], book[1], book[2], book[4], book[6]) for book in books]
+    if rows or args.formato == "csv":
+        _print_table(["ID", "Título", "Autor", "ISBN", "Stock"], rows, args.formato)
+    else:
+        print(f"No hay libros con stock menor o igual a {args.minimo}.")
+    return 2 if rows else 0
+
+
+def cmd_maintenance(args):
+    """Ejecuta tareas de mantenimiento de la base de datos."""
+    print(f"Base de datos: {DB_PATH} (esquema versión {get_schema_version(get_connection())})")
+    status = 0
+    if args.verificar or args.verificar_completo:
+        problems = maintenance.integrity_check(full=args.verificar_completo)
+        print("Integridad: ok" if not problems else "Integridad: con errores")
+        for problem in problems:
+            print(f"  {problem}")
+        status = 1 if problems else status
+    if args.verificar_resumenes:
+        problems = check_aggregates()
+        print("Resúmenes de ventas: ok" if not problems else f"Resúmenes de ventas: {len(problems)} diferencias")
+        for table, key, saved, computed in problems[:20]:
+            print(f"  {table}[{key}]: guardado {saved}, calculado {computed}")
+        status = 1 if problems else status
+    if args.reconstruir_resumenes:
+        rebuild_aggregates()
+        print("Resúmenes de ventas reconstruidos.")
+    if args.optimizar:
+        maintenance.optimize()
+        print("Estadísticas e índice de búsqueda optimizados.")
+    if args.checkpoint:
+        busy, log_pages, copied = maintenance.checkpoint()
+        print(f"Checkpoint del WAL: {copied}/{log_pages} páginas copiadas" + (" (ocupado)" if busy else ""))
+    if args.vacuum:
+        maintenance.vacuum()
+        print("Base de datos compactada (VACUUM).")
+    return status
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="libreria", description="Tareas por lotes de la librería.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    importar = subparsers.add_parser("importar", help="Importa un catálogo de libros (CSV, JSON o JSONL).")
+    importar.add_argument("archivo")
+    importar.add_argument("--formato", choices=("csv", "json", "jsonl"), help="Por defecto según la extensión.")
+    importar.add_argument("--tanda", type=int, default=DEFAULT_CHUNK_SIZE, help="Libros por transacción.")
+    importar.add_argument("--errores", help="Archivo para las filas rechazadas.")
+    importar.set_defaults(func=cmd_import)
+
+    exportar = subparsers.add_parser("exportar", help="Exporta una tabla a CSV.")
+    exportar.add_argument("tabla", choices=sorted(EXPORTS))
+    exportar.add_argument("archivo")
+    exportar.add_argument("--separador", default=";", help="Separador de columnas (por defecto ';').")
+    exportar.set_defaults(func=cmd_export)
+
+    reporte = subparsers.add_parser("reporte", help="Reporte de ventas (por defecto, por edición).")
+    reporte.add_argument("--formato", choices=("texto", "csv"), default="texto")
+    reporte.add_argument("--agrupar", choices=("edicion", "titulo") + GROUPINGS, default="edicion",
+                         help="Agrupa por edición, título, fecha, autor o género.")
+    reporte.add_argument("--desde", help="Fecha inicial incluida (AAAA-MM-DD).")
+    reporte.add_argument("--hasta", help="Fecha final excluida (AAAA-MM-DD).")
+    reporte.add_argument("--mes", type=month_arg, help="Mes completo (AAAA-MM); reemplaza --desde y --hasta.")
+    reporte.add_argument("--top", type=int, help="Solo los N grupos de mayor monto.")
+    reporte.set_defaults(func=cmd_report)
+
+    stock = subparsers.add_parser("stock", help="Libros con stock bajo (código de salida 2 si hay alguno).")
+    stock.add_argument("--minimo", type=int, default=5, help="Umbral de stock (por defecto 5).")
+    stock.add_argument("--formato", choices=("texto", "csv"), default="texto")
+    stock.set_defaults(func=cmd_stock)
+
+    mantenimiento = subparsers.add_parser("mantenimiento", help="Verificación y mantenimiento de la base de datos.")
+    mantenimiento.add_argument("--verificar", action="store_true", help="Verificación rápida (quick_check).")
+    mantenimiento.add_argument("--verificar-completo", action="store_true", help="Verificación completa.")
+    mantenimiento.add_argument("--verificar-resumenes", action="store_true",
+                               help="Compara los resúmenes de ventas con las ventas.")
+    mantenimiento.add_argument("--reconstruir-resumenes", action="store_true",
+                               help="Recalcula los resúmenes de ventas.")
+    mantenimiento.add_argument("--optimizar", action="store_true", help="ANALYZE, PRAGMA optimize e índice FTS.")
+    mantenimiento.add_argument("--checkpoint", action="store_true", help="Vuelca y trunca el WAL.")
+    mantenimiento.add_argument("--vacuum", action="store_true", help="Compacta el archivo (bloquea la base).")
+    mantenimiento.set_defaults(func=cmd_maintenance)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    try:
+        create_tables()  # Crea la base o aplica migraciones pendientes
+    except (MigrationError, sqlite3.Error) as e:
+        print(f"No se pudo preparar la base de datos: {e}", file=sys.stderr)
+        return 1
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
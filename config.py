@@ -0,0 +1,38 @@
+import os
+import configparser
+
+# Directorio de la aplicación: las rutas relativas se resuelven desde aquí
+# y no desde el directorio de trabajo con el que se lanzó el programa.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CONFIG_FILE = os.environ.get("LIBRERIA_CONFIG", os.path.join(BASE_DIR, "libreria.ini"))
+
+_parser = None
+
+
+def load_config():
+    """Lee (una sola vez) el archivo de configuración, si existe."""
+    global _parser
+    if _parser is None:
+        _parser = configparser.ConfigParser()
+        _parser.read(CONFIG_FILE, encoding="utf-8")
+    return _parser
+
+
+def get_setting(section, key, default=None, env=None):
+    """Obtiene un valor de configuración.
+
+    La variable de entorno `env` (si se indica) tiene prioridad sobre el
+    archivo de configuración, y este sobre el valor por defecto.
+    """
+    if env and os.environ.get(env):
+        return os.environ[env]
+    return load_config().get(section, key, fallback=default)
+
+
+def resolve_path(path):
+    """Convierte una ruta relativa en absoluta respecto al directorio de la aplicación."""
+    path = os.path.expanduser(path)
+    if path == ":memory:" or os.path.isabs(path):
+        return path
+    return os.path.join(BASE_DIR, path)
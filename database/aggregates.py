@@ -0,0 +1,48 @@
+"""Mantenimiento de los resúmenes de ventas materializados (ver migración 5).
+
+Las tablas ventas_por_libro, ventas_por_dia, ventas_por_autor y
+ventas_por_genero se actualizan con triggers en cada venta y las leen los
+reportes (ver reports.py). Aquí se reconstruyen y se verifican contra las ventas.
+"""
+from database.connection import db_cursor, transaction
+from database.instrumentation import instrumented
+from database.migrations import SALES_SUMMARIES, rebuild_sales_summaries
+
+# Diferencia admitida entre montos al verificar (los REAL acumulan redondeo)
+AMOUNT_TOLERANCE = 0.005
+
+
+@instrumented
+def rebuild_aggregates():
+    """Recalcula los resúmenes desde la tabla de ventas (una sola transacción)."""
+    with transaction(immediate=True) as cursor:
+        rebuild_sales_summaries(cursor)
+
+
+@instrumented
+def check_aggregates():
+    """Compara los resúmenes con las ventas y devuelve las diferencias encontradas.
+
+    Cada diferencia es (tabla, clave, valores_guardados, valores_calculados);
+    la lista vacía indica que los resúmenes son consistentes.
+    """
+    problems = []
+    with db_cursor() as cursor:
+        for table, key, expression in SALES_SUMMARIES:
+            cursor.execute(f'''
+                SELECT {expression}, COUNT(*), SUM(ventas.cantidad), SUM(ventas.monto_total)
+                FROM ventas
+                JOIN libros ON ventas.libro_id = libros.id
+                GROUP BY {expression}
+            ''')
+            expected = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute(f"SELECT {key}, num_ventas, cantidad, monto_total FROM {table}")
+            stored = {row[0]: row[1:] for row in cursor.fetchall() if row[1] != 0}
+
+            for value in expected.keys() | stored.keys():
+                saved = stored.get(value, (0, 0, 0.0))
+                computed = expected.get(value, (0, 0, 0.0))
+                if (saved[0] != computed[0] or saved[1] != computed[1]
+                        or abs(saved[2] - computed[2]) > AMOUNT_TOLERANCE):
+                    problems.append((table, value, saved, computed))
+    return problems
@@ -0,0 +1,153 @@
+"""Fachada asyncio de la capa de datos.
+
+Las funciones de models.py y reports.py son bloqueantes. AsyncDatabase las
+ejecuta en hilos dedicados y devuelve corrutinas, así un servicio o una
+integración asyncio atiende muchos pedidos a la vez sin bloquear el bucle
+de eventos ni abrir una conexión por llamada:
+
+- las lecturas van a un pool chico de hilos; cada hilo reutiliza su propia
+  conexión (ver connection.get_connection) y con WAL leen en paralelo;
+- las escrituras van a un único hilo escritor, así nunca compiten entre
+  ellas por el bloqueo de SQLite;
+- como mucho `max_pending` operaciones esperan o se ejecutan a la vez; las
+  siguientes esperan (sin bloquear el bucle) a que se libere un lugar.
+
+Ejemplo:
+    async with AsyncDatabase() as db:
+        books, next_key = await db.fetch_books_page(limit=50)
+        result = await db.register_sale(books[0][0], 1)  # SaleResult
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import models, reports
+from database.connection import close_connection
+
+# Hilos de lectura por defecto
+DEFAULT_READERS = 4
+
+# Operaciones admitidas a la vez (en cola o en ejecución)
+DEFAULT_MAX_PENDING = 256
+
+# Segundos que close() espera a que todos los hilos de lectura estén libres
+BARRIER_TIMEOUT = 30
+
+
+class AsyncDatabase:
+    """Ejecuta las funciones de la capa de datos en hilos dedicados y las expone como corrutinas."""
+
+    def __init__(self, readers=DEFAULT_READERS, max_pending=DEFAULT_MAX_PENDING):
+        self.readers = readers
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="libreria-aio-lectura")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="libreria-aio-escritura")
+        self._slots = asyncio.Semaphore(max_pending)
+        self.pending = 0
+        self.closed = False
+
+    async def run(self, func, *args, write=False, **kwargs):
+        """Ejecuta `func(*args, **kwargs)` en el hilo escritor (`write=True`) o en uno de lectura."""
+        if self.closed:
+            raise RuntimeError("La base asíncrona está cerrada")
+        executor = self._write_executor if write else self._read_executor
+        async with self._slots:
+            self.pending += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    executor, functools.partial(func, *args, **kwargs)
+                )
+            finally:
+                self.pending -= 1
+
+    async def close(self):
+        """Espera las operaciones en curso, cierra las conexiones de los hilos y los libera."""
+        if self.closed:
+            return
+        self.closed = True
+        loop = asyncio.get_running_loop()
+        # Una tarea por hilo: la barrera asegura que cada hilo de lectura cierre su propia conexión
+        barrier = threading.Barrier(self.readers, timeout=BARRIER_TIMEOUT)
+        await asyncio.gather(
+            loop.run_in_executor(self._write_executor, close_connection),
+            *(loop.run_in_executor(self._read_executor, _close_after, barrier) for _ in range(self.readers)),
+        )
+        self._read_executor.shutdown()
+        self._write_executor.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+    # Catálogo
+    async def fetch_books(self):
+        return await self.run(models.fetch_books)
+
+    async def fetch_books_page(self, after=None, limit=200, order_by="id"):
+        return await self.run(models.fetch_books_page, after, limit, order_by)
+
+    async def count_books(self):
+        return await self.run(models.count_books)
+
+    async def get_book_by_id(self, book_id):
+        return await self.run(models.get_book_by_id, book_id)
+
+    async def get_book_by_isbn(self, isbn):
+        return await self.run(models.get_book_by_isbn, isbn)
+
+    async def search_books(self, query, limit=500):
+        return await self.run(models.search_books, query, limit)
+
+    async def fetch_low_stock(self, threshold=5):
+        return await self.run(models.fetch_low_stock, threshold)
+
+    async def fetch_authors(self):
+        return await self.run(models.fetch_authors)
+
+    async def insert_book(self, data):
+        return await self.run(models.insert_book, data, write=True)
+
+    async def update_book(self, book_id, data):
+        return await self.run(models.update_book, book_id, data, write=True)
+
+    async def delete_book(self, book_id):
+        return await self.run(models.delete_book, book_id, write=True)
+
+    async def data_fingerprint(self):
+        return await self.run(models.data_fingerprint)
+
+    # Ventas
+    async def fetch_sales(self, start=None, end=None):
+        return await self.run(models.fetch_sales, start, end)
+
+    async def fetch_sales_by_book(self, libro_id):
+        return await self.run(models.fetch_sales_by_book, libro_id)
+
+    async def insert_sale(self, data):
+        return await self.run(models.insert_sale, data, write=True)
+
+    async def register_sale(self, libro_id, cantidad, fecha=None):
+        return await self.run(models.register_sale, libro_id, cantidad, fecha, write=True)
+
+    async def register_order(self, lines, fecha=None):
+        return await self.run(models.register_order, lines, fecha, write=True)
+
+    # Reportes
+    async def sales_report(self, group_by="dia", start=None, end=None, top=None):
+        return await self.run(reports.sales_report, group_by, start, end, top)
+
+    async def sales_totals(self, start=None, end=None):
+        return await self.run(reports.sales_totals, start, end)
+
+    async def sales_by_edition(self, start=None, end=None, top=None):
+        return await self.run(reports.sales_by_edition, start, end, top)
+
+    async def sales_by_title(self, start=None, end=None, top=None):
+        return await self.run(reports.sales_by_title, start, end, top)
+
+
+def _close_after(barrier):
+    barrier.wait()
+    close_connection()
@@ -0,0 +1,27 @@
+"""Funciones de datos que usa la interfaz: de la base local o del servidor.
+
+Sin `[cliente] servidor` (ni LIBRERIA_SERVIDOR) son las de models.py y
+reports.py; con un servidor configurado son las de remote.py, que tienen
+la misma firma y devuelven los mismos tipos.
+"""
+from database.remote import SERVER_URL
+
+REMOTE = bool(SERVER_URL)
+
+if REMOTE:
+    from database.remote import (
+        insert_book, update_book, search_books, delete_book, fetch_authors, get_author_by_name,
+        insert_author, fetch_books, fetch_books_page, fetch_book_titles, get_book_by_title,
+        fetch_sales, insert_sale, register_sale, register_order, data_fingerprint, sales_by_edition,
+        export_csv,
+    )
+else:
+    from database.models import (
+        insert_book, update_book, search_books, delete_book, fetch_authors, get_author_by_name,
+        insert_author, fetch_books, fetch_books_page, fetch_book_titles, get_book_by_title,
+        fetch_sales, insert_sale, register_sale, register_order, data_fingerprint,
+    )
+    from database.reports import sales_by_edition
+    from database.exporter import export_csv
+
+from database.models import BOOK_SORT_COLUMNS
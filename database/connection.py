@@ -1,56 +1,142 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config import get_setting, resolve_path
+from database.migrations import apply_migrations
+from database import instrumentation
+
+DB_PATH = resolve_path(get_setting("database", "path", "libreria.db", env="LIBRERIA_DB"))
+DB_PROFILE = get_setting("database", "profile", "rendimiento", env="LIBRERIA_DB_PROFILE")
+
+# Cantidad de sentencias preparadas que sqlite3 mantiene en caché por conexión.
+# Las funciones de models.py usan un conjunto fijo de consultas, así que con
+# este tamaño todas quedan compiladas tras la primera ejecución.
+STATEMENT_CACHE_SIZE = 256
+
+# Segundos que una conexión espera a que se libere un bloqueo de escritura
+# antes de fallar con "database is locked".
+BUSY_TIMEOUT = 5.0
+
+# PRAGMAs por conexión del perfil "rendimiento". Con WAL los lectores
+# (reportes, exportaciones) no bloquean a los escritores (ventas) ni al revés.
+PERFORMANCE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA cache_size = -20000;",      # ~20 MB de caché de páginas
+    "PRAGMA mmap_size = 268435456;",    # 256 MB mapeados en memoria
+    "PRAGMA temp_store = MEMORY;",
+)
+
+# Cada hilo reutiliza su propia conexión (sqlite3 no permite compartirlas entre hilos).
+_local = threading.local()
+
 
 def connect_db():
-    """Establece la conexión con la base de datos."""
-    conn = sqlite3.connect("libreria.db")
+    """Establece una nueva conexión con la base de datos."""
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE)
     conn.execute("PRAGMA foreign_keys = ON;")  # Activar claves foráneas
+    if DB_PROFILE == "rendimiento":
+        for pragma in PERFORMANCE_PRAGMAS:
+            conn.execute(pragma)
+    instrumentation.install(conn)
     return conn
 
 
-def create_tables():
-    """Crea las tablas necesarias en la base de datos."""
-    try:
+def set_database_path(path):
+    """Cambia la base de datos utilizada por las conexiones que se abran a partir de ahora."""
+    global DB_PATH
+    close_connection()
+    DB_PATH = resolve_path(path)
+
+
+def get_connection():
+    """Devuelve la conexión reutilizable del hilo actual, creándola si no existe."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path != DB_PATH:
+        # La ruta cambió desde que se abrió la conexión de este hilo
+        close_connection()
+        conn = None
+    if conn is None:
         conn = connect_db()
-        cursor = conn.cursor()
-
-        # Crear tabla de autores
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS autores (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                nacionalidad TEXT
-               
-            )
-        ''')
-
-        # Crear tabla de libros
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS libros (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                titulo TEXT NOT NULL,
-                autor_id INTEGER NOT NULL,
-                genero TEXT NOT NULL,
-                isbn TEXT NOT NULL,
-                precio REAL NOT NULL,
-                stock INTEGER NOT NULL,
-                FOREIGN KEY (autor_id) REFERENCES autores (id)
-            )
-        ''')
-
-        # Crear tabla de ventas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ventas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                libro_id INTEGER NOT NULL,
-                cantidad INTEGER NOT NULL,
-                fecha TEXT NOT NULL,
-                monto_total REAL NOT NULL,
-                FOREIGN KEY (libro_id) REFERENCES libros (id)
-            )
-        ''')
-
-        conn.commit()
-    except Exception as e:
-        print(f"[ERROR] Error al crear tablas: {e}")
-    finally:
+        _local.conn = conn
+        _local.path = DB_PATH
+        _local.depth = 0
+        _local.on_commit = []
+    return conn
+
+
+def close_connection():
+    """Cierra la conexión del hilo actual (si existe)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
         conn.close()
+        _local.conn = None
+        _local.depth = 0
+        _local.on_commit = []
+
+
+@contextmanager
+def db_cursor():
+    """Entrega un cursor de la conexión del hilo actual para consultas de lectura."""
+    cursor = instrumentation.new_cursor(get_connection())
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def transaction(immediate=False):
+    """Ejecuta el bloque dentro de una transacción.
+
+    Confirma al salir y revierte si ocurre una excepción. Las transacciones
+    anidadas se integran en la más externa, que es la única que confirma.
+    Con `immediate=True` la transacción toma el bloqueo de escritura al
+    comenzar (BEGIN IMMEDIATE), así dos cajas no leen y escriben a la vez.
+    """
+    conn = get_connection()
+    cursor = instrumentation.new_cursor(conn)
+    _local.depth += 1
+    try:
+        if immediate and _local.depth == 1 and not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        yield cursor
+        if _local.depth == 1:
+            conn.commit()
+            callbacks, _local.on_commit = _local.on_commit, []
+            for callback in callbacks:
+                callback()
+    except BaseException:
+        if _local.depth == 1:
+            _local.on_commit = []
+            conn.rollback()
+        raise
+    finally:
+        _local.depth -= 1
+        cursor.close()
+
+
+def on_commit(callback):
+    """Ejecuta `callback()` cuando se confirme la transacción en curso del hilo.
+
+    Si la transacción se revierte, el callback se descarta; fuera de una
+    transacción se ejecuta de inmediato. Sirve para actualizar cachés solo
+    con datos que quedaron guardados.
+    """
+    if getattr(_local, "depth", 0) == 0:
+        callback()
+    else:
+        _local.on_commit.append(callback)
+
+
+def create_tables():
+    """Crea las tablas necesarias y aplica las migraciones pendientes.
+
+    Los errores no se ocultan (ver migrations.MigrationError): quien llama
+    debe terminar en lugar de usar una base con el esquema incompleto.
+    """
+    if DB_PROFILE == "rendimiento":
+        # journal_mode es persistente: basta con fijarlo una vez por base de datos
+        get_connection().execute("PRAGMA journal_mode = WAL;")
+
+    apply_migrations(get_connection())
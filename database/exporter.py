@@ -0,0 +1,109 @@
+"""Exportación a CSV directamente desde el cursor de la base de datos.
+
+Las filas se leen con fetchmany y se escriben a medida que llegan, así que
+la memoria usada no depende del tamaño de la tabla exportada.
+"""
+import csv
+import os
+
+from database.connection import db_cursor
+
+# Encabezados y consulta de cada exportación disponible
+EXPORTS = {
+    "libros": (
+        ["ID", "Título", "Autor", "Género", "ISBN", "Precio", "Stock"],
+        '''
+        SELECT libros.id, libros.titulo, autores.nombre, libros.genero, libros.isbn, libros.precio, libros.stock
+        FROM libros
+        JOIN autores ON libros.autor_id = autores.id
+        ORDER BY libros.id
+        ''',
+    ),
+    "ventas": (
+        ["ID", "Libro ID", "Título", "Cantidad", "Fecha", "Monto Total", "Pedido"],
+        '''
+        SELECT ventas.id, ventas.libro_id, libros.titulo, ventas.cantidad, ventas.fecha,
+               ventas.monto_total, ventas.pedido_id
+        FROM ventas
+        JOIN libros ON ventas.libro_id = libros.id
+        ORDER BY ventas.id
+        ''',
+    ),
+    "autores": (
+        ["ID", "Nombre", "Nacionalidad"],
+        "SELECT id, nombre, nacionalidad FROM autores ORDER BY id",
+    ),
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Tamaño del búfer de escritura del archivo (1 MB)
+WRITE_BUFFER = 1 << 20
+
+
+class ExportCancelled(Exception):
+    """La exportación se canceló antes de terminar."""
+
+
+def _count_rows(table):
+    with db_cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def write_rows(file_path, headers, rows, delimiter=";", progress=None, cancel_event=None, total=None):
+    """Escribe filas (cualquier iterable) en un CSV y devuelve la cantidad escrita.
+
+    Se escribe primero en un archivo temporal que reemplaza al destino al
+    terminar, así una exportación cancelada o fallida no deja un CSV a medias.
+    """
+    temp_path = f"{file_path}.tmp"
+    written = 0
+    try:
+        with open(temp_path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as file:
+            writer = csv.writer(file, delimiter=delimiter)
+            writer.writerow(headers)
+            for row in rows:
+                writer.writerow(row)
+                written += 1
+                if written % DEFAULT_CHUNK_SIZE == 0:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ExportCancelled()
+                    if progress is not None:
+                        progress(written, total)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if progress is not None:
+        progress(written, total)
+    return written
+
+
+def _iter_query(sql, chunk_size):
+    with db_cursor() as cursor:
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+
+def iter_export(kind, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Devuelve (encabezados, filas) de una exportación; las filas se leen a medida que se recorren."""
+    if kind not in EXPORTS:
+        raise ValueError(f"Exportación desconocida: {kind}")
+    headers, sql = EXPORTS[kind]
+    return headers, _iter_query(sql, chunk_size)
+
+
+def export_csv(kind, file_path, chunk_size=DEFAULT_CHUNK_SIZE, delimiter=";", progress=None, cancel_event=None):
+    """Exporta 'libros', 'ventas' o 'autores' a un CSV y devuelve las filas escritas."""
+    headers, rows = iter_export(kind, chunk_size)
+    total = _count_rows(kind) if progress is not None else None
+    return write_rows(
+        file_path, headers, rows,
+        delimiter=delimiter, progress=progress, cancel_event=cancel_event, total=total
+    )
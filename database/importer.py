@@ -0,0 +1,211 @@
+"""Importación masiva del catálogo desde archivos CSV o JSON.
+
+Los archivos se leen por tandas (sin cargarlos completos en memoria, salvo
+JSON de un único arreglo) y cada tanda se inserta con executemany dentro de
+una sola transacción. Los autores se resuelven con un diccionario en memoria
+en lugar de consultar la base por cada libro.
+"""
+import csv
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from database.connection import db_cursor, transaction
+from database.models import catalog_cache, remove_accents
+
+CATALOG_FIELDS = ("titulo", "autor", "genero", "isbn", "precio", "stock")
+
+# Resultado de una importación: filas importadas, rechazadas y archivo de errores
+ImportResult = namedtuple("ImportResult", ["imported", "rejected", "errors_path"])
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Máximo de parámetros por consulta al resolver autores nuevos
+_NAMES_PER_QUERY = 500
+
+
+@lru_cache(maxsize=256)
+def _normalize_header(name):
+    return remove_accents((name or "").strip()).casefold()
+
+
+def detect_format(path):
+    """Deduce el formato por la extensión: csv, json o jsonl."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".json", ".jsonl", ".ndjson"):
+        return "jsonl" if extension != ".json" else "json"
+    return "csv"
+
+
+def _json_row(item):
+    """Libro leído de JSON con las columnas normalizadas; lanza ValueError si no es un objeto."""
+    if not isinstance(item, dict):
+        raise ValueError("cada libro debe ser un objeto")
+    return {_normalize_header(k): v for k, v in item.items()}
+
+
+def read_catalog(path, fmt=None):
+    """Recorre el archivo y entrega (número_de_fila, diccionario, error) por cada libro.
+
+    Las columnas se reconocen sin importar mayúsculas ni acentos ("Título",
+    "titulo"), por lo que acepta los CSV generados por la exportación. El
+    error es None salvo en las líneas JSON que no se pueden leer (o que no
+    son un objeto): esas llegan con un diccionario vacío y el ValueError,
+    para que se informen como rechazadas sin cortar la importación.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            sample = file.read(4096)
+            file.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.reader(file, dialect)
+            header = [_normalize_header(name) for name in next(reader, [])]
+            for line_number, values in enumerate(reader, start=2):
+                if values:
+                    yield line_number, dict(zip(header, values)), None
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as file:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        row = _json_row(json.loads(line))
+                    except ValueError as e:
+                        yield line_number, {}, ValueError(f"JSON inválido: {e}")
+                        continue
+                    yield line_number, row, None
+    elif fmt == "json":
+        with open(path, encoding="utf-8") as file:
+            try:
+                items = json.load(file)
+            except json.JSONDecodeError as e:
+                # Un archivo JSON dañado no se puede leer por partes
+                yield e.lineno, {}, ValueError(f"JSON inválido: {e}")
+                return
+        if not isinstance(items, list):
+            yield 1, {}, ValueError("El archivo JSON debe contener una lista de libros")
+            return
+        for line_number, item in enumerate(items, start=1):
+            try:
+                row = _json_row(item)
+            except ValueError as e:
+                yield line_number, {}, ValueError(f"JSON inválido: {e}")
+                continue
+            yield line_number, row, None
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+
+def parse_book(row):
+    """Valida una fila y devuelve (titulo, autor, genero, isbn, precio, stock)."""
+    missing = [field for field in CATALOG_FIELDS if str(row.get(field, "")).strip() == ""]
+    if missing:
+        raise ValueError(f"Faltan campos: {', '.join(missing)}")
+    try:
+        precio = float(str(row["precio"]).strip().replace(",", "."))
+        stock = int(str(row["stock"]).strip())
+    except ValueError:
+        raise ValueError("Los campos 'precio' y 'stock' deben ser numéricos")
+    if precio < 0 or stock < 0:
+        raise ValueError("El precio y el stock no pueden ser negativos")
+    return (
+        str(row["titulo"]).strip(),
+        str(row["autor"]).strip(),
+        str(row["genero"]).strip(),
+        str(row["isbn"]).strip(),
+        precio,
+        stock,
+    )
+
+
+def _load_authors():
+    with db_cursor() as cursor:
+        cursor.execute("SELECT nombre, id FROM autores")
+        return dict(cursor.fetchall())
+
+
+def _resolve_authors(cursor, authors, names):
+    """Crea los autores que faltan y agrega sus IDs al diccionario `authors`."""
+    new_names = sorted({name for name in names if name not in authors})
+    if not new_names:
+        return
+    cursor.executemany(
+        "INSERT OR IGNORE INTO autores (nombre) VALUES (?)", [(name,) for name in new_names]
+    )
+    for start in range(0, len(new_names), _NAMES_PER_QUERY):
+        batch = new_names[start:start + _NAMES_PER_QUERY]
+        placeholders = ", ".join("?" for _ in batch)
+        cursor.execute(f"SELECT nombre, id FROM autores WHERE nombre IN ({placeholders})", batch)
+        authors.update(cursor.fetchall())
+
+
+def _insert_chunk(authors, books):
+    with transaction(immediate=True) as cursor:
+        _resolve_authors(cursor, authors, [book[1] for book in books])
+        cursor.executemany(
+            '''
+            INSERT INTO libros (titulo, autor_id, genero, isbn, precio, stock)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''',
+            [(titulo, authors[autor], genero, isbn, precio, stock)
+             for titulo, autor, genero, isbn, precio, stock in books]
+        )
+
+
+def import_catalog(path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, errors_path=None,
+                   progress=None, cancel_event=None):
+    """Importa los libros de un archivo CSV/JSON y devuelve un ImportResult.
+
+    Las filas inválidas no detienen la importación: se escriben en
+    `errors_path` (por defecto, junto al archivo con sufijo ".errores.csv")
+    con su número de fila y el motivo. `progress(filas_procesadas, None)` se
+    llama tras cada tanda; si `cancel_event` se activa, la importación se
+    detiene después de la tanda en curso (las tandas ya confirmadas quedan).
+    """
+    errors_path = errors_path or f"{path}.errores.csv"
+    errors_file = None
+    errors_writer = None
+    authors = _load_authors()
+    imported = rejected = processed = 0
+    chunk = []
+
+    try:
+        for line_number, row, error in read_catalog(path, fmt):
+            processed += 1
+            try:
+                if error is not None:
+                    raise error
+                chunk.append(parse_book(row))
+            except ValueError as e:
+                rejected += 1
+                if errors_writer is None:
+                    errors_file = open(errors_path, "w", newline="", encoding="utf-8")
+                    errors_writer = csv.writer(errors_file, delimiter=";")
+                    errors_writer.writerow(["fila", "error", *CATALOG_FIELDS])
+                errors_writer.writerow([line_number, str(e), *(row.get(field, "") for field in CATALOG_FIELDS)])
+
+            if len(chunk) >= chunk_size:
+                _insert_chunk(authors, chunk)
+                imported += len(chunk)
+                chunk = []
+                if progress is not None:
+                    progress(processed, None)
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+        else:
+            if chunk:
+                _insert_chunk(authors, chunk)
+                imported += len(chunk)
+                if progress is not None:
+                    progress(processed, None)
+    finally:
+        if errors_file is not None:
+            errors_file.close()
+        # Los títulos, ISBN y autores en caché pueden haber cambiado
+        catalog_cache.clear()
+
+    return ImportResult(imported, rejected, errors_path if rejected else None)
@@ -0,0 +1,288 @@
+"""Medición de consultas y funciones de la capa de datos.
+
+- TimedCursor mide cada sentencia desde execute() hasta la última lectura
+  de filas y la registra agrupada por su SQL normalizado.
+- @instrumented mide las funciones de models.py (latencia, filas devueltas
+  y errores).
+- Las sentencias que superan el umbral se guardan en el registro de
+  consultas lentas junto con su EXPLAIN QUERY PLAN.
+- Con `traza = si` (o LIBRERIA_SQL_TRACE=1) cada sentencia ejecutada por la
+  conexión, incluidas las de los triggers, se escribe en el log (DEBUG).
+
+Configuración en la sección [diagnostico] de libreria.ini.
+"""
+import functools
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config import get_setting
+
+ENABLED = get_setting("diagnostico", "activo", "si", env="LIBRERIA_DIAGNOSTICO").lower() not in ("no", "0", "false")
+SLOW_QUERY_MS = float(get_setting("diagnostico", "umbral_ms", "100", env="LIBRERIA_SLOW_MS"))
+TRACE_SQL = get_setting("diagnostico", "traza", "no", env="LIBRERIA_SQL_TRACE").lower() in ("si", "1", "true")
+
+# Límites superiores (ms) de los intervalos del histograma de latencias
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, float("inf"))
+
+# Consultas lentas que se conservan (las más recientes)
+SLOW_LOG_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sql(sql):
+    """SQL en una sola línea, con las listas de parámetros (?, ?, ...) unificadas."""
+    sql = " ".join(sql.split())
+    return re.sub(r"\?(?:\s*,\s*\?)+", "?, ...", sql)
+
+
+class Stat:
+    """Cantidad, tiempos, filas e histograma de una consulta o función."""
+
+    __slots__ = ("count", "errors", "total_ms", "max_ms", "rows", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, elapsed_ms, rows=0, error=False):
+        self.count += 1
+        self.errors += error
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows or 0
+        for index, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction):
+        """Límite superior del intervalo que contiene el percentil indicado (0-1)."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "cantidad": self.count,
+            "errores": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "media_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "filas": self.rows,
+            "histograma": {
+                ("+inf" if bound == float("inf") else f"<={bound:g}ms"): count
+                for bound, count in zip(BUCKETS_MS, self.buckets)
+            },
+        }
+
+
+class Registry:
+    """Estadísticas acumuladas de consultas y funciones (seguro entre hilos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = {}
+        self.functions = {}
+        self.slow = deque(maxlen=SLOW_LOG_SIZE)
+        self.started = datetime.now()
+
+    def record_query(self, sql, elapsed_ms, rows):
+        with self._lock:
+            self.queries.setdefault(normalize_sql(sql), Stat()).add(elapsed_ms, rows)
+
+    def record_function(self, name, elapsed_ms, rows, error):
+        with self._lock:
+            self.functions.setdefault(name, Stat()).add(elapsed_ms, rows, error)
+
+    def record_slow(self, sql, params, elapsed_ms, rows, plan):
+        with self._lock:
+            self.slow.append({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "sql": normalize_sql(sql),
+                "parametros": repr(params)[:200],
+                "ms": round(elapsed_ms, 3),
+                "filas": rows,
+                "plan": plan,
+            })
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+            self.functions.clear()
+            self.slow.clear()
+            self.started = datetime.now()
+
+    def snapshot(self):
+        """Copia de las estadísticas como diccionarios (para mostrar o guardar)."""
+        with self._lock:
+            return {
+                "desde": self.started.isoformat(timespec="seconds"),
+                "umbral_lenta_ms": SLOW_QUERY_MS,
+                "funciones": {name: stat.as_dict() for name, stat in self.functions.items()},
+                "consultas": {sql: stat.as_dict() for sql, stat in self.queries.items()},
+                "lentas": list(self.slow),
+            }
+
+
+registry = Registry()
+
+
+def explain(connection, sql, params=()):
+    """Devuelve el EXPLAIN QUERY PLAN de una sentencia como líneas de texto."""
+    try:
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error as e:
+        return [f"(sin plan: {e})"]
+    return [row[3] for row in rows]
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor que mide cada sentencia, incluida la lectura de sus filas.
+
+    La medición de una sentencia termina al ejecutar la siguiente o al
+    cerrar el cursor (db_cursor y transaction siempre lo cierran).
+    """
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._sql = None
+
+    def _start(self, sql, params, many=False):
+        self._finish()
+        self._sql = sql
+        self._params = params
+        self._many = many
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, elapsed_ms = self._sql, self._elapsed * 1000
+        self._sql = None
+        rows = self.rowcount if self._many or self._rows == 0 and self.rowcount > 0 else self._rows
+        registry.record_query(sql, elapsed_ms, rows)
+        if elapsed_ms >= SLOW_QUERY_MS:
+            # En executemany se explica con la primera fila de parámetros (ver executemany)
+            params = self._params
+            if sql.lstrip().upper().startswith("PRAGMA"):
+                plan = []
+            elif params is None:
+                plan = ["(sin plan: executemany con un iterador, no se guardó la primera fila de parámetros)"]
+            else:
+                plan = explain(self.connection, sql, params)
+            registry.record_slow(sql, params, elapsed_ms, rows, plan)
+            logger.warning("Consulta lenta (%.1f ms, %s filas): %s", elapsed_ms, rows, normalize_sql(sql)[:200])
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql, params=()):
+        self._start(sql, params)
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        # La primera fila sirve para explicar la sentencia si resulta lenta; un
+        # iterador no se puede leer dos veces, así que en ese caso no se guarda.
+        first = seq_of_params[0] if isinstance(seq_of_params, (list, tuple)) and seq_of_params else None
+        self._start(sql, first, many=True)
+        return self._timed(super().executemany, sql, seq_of_params)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def __next__(self):
+        row = self._timed(super().__next__)
+        self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+def install(connection):
+    """Activa la traza de SQL en una conexión nueva, si está configurada."""
+    if TRACE_SQL:
+        connection.set_trace_callback(lambda statement: logger.debug("SQL: %s", statement))
+
+
+def new_cursor(connection):
+    """Cursor de la conexión: medido si la instrumentación está activa."""
+    return connection.cursor(TimedCursor) if ENABLED else connection.cursor()
+
+
+def _count_rows(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])  # (filas, siguiente_clave) de las consultas paginadas
+    return 1 if result is not None else 0
+
+
+def instrumented(func):
+    """Decorador que registra latencia, filas devueltas y errores de una función de la capa de datos."""
+    if not ENABLED:
+        return func
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        result = None
+        error = False
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception:
+            error = True
+            raise
+        finally:
+            registry.record_function(name, (time.perf_counter() - started) * 1000, _count_rows(result), error)
+
+    return wrapper
+
+
+def dump(file_path, extra=None):
+    """Guarda las estadísticas y las consultas lentas en un archivo JSON.
+
+    `extra` agrega otras secciones al archivo (por ejemplo, las estadísticas de las cachés).
+    """
+    data = registry.snapshot()
+    data.update(extra or {})
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
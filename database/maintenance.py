@@ -0,0 +1,32 @@
+"""Tareas de mantenimiento de la base de datos (pensadas para ejecutarse por cron)."""
+from database.connection import get_connection, close_connection
+
+
+def integrity_check(full=False):
+    """Verifica la base de datos y devuelve la lista de problemas (vacía si está bien)."""
+    pragma = "integrity_check" if full else "quick_check"
+    rows = get_connection().execute(f"PRAGMA {pragma}").fetchall()
+    problems = [row[0] for row in rows]
+    return [] if problems == ["ok"] else problems
+
+
+def optimize():
+    """Actualiza las estadísticas del planificador y compacta el índice de búsqueda."""
+    conn = get_connection()
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    conn.execute("INSERT INTO libros_fts (libros_fts) VALUES ('optimize')")
+    conn.commit()
+
+
+def checkpoint():
+    """Vuelca el WAL en la base de datos y lo trunca. Devuelve (ocupado, páginas_log, páginas_copiadas)."""
+    return tuple(get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone())
+
+
+def vacuum():
+    """Reconstruye el archivo de la base de datos para recuperar espacio libre."""
+    conn = get_connection()
+    conn.execute("VACUUM")
+    # VACUUM cambia las páginas: se reabre la conexión para descartar su caché
+    close_connection()
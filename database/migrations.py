@@ -0,0 +1,366 @@
+"""Migraciones versionadas del esquema de la base de datos.
+
+La versión aplicada se guarda en `PRAGMA user_version`. Cada migración se
+ejecuta una sola vez, en su propia transacción, y nunca debe borrar datos:
+para cambiar el esquema se agregan migraciones nuevas al final de la lista.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _initial_schema(cursor):
+    """Versión 1: tablas originales (no hace nada si ya existen)."""
+    # Crear tabla de autores
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS autores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            nacionalidad TEXT
+        )
+    ''')
+
+    # Crear tabla de libros
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS libros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT NOT NULL,
+            autor_id INTEGER NOT NULL,
+            genero TEXT NOT NULL,
+            isbn TEXT NOT NULL,
+            precio REAL NOT NULL,
+            stock INTEGER NOT NULL,
+            FOREIGN KEY (autor_id) REFERENCES autores (id)
+        )
+    ''')
+
+    # Crear tabla de ventas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            libro_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            monto_total REAL NOT NULL,
+            FOREIGN KEY (libro_id) REFERENCES libros (id)
+        )
+    ''')
+
+
+def _indexes(cursor):
+    """Versión 2: índices para las búsquedas por autor, ISBN, título y ventas."""
+    # Unificar autores repetidos antes de exigir nombres únicos: los libros
+    # pasan al registro más antiguo, que conserva la primera nacionalidad conocida.
+    cursor.execute('''
+        UPDATE autores
+        SET nacionalidad = (
+            SELECT a2.nacionalidad FROM autores a2
+            WHERE a2.nombre = autores.nombre AND a2.nacionalidad IS NOT NULL
+            ORDER BY a2.id LIMIT 1
+        )
+        WHERE nacionalidad IS NULL
+    ''')
+    cursor.execute('''
+        UPDATE libros
+        SET autor_id = (
+            SELECT MIN(a2.id) FROM autores a1
+            JOIN autores a2 ON a2.nombre = a1.nombre
+            WHERE a1.id = libros.autor_id
+        )
+        WHERE autor_id IN (SELECT id FROM autores)
+    ''')
+    cursor.execute('''
+        DELETE FROM autores
+        WHERE id NOT IN (SELECT MIN(id) FROM autores GROUP BY nombre)
+    ''')
+
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_autores_nombre ON autores (nombre)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_libros_autor_id ON libros (autor_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_libros_isbn ON libros (isbn)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_libros_titulo ON libros (titulo)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ventas_libro_id ON ventas (libro_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha)")
+    cursor.execute("ANALYZE")
+
+
+def _search_index(cursor):
+    """Versión 3: índice de búsqueda de texto completo (FTS5) sobre el catálogo.
+
+    El tokenizador unicode61 con remove_diacritics 2 guarda los términos ya
+    normalizados (sin acentos y en minúsculas), así que "Garcia" encuentra
+    "García". El ISBN se indexa sin guiones. Los triggers mantienen el índice
+    sincronizado con libros y autores.
+    """
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS libros_fts USING fts5(
+            titulo, autor, genero, isbn,
+            tokenize = "unicode61 remove_diacritics 2"
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS libros_fts_insert AFTER INSERT ON libros BEGIN
+            INSERT INTO libros_fts (rowid, titulo, autor, genero, isbn)
+            VALUES (
+                new.id, new.titulo,
+                (SELECT nombre FROM autores WHERE id = new.autor_id),
+                new.genero, replace(new.isbn, '-', '')
+            );
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS libros_fts_delete AFTER DELETE ON libros BEGIN
+            DELETE FROM libros_fts WHERE rowid = old.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS libros_fts_update
+        AFTER UPDATE OF titulo, autor_id, genero, isbn ON libros BEGIN
+            DELETE FROM libros_fts WHERE rowid = old.id;
+            INSERT INTO libros_fts (rowid, titulo, autor, genero, isbn)
+            VALUES (
+                new.id, new.titulo,
+                (SELECT nombre FROM autores WHERE id = new.autor_id),
+                new.genero, replace(new.isbn, '-', '')
+            );
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS autores_fts_update AFTER UPDATE OF nombre ON autores BEGIN
+            UPDATE libros_fts SET autor = new.nombre
+            WHERE rowid IN (SELECT id FROM libros WHERE autor_id = new.id);
+        END
+    ''')
+
+    # Indexar el catálogo existente
+    cursor.execute("DELETE FROM libros_fts")
+    cursor.execute('''
+        INSERT INTO libros_fts (rowid, titulo, autor, genero, isbn)
+        SELECT libros.id, libros.titulo, autores.nombre, libros.genero, replace(libros.isbn, '-', '')
+        FROM libros
+        LEFT JOIN autores ON libros.autor_id = autores.id
+    ''')
+    cursor.execute("INSERT INTO libros_fts (libros_fts) VALUES ('optimize')")
+
+
+def _orders(cursor):
+    """Versión 4: pedidos con varias líneas.
+
+    Cada línea de un pedido es una fila de `ventas` con `pedido_id`, así los
+    reportes de ventas existentes incluyen las ventas hechas con carrito.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT NOT NULL,
+            monto_total REAL NOT NULL
+        )
+    ''')
+    cursor.execute("ALTER TABLE ventas ADD COLUMN pedido_id INTEGER REFERENCES pedidos (id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ventas_pedido_id ON ventas (pedido_id)")
+
+
+# Tablas de resumen de ventas: (tabla, columna clave, expresión de la clave a partir de una venta)
+SALES_SUMMARIES = (
+    ("ventas_por_libro", "libro_id", "ventas.libro_id"),
+    ("ventas_por_dia", "dia", "substr(ventas.fecha, 1, 10)"),
+    ("ventas_por_autor", "autor_id", "libros.autor_id"),
+    ("ventas_por_genero", "genero", "libros.genero"),
+)
+
+
+def rebuild_sales_summaries(cursor):
+    """Recalcula desde cero todas las tablas de resumen de ventas."""
+    for table, key, expression in SALES_SUMMARIES:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f'''
+            INSERT INTO {table} ({key}, num_ventas, cantidad, monto_total)
+            SELECT {expression}, COUNT(*), SUM(ventas.cantidad), SUM(ventas.monto_total)
+            FROM ventas
+            JOIN libros ON ventas.libro_id = libros.id
+            GROUP BY {expression}
+        ''')
+
+
+def _summary_add_statements(row, sign):
+    """Sentencias que suman (sign=1) o restan (sign=-1) la venta `row` (new/old) a cada resumen."""
+    statements = []
+    for table, key, expression in SALES_SUMMARIES:
+        value = expression.replace("ventas.", f"{row}.")
+        statements.append(f'''
+            INSERT INTO {table} ({key}, num_ventas, cantidad, monto_total)
+            SELECT {value}, {sign}, {sign} * {row}.cantidad, {sign} * {row}.monto_total
+            FROM libros WHERE libros.id = {row}.libro_id
+            ON CONFLICT ({key}) DO UPDATE SET
+                num_ventas = num_ventas + excluded.num_ventas,
+                cantidad = cantidad + excluded.cantidad,
+                monto_total = monto_total + excluded.monto_total;
+        ''')
+    return "".join(statements)
+
+
+def _sales_summaries(cursor):
+    """Versión 5: resúmenes de ventas por libro, día, autor y género.
+
+    Los triggers los mantienen al día con cada venta, y también cuando un
+    libro cambia de autor o de género, de modo que los reportes leen unas
+    pocas filas en lugar de recorrer toda la tabla de ventas.
+    """
+    for table, key, _ in SALES_SUMMARIES:
+        key_type = "INTEGER" if key.endswith("_id") else "TEXT"
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                {key} {key_type} PRIMARY KEY,
+                num_ventas INTEGER NOT NULL,
+                cantidad INTEGER NOT NULL,
+                monto_total REAL NOT NULL
+            )
+        ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS ventas_resumen_insert AFTER INSERT ON ventas BEGIN
+            {_summary_add_statements("new", 1)}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS ventas_resumen_delete AFTER DELETE ON ventas BEGIN
+            {_summary_add_statements("old", -1)}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS ventas_resumen_update
+        AFTER UPDATE OF libro_id, cantidad, fecha, monto_total ON ventas BEGIN
+            {_summary_add_statements("old", -1)}
+            {_summary_add_statements("new", 1)}
+        END
+    ''')
+
+    # Si un libro cambia de autor o de género, sus totales pasan al nuevo
+    for table, key in (("ventas_por_autor", "autor_id"), ("ventas_por_genero", "genero")):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS libros_resumen_{key}
+            AFTER UPDATE OF {key} ON libros WHEN old.{key} IS NOT new.{key} BEGIN
+                INSERT INTO {table} ({key}, num_ventas, cantidad, monto_total)
+                SELECT old.{key}, -num_ventas, -cantidad, -monto_total
+                FROM ventas_por_libro WHERE libro_id = new.id
+                ON CONFLICT ({key}) DO UPDATE SET
+                    num_ventas = num_ventas + excluded.num_ventas,
+                    cantidad = cantidad + excluded.cantidad,
+                    monto_total = monto_total + excluded.monto_total;
+                INSERT INTO {table} ({key}, num_ventas, cantidad, monto_total)
+                SELECT new.{key}, num_ventas, cantidad, monto_total
+                FROM ventas_por_libro WHERE libro_id = new.id
+                ON CONFLICT ({key}) DO UPDATE SET
+                    num_ventas = num_ventas + excluded.num_ventas,
+                    cantidad = cantidad + excluded.cantidad,
+                    monto_total = monto_total + excluded.monto_total;
+            END
+        ''')
+
+    rebuild_sales_summaries(cursor)
+
+
+def _iso_dates(cursor):
+    """Versión 6: fechas de ventas y pedidos en formato ISO 8601.
+
+    Las fechas escritas como DD/MM/AAAA o DD-MM-AAAA se pasan a AAAA-MM-DD
+    (conservando la hora si la tienen), así se ordenan como texto y los
+    filtros por rango pueden usar el índice. El índice de fecha pasa a
+    cubrir las columnas que leen los reportes.
+    """
+    for table in ("ventas", "pedidos"):
+        for separator in ("/", "-"):
+            pattern = f"[0-9][0-9]{separator}[0-9][0-9]{separator}[0-9][0-9][0-9][0-9]*"
+            cursor.execute(f'''
+                UPDATE {table}
+                SET fecha = substr(fecha, 7, 4) || '-' || substr(fecha, 4, 2) || '-' || substr(fecha, 1, 2)
+                            || replace(substr(fecha, 11), ' ', 'T')
+                WHERE fecha GLOB ?
+            ''', (pattern,))
+    cursor.execute("DROP INDEX IF EXISTS idx_ventas_fecha")
+    cursor.execute("CREATE INDEX idx_ventas_fecha ON ventas (fecha, libro_id, cantidad, monto_total)")
+
+
+def _sales_by_book_index(cursor):
+    """Versión 7: índice de ventas por libro que cubre cantidad y monto.
+
+    Las sumas por libro (reportes por edición, reconstrucción y verificación
+    de resúmenes) se resuelven leyendo solo el índice, sin tocar la tabla.
+    """
+    cursor.execute("DROP INDEX IF EXISTS idx_ventas_libro_id")
+    cursor.execute("CREATE INDEX idx_ventas_libro_id ON ventas (libro_id, cantidad, monto_total)")
+
+
+# Tablas cuyas modificaciones y borrados se cuentan en `versiones_datos`
+VERSIONED_TABLES = ("autores", "libros", "ventas")
+
+
+def _data_versions(cursor):
+    """Versión 8: contador de cambios por tabla para validar cachés.
+
+    Los triggers solo cuentan modificaciones y borrados; las inserciones ya
+    se reflejan en `sqlite_sequence` (las tablas usan AUTOINCREMENT), así que
+    una importación masiva no paga un trigger por fila.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versiones_datos (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO versiones_datos (tabla) VALUES (?)", (table,))
+        for event in ("UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE versiones_datos SET version = version + 1 WHERE tabla = '{table}';
+                END
+            ''')
+
+
+# (versión, descripción, función). Agregar siempre al final.
+MIGRATIONS = [
+    (1, "Esquema inicial", _initial_schema),
+    (2, "Índices de autores, libros y ventas", _indexes),
+    (3, "Índice de búsqueda de texto completo", _search_index),
+    (4, "Pedidos con varias líneas", _orders),
+    (5, "Resúmenes de ventas", _sales_summaries),
+    (6, "Fechas de ventas en formato ISO", _iso_dates),
+    (7, "Índice de ventas por libro", _sales_by_book_index),
+    (8, "Versiones de datos para cachés", _data_versions),
+]
+
+
+def get_schema_version(conn):
+    """Devuelve la versión del esquema registrada en la base de datos."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+class MigrationError(Exception):
+    """Una migración falló y se revirtió; la base quedó en la versión anterior."""
+
+    def __init__(self, version, description, error):
+        super().__init__(f"No se pudo aplicar la migración {version} ({description}): {error}")
+        self.version = version
+
+
+def apply_migrations(conn):
+    """Aplica las migraciones pendientes y devuelve la versión final del esquema.
+
+    Si una migración falla se revierte y se lanza MigrationError: las
+    siguientes dependen de ella, así que no se sigue con un esquema a medias.
+    """
+    current = get_schema_version(conn)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migrate(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise MigrationError(version, description, e) from e
+        logger.info("Migración %s aplicada: %s", version, description)
+        current = version
+    return current
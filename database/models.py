@@ -1,139 +1,375 @@
+import re
+import threading
+from collections import namedtuple
 import unicodedata
 import logging
-from database.connection import connect_db
+from datetime import date, datetime, time
+from database.connection import db_cursor, transaction, on_commit
+from database.instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+BOOK_COLUMNS = '''
+    libros.id, libros.titulo, autores.nombre AS autor, libros.genero, libros.isbn, libros.precio, libros.stock
+'''
+
+# Nombres de los campos de las filas de libros, ventas (fetch_sales) y autores,
+# en el orden de las consultas; se usan para convertirlas a JSON y de vuelta.
+BOOK_FIELDS = ("id", "titulo", "autor", "genero", "isbn", "precio", "stock")
+SALE_FIELDS = ("id", "titulo", "cantidad", "fecha", "monto_total")
+AUTHOR_FIELDS = ("id", "nombre", "nacionalidad")
+
+
+class CatalogCache:
+    """Caché en memoria de libros (por id, título e ISBN) y autores (por nombre).
+
+    Se llena a demanda, una fila por vez, y cada escritura de este módulo
+    invalida solo las entradas afectadas. Es seguro usarla desde varios hilos.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.books_by_id = {}
+        self.books_by_title = {}
+        self.books_by_isbn = {}
+        self.authors_by_name = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, index, key):
+        """Busca en el índice indicado y registra el acierto o fallo."""
+        with self._lock:
+            value = index.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def store_book(self, book):
+        with self._lock:
+            self.books_by_id[book[0]] = book
+            # Con títulos o ISBN repetidos se conserva el libro de menor id
+            current = self.books_by_title.get(book[1])
+            if current is None or current[0] >= book[0]:
+                self.books_by_title[book[1]] = book
+            current = self.books_by_isbn.get(book[4])
+            if current is None or current[0] >= book[0]:
+                self.books_by_isbn[book[4]] = book
+
+    def invalidate_book(self, book_id, titulo=None, isbn=None):
+        """Quita un libro de la caché, y también las entradas del título/ISBN indicados."""
+        with self._lock:
+            # Los IDs tomados de la tabla de la interfaz pueden llegar como texto
+            book = self.books_by_id.pop(int(book_id), None)
+            titles = {titulo} | ({book[1]} if book else set())
+            isbns = {isbn} | ({book[4]} if book else set())
+            for title in titles:
+                self.books_by_title.pop(title, None)
+            for code in isbns:
+                self.books_by_isbn.pop(code, None)
+
+    def store_author(self, nombre, author):
+        with self._lock:
+            self.authors_by_name[nombre] = author
+
+    def invalidate_author(self, nombre):
+        with self._lock:
+            self.authors_by_name.pop(nombre, None)
+
+    def clear(self):
+        """Vacía la caché (por ejemplo, tras una importación masiva)."""
+        with self._lock:
+            self.books_by_id.clear()
+            self.books_by_title.clear()
+            self.books_by_isbn.clear()
+            self.authors_by_name.clear()
+
+    def stats(self):
+        """Devuelve las estadísticas de aciertos y el tamaño de la caché."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "books": len(self.books_by_id),
+                "authors": len(self.authors_by_name),
+            }
+
+
+catalog_cache = CatalogCache()
+
+def cache_stats():
+    """Estadísticas de la caché del catálogo."""
+    return catalog_cache.stats()
+
+@instrumented
+def data_fingerprint():
+    """Huella de los datos: cambia con cada alta, modificación o baja de autores, libros o ventas.
+
+    Combina el último id asignado a cada tabla con los contadores de
+    `versiones_datos` (ver migración 8); son dos consultas de pocas filas.
+    """
+    with db_cursor() as cursor:
+        cursor.execute("SELECT name, seq FROM sqlite_sequence ORDER BY name")
+        sequences = tuple(cursor.fetchall())
+        cursor.execute("SELECT tabla, version FROM versiones_datos ORDER BY tabla")
+        return sequences + tuple(cursor.fetchall())
 
 # Funciones para autores
+@instrumented
 def fetch_authors():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM autores')
-    authors = cursor.fetchall()
-    conn.close()
-    return authors
+    with db_cursor() as cursor:
+        cursor.execute('SELECT * FROM autores')
+        return cursor.fetchall()
 
+@instrumented
 def insert_author(nombre, nacionalidad=None):
     """Inserta un autor en la base de datos."""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO autores (nombre, nacionalidad) VALUES (?, ?)", (nombre, nacionalidad)
-        )
-        conn.commit()
-        return cursor.lastrowid  # Retornar el ID del autor recién insertado
+        with transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO autores (nombre, nacionalidad) VALUES (?, ?)", (nombre, nacionalidad)
+            )
+            autor_id = cursor.lastrowid  # Retornar el ID del autor recién insertado
+            # Dentro de otra transaction() (insert_book, update_book) el autor solo
+            # existe si la externa se confirma: recién entonces se guarda en caché
+            on_commit(lambda: catalog_cache.store_author(nombre, (autor_id,)))
+        return autor_id
     except Exception as e:
-        print(f"[ERROR] Error al manejar autor: {e}")
+        logger.exception("Error al manejar autor: %s", e)
         return None
-    finally:
-        conn.close()
 
+@instrumented
 def get_author_by_name(nombre):
 
-    """Obtiene un autor por su nombre."""
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM autores WHERE nombre = ?", (nombre,))
-    author = cursor.fetchone()
-
-    conn.close()
+    """Obtiene un autor por su nombre (usa la caché del catálogo)."""
+    author = catalog_cache.get(catalog_cache.authors_by_name, nombre)
+    if author is not None:
+        return author
+    with db_cursor() as cursor:
+        cursor.execute("SELECT id FROM autores WHERE nombre = ?", (nombre,))
+        author = cursor.fetchone()
+    if author is not None:
+        catalog_cache.store_author(nombre, author)
     return author
 
 # Funciones para libros
+@instrumented
 def insert_book(data):
-    """Inserta un libro en la base de datos, gestionando al autor si no existe."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        # Validar datos de entrada
-        titulo_original = data[0].strip()
-        autor_nombre = data[1]
-
-
-        if not titulo_original:
-            raise ValueError("El título no puede estar vacío.")
-        if not autor_nombre or not isinstance(autor_nombre, str):
-            raise ValueError(f"Nombre del autor no válido: {autor_nombre}")
-
-        # Verificar si el autor existe
-        author = get_author_by_name(autor_nombre)
+    """Inserta un libro en la base de datos, gestionando al autor si no existe.
 
-        if not author:
-            autor_id = insert_author(autor_nombre, None)
-        else:
-            autor_id = author[0]  # ID del autor existente
-
-        # Crear datos para el libro
-        book_data = (titulo_original, autor_id, *data[2:])  # (titulo, autor_id, genero, isbn, precio, stock)
-
-        # Insertar el libro
-        cursor.execute('''
-            INSERT INTO libros (titulo, autor_id, genero, isbn, precio, stock)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', book_data)
-        conn.commit()
+    Devuelve el ID del libro nuevo, o None si no se pudo insertar (el error queda en el log).
+    """
+    try:
+        with transaction() as cursor:
+            # Validar datos de entrada
+            titulo_original = data[0].strip()
+            autor_nombre = data[1]
+
+
+            if not titulo_original:
+                raise ValueError("El título no puede estar vacío.")
+            if not autor_nombre or not isinstance(autor_nombre, str):
+                raise ValueError(f"Nombre del autor no válido: {autor_nombre}")
+
+            # Verificar si el autor existe (dentro de la misma transacción)
+            author = get_author_by_name(autor_nombre)
+
+            if not author:
+                autor_id = insert_author(autor_nombre, None)
+            else:
+                autor_id = author[0]  # ID del autor existente
+
+            # Crear datos para el libro
+            book_data = (titulo_original, autor_id, *data[2:])  # (titulo, autor_id, genero, isbn, precio, stock)
+
+            # Insertar el libro
+            cursor.execute('''
+                INSERT INTO libros (titulo, autor_id, genero, isbn, precio, stock)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', book_data)
+        # Un título o ISBN repetido podría estar en caché apuntando a otro libro
+        catalog_cache.invalidate_book(cursor.lastrowid, titulo_original, book_data[3])
+        return cursor.lastrowid
     except Exception as e:
-        print(f"[ERROR] Error al insertar libro: {e}")
-    finally:
-        conn.close()
+        logger.exception("Error al insertar libro: %s", e)
 
 
+@instrumented
 def fetch_books():
     """Obtiene todos los libros de la base de datos."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
     try:
-        sql_query = '''
-            SELECT 
-                libros.id, 
-                libros.titulo, 
-                autores.nombre AS autor,
-                libros.genero, 
-                libros.isbn, 
-                libros.precio, 
-                libros.stock
-            FROM libros
-            JOIN autores ON libros.autor_id = autores.id
-        '''
-        cursor.execute(sql_query)
-        books = cursor.fetchall()
-
-        # Log para verificar los resultados obtenidos
-
-        return books
+        with db_cursor() as cursor:
+            sql_query = '''
+                SELECT 
+                    libros.id, 
+                    libros.titulo, 
+                    autores.nombre AS autor,
+                    libros.genero, 
+                    libros.isbn, 
+                    libros.precio, 
+                    libros.stock
+                FROM libros
+                JOIN autores ON libros.autor_id = autores.id
+            '''
+            cursor.execute(sql_query)
+            return cursor.fetchall()
     except Exception as e:
-        # Log para registrar cualquier error en la ejecución
+        logger.exception("Error al obtener libros: %s", e)
         return []
-    finally:
-        conn.close()
 
 
-def update_book(book_id, data):
-    """Actualiza los datos de un libro existente."""
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE libros
-        SET titulo = ?, autor_id = ?, genero = ?, isbn = ?, precio = ?, stock = ?
-        WHERE id = ?
-    ''', (*data,))
-    conn.commit()
-    conn.close()
-    print(f"[INFO] Libro con ID {book_id} actualizado correctamente.")
+# Columnas por las que se puede ordenar el listado paginado
+BOOK_SORT_COLUMNS = {
+    "id": "libros.id",
+    "titulo": "libros.titulo",
+    "autor": "autores.nombre",
+    "genero": "libros.genero",
+    "isbn": "libros.isbn",
+    "precio": "libros.precio",
+    "stock": "libros.stock",
+}
+
+@instrumented
+def fetch_books_page(after=None, limit=200, order_by="id"):
+    """Obtiene una página de libros con paginación por clave (keyset).
+
+    `after` es la clave devuelta por la página anterior (None para la primera).
+    Devuelve (libros, siguiente_clave); la clave es None en la última página.
+    El costo no depende de la página pedida, a diferencia de OFFSET.
+    """
+    column = BOOK_SORT_COLUMNS[order_by]
+    sql_query = '''
+        SELECT libros.id, libros.titulo, autores.nombre AS autor, libros.genero, libros.isbn, libros.precio, libros.stock
+        FROM libros
+        JOIN autores ON libros.autor_id = autores.id
+    '''
+    if order_by == "id":
+        if after is not None:
+            sql_query += " WHERE libros.id > ?"
+        sql_query += " ORDER BY libros.id LIMIT ?"
+        params = (after, limit) if after is not None else (limit,)
+    else:
+        # Desempate por id para que la clave sea única
+        if after is not None:
+            sql_query += f" WHERE ({column}, libros.id) > (?, ?)"
+        sql_query += f" ORDER BY {column}, libros.id LIMIT ?"
+        params = (*after, limit) if after is not None else (limit,)
+
+    with db_cursor() as cursor:
+        cursor.execute(sql_query, params)
+        books = cursor.fetchall()
 
+    if len(books) < limit:
+        return books, None
+    last = books[-1]
+    if order_by == "id":
+        return books, last[0]
+    index = list(BOOK_SORT_COLUMNS).index(order_by)
+    return books, (last[index], last[0])
+
+@instrumented
+def fetch_low_stock(threshold=5):
+    """Obtiene los libros con stock menor o igual al umbral, del menor al mayor."""
+    with db_cursor() as cursor:
+        cursor.execute(f'''
+            SELECT {BOOK_COLUMNS}
+            FROM libros
+            JOIN autores ON libros.autor_id = autores.id
+            WHERE libros.stock <= ?
+            ORDER BY libros.stock, libros.titulo
+        ''', (threshold,))
+        return cursor.fetchall()
+
+@instrumented
+def count_books():
+    """Devuelve la cantidad de libros del catálogo."""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM libros")
+        return cursor.fetchone()[0]
+
+
+@instrumented
+def get_book_by_id(book_id):
+    """Obtiene un libro por su ID (usa la caché del catálogo)."""
+    return _get_cached_book(catalog_cache.books_by_id, int(book_id), "libros.id = ?")
+
+@instrumented
+def get_book_by_title(titulo):
+    """Obtiene el primer libro con el título indicado (usa la caché del catálogo)."""
+    return _get_cached_book(catalog_cache.books_by_title, titulo, "libros.titulo = ?")
+
+@instrumented
+def get_book_by_isbn(isbn):
+    """Obtiene el primer libro con el ISBN indicado (usa la caché del catálogo)."""
+    return _get_cached_book(catalog_cache.books_by_isbn, isbn, "libros.isbn = ?")
+
+def _get_cached_book(index, key, condition):
+    book = catalog_cache.get(index, key)
+    if book is not None:
+        return book
+    with db_cursor() as cursor:
+        cursor.execute(f'''
+            SELECT {BOOK_COLUMNS}
+            FROM libros
+            JOIN autores ON libros.autor_id = autores.id
+            WHERE {condition}
+            ORDER BY libros.id
+            LIMIT 1
+        ''', (key,))
+        book = cursor.fetchone()
+    if book is not None:
+        catalog_cache.store_book(book)
+    return book
+
+@instrumented
+def fetch_book_titles():
+    """Obtiene los títulos del catálogo ordenados alfabéticamente (sin el resto de los datos)."""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT titulo FROM libros ORDER BY titulo")
+        return [row[0] for row in cursor]
+
+
+@instrumented
+def update_book(book_id, data):
+    """Actualiza los datos de un libro existente.
+
+    `data` es (titulo, autor, genero, isbn, precio, stock, id); el autor puede
+    indicarse por nombre (se crea si no existe) o por ID.
+    """
+    titulo, autor, genero, isbn, precio, stock, libro_id = data
+    with transaction() as cursor:
+        if isinstance(autor, str):
+            author = get_author_by_name(autor)
+            autor = author[0] if author else insert_author(autor, None)
+        cursor.execute('''
+            UPDATE libros
+            SET titulo = ?, autor_id = ?, genero = ?, isbn = ?, precio = ?, stock = ?
+            WHERE id = ?
+        ''', (titulo, autor, genero, isbn, precio, stock, libro_id))
+    catalog_cache.invalidate_book(libro_id, titulo, isbn)
+    logger.info("Libro con ID %s actualizado", book_id)
+
+@instrumented
 def delete_book(book_id):
-    """Elimina un libro por su ID."""
+    """Elimina un libro por su ID.
+
+    Devuelve True si se eliminó, o False si no existe o no se pudo eliminar,
+    por ejemplo porque tiene ventas registradas (el error queda en el log).
+    """
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM libros WHERE id = ?', (book_id,))
-        conn.commit()
-        print(f"[INFO] Libro eliminado (ID: {book_id})")
+        with transaction() as cursor:
+            cursor.execute('DELETE FROM libros WHERE id = ?', (book_id,))
+            deleted = cursor.rowcount > 0
+        catalog_cache.invalidate_book(book_id)
+        if deleted:
+            logger.info("Libro eliminado (ID: %s)", book_id)
+        return deleted
     except Exception as e:
-        print(f"[ERROR] Error al eliminar libro: {e}")
-    finally:
-        conn.close()
+        logger.exception("Error al eliminar libro: %s", e)
+        return False
 
 def remove_accents(input_str):
     """Elimina los acentos de una cadena."""
@@ -141,117 +377,305 @@ def remove_accents(input_str):
     result = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
     return result
 
-def search_books(query):
-    """Busca libros por título (insensible a mayúsculas y acentos)."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    # Imprimir todos los títulos para depuración
-    cursor.execute('SELECT titulo FROM libros')
-    all_titles = cursor.fetchall()
+def build_search_expression(query):
+    """Convierte el texto ingresado en una expresión MATCH de FTS5.
+
+    Cada palabra se busca como prefijo ("cien" encuentra "cienfuegos") y todas
+    deben aparecer. Se quitan los acentos y los guiones entre dígitos (el ISBN
+    se indexa sin guiones); los demás guiones separan palabras, como en el
+    índice: "Jean-Paul" busca "jean" y "paul".
+    """
+    normalized = re.sub(r"(?<=\d)-(?=\d)", "", remove_accents(query).casefold())
+    terms = re.findall(r"\w+", normalized)
+    return " ".join(f'"{term}"*' for term in terms)
+
+@instrumented
+def search_books(query, limit=500):
+    """Busca libros por título, autor, género o ISBN (insensible a mayúsculas y acentos).
+
+    Usa el índice de texto completo `libros_fts`; los resultados se ordenan por
+    relevancia, dando más peso a las coincidencias en el título. Una consulta
+    sin palabras devuelve la primera página del catálogo, también acotada por `limit`.
+    """
+    expression = build_search_expression(query)
+    if not expression:
+        return fetch_books() if limit is None else fetch_books_page(limit=limit)[0]
 
-    # Normalizar la consulta
-    query_normalized = remove_accents(query.lower())
-
-    # Realizar la búsqueda
     sql_query = '''
         SELECT libros.id, libros.titulo, autores.nombre AS autor, libros.genero, libros.isbn, libros.precio, libros.stock
-        FROM libros
+        FROM libros_fts
+        JOIN libros ON libros.id = libros_fts.rowid
         JOIN autores ON libros.autor_id = autores.id
-        WHERE LOWER(libros.titulo) LIKE ?
+        WHERE libros_fts MATCH ?
+        ORDER BY bm25(libros_fts, 10.0, 5.0, 1.0, 2.0)
+        LIMIT ?
     '''
-    param = f"%{query_normalized}%"
+    with db_cursor() as cursor:
+        cursor.execute(sql_query, (expression, -1 if limit is None else limit))
+        return cursor.fetchall()
 
-    cursor.execute(sql_query, (param,))
-    books = cursor.fetchall()
+# Funciones para ventas
+def current_timestamp():
+    """Fecha y hora actual en formato ISO 8601 (AAAA-MM-DDTHH:MM:SS), la que se guarda en las ventas."""
+    return datetime.now().isoformat(timespec="seconds")
+
+def normalize_sale_date(fecha=None):
+    """Fecha de una venta en el formato en que se guarda (ver current_timestamp).
+
+    Acepta texto ISO 8601 (con o sin hora), date o datetime; None o vacío es
+    el momento actual. Una fecha con zona horaria se pasa a la hora local.
+    Lanza ValueError si no es una fecha ISO, por ejemplo "10/12/2024".
+    """
+    if not fecha:
+        return current_timestamp()
+    value = fecha
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            value = None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    if not isinstance(value, datetime):
+        raise ValueError(f"Fecha no válida: {fecha!r}. Use AAAA-MM-DD o AAAA-MM-DDTHH:MM:SS.")
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat(timespec="seconds")
+
+def _check_quantity(cantidad):
+    """Lanza ValueError si la cantidad vendida no es un entero positivo."""
+    if not isinstance(cantidad, int) or cantidad <= 0:
+        raise ValueError("La cantidad debe ser un entero positivo.")
+
+def _validate_sale(cantidad, fecha):
+    """Valida la cantidad y la fecha de una venta y devuelve la fecha normalizada (o lanza ValueError)."""
+    _check_quantity(cantidad)
+    return normalize_sale_date(fecha)
+
+# Resultado de registrar una venta. `error` es None si la venta se registró.
+SaleResult = namedtuple(
+    "SaleResult", ["ok", "venta_id", "libro_id", "cantidad", "monto_total", "stock_restante", "error"]
+)
+
+@instrumented
+def register_sale(libro_id, cantidad, fecha=None):
+    """Registra una venta descontando el stock en una única transacción.
+
+    El descuento es condicional (solo si alcanza el stock), por lo que dos
+    cajas vendiendo el mismo libro a la vez no pueden dejar stock negativo.
+    El monto se calcula con el precio guardado en la base de datos y
+    `fecha` es por defecto el momento actual (ver normalize_sale_date).
+    Devuelve un SaleResult en lugar de lanzar excepciones por errores de negocio.
+    """
+    with transaction(immediate=True) as cursor:
+        result = _sell(cursor, libro_id, cantidad, fecha)
+    if result.ok:
+        catalog_cache.invalidate_book(libro_id)  # El stock en caché quedó desactualizado
+    return result
 
-    conn.close()
-    return books
+@instrumented
+def register_sales(sales):
+    """Registra varias ventas independientes en una única transacción (un solo commit).
+
+    `sales` es una lista de (libro_id, cantidad, fecha), con fecha None para
+    el momento actual. Cada venta se valida por separado, igual que en
+    register_sale: una sin stock no impide registrar las demás. Devuelve los
+    SaleResult en el mismo orden. Lo usa el escritor del servidor para
+    agrupar las ventas que llegan a la vez desde varias cajas.
+    """
+    now = current_timestamp()
+    with transaction(immediate=True) as cursor:
+        results = [_sell(cursor, libro_id, cantidad, fecha or now) for libro_id, cantidad, fecha in sales]
+    for result in results:
+        if result.ok:
+            catalog_cache.invalidate_book(result.libro_id)
+    return results
+
+def _sell(cursor, libro_id, cantidad, fecha):
+    """Valida la venta, descuenta el stock e inserta la venta dentro de la transacción en curso."""
+    try:
+        fecha = _validate_sale(cantidad, fecha)
+    except ValueError as e:
+        return SaleResult(False, None, libro_id, cantidad, None, None, str(e))
+
+    cursor.execute(
+        'UPDATE libros SET stock = stock - ? WHERE id = ? AND stock >= ?',
+        (cantidad, libro_id, cantidad)
+    )
+    if cursor.rowcount == 0:
+        cursor.execute('SELECT stock FROM libros WHERE id = ?', (libro_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return SaleResult(False, None, libro_id, cantidad, None, None, "El libro no existe.")
+        return SaleResult(False, None, libro_id, cantidad, None, row[0], "Stock insuficiente para realizar la venta.")
 
-# Funciones para ventas
-def insert_sale(data):
-    """Registra una venta y actualiza el stock del libro."""
+    cursor.execute('SELECT precio, stock FROM libros WHERE id = ?', (libro_id,))
+    precio, stock_restante = cursor.fetchone()
+    monto_total = precio * cantidad
+
+    cursor.execute('''
+        INSERT INTO ventas (libro_id, cantidad, fecha, monto_total)
+        VALUES (?, ?, ?, ?)
+    ''', (libro_id, cantidad, fecha, monto_total))
+    return SaleResult(True, cursor.lastrowid, libro_id, cantidad, monto_total, stock_restante, None)
+
+# Resultado de registrar un pedido (venta de varios libros).
+OrderResult = namedtuple("OrderResult", ["ok", "pedido_id", "monto_total", "lineas", "error"])
+
+@instrumented
+def register_order(lines, fecha=None):
+    """Registra un pedido de varios libros en una única transacción.
+
+    `lines` es una lista de (libro_id, cantidad). Se valida el stock de todas
+    las líneas con una sola consulta y, si alcanza, se descuenta el stock y se
+    insertan las ventas con executemany: un solo commit para todo el carrito.
+    Si alguna línea no puede venderse no se registra nada.
+    """
+    # Unificar líneas repetidas del mismo libro
+    quantities = {}
+    for libro_id, cantidad in lines:
+        try:
+            _check_quantity(cantidad)
+        except ValueError as e:
+            return OrderResult(False, None, None, [], str(e))
+        try:
+            libro_id = int(libro_id)  # Las claves deben coincidir con los ids que devuelve SQLite
+        except (TypeError, ValueError):
+            return OrderResult(False, None, None, [], f"ID de libro no válido: {libro_id!r}.")
+        quantities[libro_id] = quantities.get(libro_id, 0) + cantidad
+    if not quantities:
+        return OrderResult(False, None, None, [], "El pedido no tiene libros.")
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
+        fecha = normalize_sale_date(fecha)
+    except ValueError as e:
+        return OrderResult(False, None, None, [], str(e))
 
-        # Desglosar los datos de la venta
-        libro_id, cantidad, fecha, monto_total = data
+    with transaction(immediate=True) as cursor:
+        placeholders = ", ".join("?" for _ in quantities)
+        cursor.execute(
+            f"SELECT id, titulo, precio, stock FROM libros WHERE id IN ({placeholders})",
+            tuple(quantities)
+        )
+        books = {row[0]: row for row in cursor.fetchall()}
+
+        missing = [str(libro_id) for libro_id in quantities if libro_id not in books]
+        if missing:
+            return OrderResult(False, None, None, [], f"No existen los libros: {', '.join(missing)}.")
+        short = [books[libro_id][1] for libro_id, cantidad in quantities.items() if books[libro_id][3] < cantidad]
+        if short:
+            return OrderResult(False, None, None, [], f"Stock insuficiente para: {', '.join(short)}.")
+
+        order_lines = [
+            (libro_id, cantidad, books[libro_id][2] * cantidad)
+            for libro_id, cantidad in quantities.items()
+        ]
+        monto_total = sum(line[2] for line in order_lines)
+
+        cursor.execute("INSERT INTO pedidos (fecha, monto_total) VALUES (?, ?)", (fecha, monto_total))
+        pedido_id = cursor.lastrowid
+
+        cursor.executemany(
+            'UPDATE libros SET stock = stock - ? WHERE id = ? AND stock >= ?',
+            [(cantidad, libro_id, cantidad) for libro_id, cantidad, _ in order_lines]
+        )
+        if cursor.rowcount != len(order_lines):
+            # No debería ocurrir: la transacción tiene el bloqueo de escritura desde el inicio
+            raise RuntimeError("El stock cambió durante el registro del pedido.")
+
+        cursor.executemany(
+            '''
+            INSERT INTO ventas (libro_id, cantidad, fecha, monto_total, pedido_id)
+            VALUES (?, ?, ?, ?, ?)
+            ''',
+            [(libro_id, cantidad, fecha, monto, pedido_id) for libro_id, cantidad, monto in order_lines]
+        )
 
-        # Verificar si hay suficiente stock
-        cursor.execute('SELECT stock FROM libros WHERE id = ?', (libro_id,))
-        stock_actual = cursor.fetchone()
-        if not stock_actual or stock_actual[0] < cantidad:
-            raise ValueError("Stock insuficiente para realizar la venta.")
+    for libro_id in quantities:
+        catalog_cache.invalidate_book(libro_id)
+    return OrderResult(True, pedido_id, monto_total, order_lines, None)
 
-        # Registrar la venta
-        cursor.execute('''
-            INSERT INTO ventas (libro_id, cantidad, fecha, monto_total)
-            VALUES (?, ?, ?, ?)
-        ''', data)
-
-        # Actualizar el stock
-        nuevo_stock = stock_actual[0] - cantidad
-        cursor.execute('UPDATE libros SET stock = ? WHERE id = ?', (nuevo_stock, libro_id))
-
-        conn.commit()
-        print(f"[INFO] Venta registrada: {data}")
-    except ValueError as ve:
-        print(f"[ERROR] {ve}")
+@instrumented
+def insert_sale(data):
+    """Registra una venta a partir de (libro_id, cantidad, fecha, monto_total).
+
+    Se mantiene por compatibilidad: el monto recibido se ignora y se calcula
+    con el precio de la base de datos (ver register_sale).
+    """
+    libro_id, cantidad, fecha, _monto_total = data
+    try:
+        return register_sale(libro_id, cantidad, fecha)
     except Exception as e:
-        print(f"[ERROR] Error al registrar venta: {e}")
-    finally:
-        conn.close()
-
-def fetch_sales():
-    """Obtiene todas las ventas con los títulos de los libros."""
-    conn = connect_db()
-    cursor = conn.cursor()
-    query = '''
+        return SaleResult(False, None, libro_id, cantidad, None, None, f"Error al registrar venta: {e}")
+
+@instrumented
+def fetch_sales(start=None, end=None):
+    """Obtiene las ventas con los títulos de los libros, ordenadas por fecha.
+
+    `start` (incluido) y `end` (excluido) limitan el rango de fechas; aceptan
+    texto ISO o date/datetime. Sin límites devuelve todas las ventas.
+    """
+    condition, params = date_range_condition("ventas.fecha", start, end)
+    query = f'''
         SELECT ventas.id, libros.titulo, ventas.cantidad, ventas.fecha, ventas.monto_total
         FROM ventas
         JOIN libros ON ventas.libro_id = libros.id
+        WHERE {condition}
+        ORDER BY ventas.fecha, ventas.id
     '''
-    cursor.execute(query)
-    sales = cursor.fetchall()
-    conn.close()
-    return sales
-
+    with db_cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def date_range_condition(column, start=None, end=None):
+    """Condición SQL (y parámetros) para `start` <= column < `end`.
+
+    Los límites pueden ser texto ISO, date o datetime; los que faltan no se
+    agregan a la condición, así el planificador puede usar el índice de fecha.
+    """
+    conditions, params = [], []
+    if start is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(start.isoformat() if hasattr(start, "isoformat") else start)
+    if end is not None:
+        conditions.append(f"{column} < ?")
+        params.append(end.isoformat() if hasattr(end, "isoformat") else end)
+    return " AND ".join(conditions) or "1", params
+
+@instrumented
 def fetch_sales_by_book(libro_id):
     """Obtiene todas las ventas de un libro específico."""
-    conn = connect_db()
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
-            SELECT ventas.id, libros.titulo, ventas.cantidad, ventas.fecha, ventas.monto_total
-            FROM ventas
-            JOIN libros ON ventas.libro_id = libros.id
-            WHERE ventas.libro_id = ?
-        ''', (libro_id,))
-        sales = cursor.fetchall()
-        return sales
+        with db_cursor() as cursor:
+            cursor.execute('''
+                SELECT ventas.id, libros.titulo, ventas.cantidad, ventas.fecha, ventas.monto_total
+                FROM ventas
+                JOIN libros ON ventas.libro_id = libros.id
+                WHERE ventas.libro_id = ?
+            ''', (libro_id,))
+            return cursor.fetchall()
     except Exception as e:
-        print(f"[ERROR] Error al obtener ventas del libro: {e}")
+        logger.exception("Error al obtener ventas del libro: %s", e)
         return []
-    finally:
-        conn.close()
 
+@instrumented
 def fetch_sales_report():
-    """Genera un reporte consolidado de ventas agrupado por libro."""
-    conn = connect_db()
-    cursor = conn.cursor()
+    """Genera un reporte consolidado de ventas agrupado por título.
+
+    Suma las ediciones de un mismo título a partir del resumen `ventas_por_libro`
+    (agregado por libro_id). Para ver cada edición por separado usar
+    database.reports.sales_by_edition.
+    """
     try:
-        cursor.execute('''
-            SELECT libros.titulo, SUM(ventas.cantidad) AS total_vendido, SUM(ventas.monto_total) AS total_ganado
-            FROM ventas
-            JOIN libros ON ventas.libro_id = libros.id
-            GROUP BY libros.titulo
-            ORDER BY total_vendido DESC
-        ''')
-        report = cursor.fetchall()
-        return report
+        with db_cursor() as cursor:
+            cursor.execute('''
+                SELECT libros.titulo, SUM(r.cantidad) AS total_vendido, SUM(r.monto_total) AS total_ganado
+                FROM ventas_por_libro r
+                JOIN libros ON r.libro_id = libros.id
+                WHERE r.num_ventas > 0
+                GROUP BY libros.titulo
+                ORDER BY total_vendido DESC
+            ''')
+            return cursor.fetchall()
     except Exception as e:
-        print(f"[ERROR] Error al generar el reporte de ventas: {e}")
+        logger.exception("Error al generar el reporte de ventas: %s", e)
         return []
-    finally:
-        conn.close()
@@ -0,0 +1,255 @@
+"""Cliente de la API de server.py con las mismas funciones que models.py.
+
+Con `[cliente] servidor = http://host:8080` (o LIBRERIA_SERVIDOR) la
+interfaz usa este módulo en lugar de la base local (ver database/backend.py).
+Las funciones devuelven los mismos tipos que las locales: tuplas en el
+orden de las consultas, SaleResult, OrderResult y EditionRow.
+
+Las respuestas GET se guardan con su ETag; al repetir la consulta se envía
+If-None-Match y, si los datos no cambiaron, el servidor responde 304 sin
+cuerpo y se reutiliza la copia guardada.
+"""
+import csv
+import io
+import json
+import logging
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+
+from config import get_setting
+from database.exporter import write_rows
+from database.models import (
+    BOOK_FIELDS, SALE_FIELDS, AUTHOR_FIELDS, SaleResult, OrderResult,
+)
+from database.reports import EditionRow
+
+logger = logging.getLogger(__name__)
+
+SERVER_URL = get_setting("cliente", "servidor", "", env="LIBRERIA_SERVIDOR").rstrip("/")
+
+# Segundos de espera por cada pedido al servidor
+TIMEOUT = float(get_setting("cliente", "timeout", "15"))
+
+# Respuestas GET guardadas para las consultas condicionales
+CACHE_SIZE = 256
+
+
+class RemoteError(Exception):
+    """El servidor rechazó el pedido (`status` es su código HTTP) o no respondió (`status` None)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """Últimas respuestas GET (url -> (etag, datos)), seguro entre hilos."""
+
+    def __init__(self, capacity=CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url):
+        with self._lock:
+            return self._entries.get(url)
+
+    def put(self, url, etag, data):
+        with self._lock:
+            self._entries[url] = (etag, data)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
+def _url(path, **params):
+    params = {key: value for key, value in params.items() if value is not None}
+    return f"{SERVER_URL}{path}" + (f"?{urllib.parse.urlencode(params)}" if params else "")
+
+
+def _open(request):
+    try:
+        return urllib.request.urlopen(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            raise
+        try:
+            message = json.load(e).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        raise RemoteError(message, e.code) from None
+    except OSError as e:
+        raise RemoteError(f"No se pudo conectar con el servidor {SERVER_URL}: {e}") from None
+
+
+def _get(path, not_found=False, **params):
+    """GET condicional: reutiliza la respuesta guardada si el servidor contesta 304.
+
+    Con `not_found=True` un 404 devuelve None en lugar de lanzar RemoteError.
+    """
+    url = _url(path, **params)
+    cached = response_cache.get(url)
+    request = urllib.request.Request(url)
+    if cached is not None:
+        request.add_header("If-None-Match", cached[0])
+    try:
+        with _open(request) as response:
+            data = json.load(response)
+            etag = response.headers.get("ETag")
+    except urllib.error.HTTPError:  # 304: los datos no cambiaron
+        response_cache.hits += 1
+        return cached[1]
+    except RemoteError as e:
+        if not_found and e.status == 404:
+            return None
+        raise
+    response_cache.misses += 1
+    if etag:
+        response_cache.put(url, etag, data)
+    return data
+
+
+def _send(method, path, body):
+    request = urllib.request.Request(
+        _url(path), data=json.dumps(body).encode("utf-8"), method=method,
+        headers={"Content-Type": "application/json"},
+    )
+    with _open(request) as response:
+        return json.load(response)
+
+
+def _tuples(records, fields):
+    return [tuple(record[field] for field in fields) for record in records]
+
+
+def _book_body(data):
+    titulo, autor, genero, isbn, precio, stock = data[:6]
+    return {"titulo": titulo, "autor": autor, "genero": genero, "isbn": isbn, "precio": precio, "stock": stock}
+
+
+# Catálogo
+def data_fingerprint():
+    return _get("/api/huella")["huella"]
+
+def fetch_books():
+    return _tuples(_get("/api/libros")["libros"], BOOK_FIELDS)
+
+def fetch_books_page(after=None, limit=200, order_by="id"):
+    after = None if after is None else json.dumps(after)
+    data = _get("/api/libros", despues=after, limite=limit, orden=order_by)
+    next_key = data["siguiente"]
+    return _tuples(data["libros"], BOOK_FIELDS), tuple(next_key) if isinstance(next_key, list) else next_key
+
+def search_books(query, limit=500):
+    return _tuples(_get("/api/libros/buscar", q=query, limite=limit)["libros"], BOOK_FIELDS)
+
+def fetch_book_titles():
+    return _get("/api/libros/titulos")["titulos"]
+
+def _book(data):
+    return None if data is None else tuple(data[field] for field in BOOK_FIELDS)
+
+def get_book_by_id(book_id):
+    return _book(_get(f"/api/libros/{int(book_id)}", not_found=True))
+
+def get_book_by_title(titulo):
+    return _book(_get("/api/libros/por-titulo", not_found=True, titulo=titulo))
+
+def get_book_by_isbn(isbn):
+    return _book(_get("/api/libros/por-isbn", not_found=True, isbn=isbn))
+
+def fetch_low_stock(threshold=5):
+    return _tuples(_get("/api/libros/stock-bajo", minimo=threshold)["libros"], BOOK_FIELDS)
+
+def _rejected(action, error):
+    """Como en models.py: si el servidor rechazó el pedido se registra y se devuelve None."""
+    if error.status is None:  # Sin respuesta del servidor: no hay equivalente local
+        raise error
+    logger.error("Error al %s: %s", action, error)
+
+def insert_book(data):
+    try:
+        return _send("POST", "/api/libros", _book_body(data))["id"]
+    except RemoteError as e:
+        _rejected("insertar libro", e)
+
+def update_book(book_id, data):
+    _send("PUT", f"/api/libros/{int(book_id)}", _book_body(data))
+
+def delete_book(book_id):
+    try:
+        _send("DELETE", f"/api/libros/{int(book_id)}", {})
+    except RemoteError as e:
+        _rejected("eliminar libro", e)
+        return False
+    return True
+
+# Autores
+def fetch_authors():
+    return _tuples(_get("/api/autores")["autores"], AUTHOR_FIELDS)
+
+def get_author_by_name(nombre):
+    data = _get("/api/autores/por-nombre", not_found=True, nombre=nombre)
+    return None if data is None else (data["id"],)
+
+def insert_author(nombre, nacionalidad=None):
+    try:
+        return _send("POST", "/api/autores", {"nombre": nombre, "nacionalidad": nacionalidad})["id"]
+    except RemoteError as e:
+        _rejected("manejar autor", e)
+
+# Ventas
+def fetch_sales(start=None, end=None):
+    start = start.isoformat() if hasattr(start, "isoformat") else start
+    end = end.isoformat() if hasattr(end, "isoformat") else end
+    return _tuples(_get("/api/ventas", desde=start, hasta=end)["ventas"], SALE_FIELDS)
+
+def _sale_date(fecha):
+    return fecha.isoformat() if hasattr(fecha, "isoformat") else fecha
+
+def register_sale(libro_id, cantidad, fecha=None):
+    body = {"libro_id": libro_id, "cantidad": cantidad, "fecha": _sale_date(fecha)}
+    try:
+        return SaleResult(**_send("POST", "/api/ventas", body))
+    except RemoteError as e:
+        if e.status != 400:  # Datos rechazados (fecha no válida): igual que models.register_sale
+            raise
+        return SaleResult(False, None, libro_id, cantidad, None, None, str(e))
+
+def register_order(lines, fecha=None):
+    body = {"lineas": [list(line) for line in lines], "fecha": _sale_date(fecha)}
+    try:
+        data = _send("POST", "/api/ventas", body)
+    except RemoteError as e:
+        if e.status != 400:
+            raise
+        return OrderResult(False, None, None, [], str(e))
+    data["lineas"] = [tuple(line) for line in data["lineas"]]
+    return OrderResult(**data)
+
+def insert_sale(data):
+    libro_id, cantidad, fecha, _monto_total = data
+    try:
+        return register_sale(libro_id, cantidad, fecha)
+    except RemoteError as e:
+        return SaleResult(False, None, libro_id, cantidad, None, None, f"Error al registrar venta: {e}")
+
+# Reportes
+def sales_by_edition(start=None, end=None, top=None):
+    rows = _get("/api/reportes/ventas", agrupar="edicion", desde=start, hasta=end, top=top)["filas"]
+    return [EditionRow(**row) for row in rows]
+
+def export_csv(kind, file_path, delimiter=";", progress=None, cancel_event=None):
+    """Descarga una exportación del servidor y la guarda como CSV (ver exporter.export_csv)."""
+    with _open(urllib.request.Request(_url(f"/api/exportar/{kind}"))) as response:
+        reader = csv.reader(io.TextIOWrapper(response, encoding="utf-8", newline=""), delimiter=";")
+        headers = next(reader)
+        return write_rows(file_path, headers, reader, delimiter=delimiter, progress=progress, cancel_event=cancel_event)
@@ -0,0 +1,206 @@
+"""Reportes de ventas por rango de fechas y agrupados.
+
+Todo el cálculo (filtro por fechas, agrupación, top-N y total acumulado) se
+hace en SQL. Cuando la consulta lo permite se leen los resúmenes
+materializados (ver migración 5) en lugar de la tabla de ventas; si no, el
+filtro por fecha usa el índice de `ventas.fecha`.
+
+Ejemplo (cierre mensual):
+    start, end = month_range(2024, 12)
+    sales_report("genero", start, end)
+"""
+from collections import namedtuple
+
+from database.connection import db_cursor
+from database.instrumentation import instrumented
+from database.models import date_range_condition
+
+# Fila de un reporte. `acumulado` es la suma de monto_total hasta esta fila (en el orden del reporte).
+ReportRow = namedtuple("ReportRow", ["clave", "num_ventas", "cantidad", "monto_total", "acumulado"])
+
+# Agrupaciones por tiempo: expresión de la clave a partir de un día (AAAA-MM-DD).
+# Las semanas se identifican por la fecha de su lunes.
+TIME_GROUPS = {
+    "dia": "{day}",
+    "semana": "date({day}, 'weekday 0', '-6 days')",
+    "mes": "substr({day}, 1, 7)",
+}
+
+# Agrupaciones por catálogo: (expresión de la clave, columna de agrupación, consulta sobre el resumen)
+CATALOG_GROUPS = {
+    "autor": (
+        "autores.nombre", "libros.autor_id",
+        '''
+        SELECT autores.nombre AS clave, r.num_ventas, r.cantidad, r.monto_total
+        FROM ventas_por_autor r
+        JOIN autores ON autores.id = r.autor_id
+        WHERE r.num_ventas > 0
+        ''',
+    ),
+    "genero": (
+        "libros.genero", "libros.genero",
+        '''
+        SELECT genero AS clave, num_ventas, cantidad, monto_total
+        FROM ventas_por_genero
+        WHERE num_ventas > 0
+        ''',
+    ),
+}
+
+GROUPINGS = tuple(TIME_GROUPS) + tuple(CATALOG_GROUPS)
+
+# Ventas de una edición (un libro, identificado por su id) y de un título (todas sus ediciones)
+EditionRow = namedtuple("EditionRow", ["libro_id", "titulo", "autor", "isbn", "num_ventas", "cantidad", "monto_total"])
+TitleRow = namedtuple("TitleRow", ["titulo", "ediciones", "num_ventas", "cantidad", "monto_total"])
+
+
+def month_range(year, month):
+    """Devuelve (inicio, fin) del mes como fechas ISO, con el fin excluido."""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+
+
+def _is_day(value):
+    """True si el límite es un día completo (sin hora), o si no hay límite."""
+    if value is None:
+        return True
+    text = value.isoformat() if hasattr(value, "isoformat") else value
+    return len(text) == 10
+
+
+def _grouped_query(group_by, start, end):
+    """Consulta que devuelve (clave, num_ventas, cantidad, monto_total) por grupo, y sus parámetros."""
+    if group_by in TIME_GROUPS:
+        if _is_day(start) and _is_day(end):
+            # Rango de días completos: alcanza con el resumen diario
+            condition, params = date_range_condition("dia", start, end)
+            key = TIME_GROUPS[group_by].format(day="dia")
+            return f'''
+                SELECT {key} AS clave, SUM(num_ventas) AS num_ventas,
+                       SUM(cantidad) AS cantidad, SUM(monto_total) AS monto_total
+                FROM ventas_por_dia
+                WHERE num_ventas > 0 AND {condition}
+                GROUP BY 1
+            ''', params
+        condition, params = date_range_condition("ventas.fecha", start, end)
+        key = TIME_GROUPS[group_by].format(day="substr(ventas.fecha, 1, 10)")
+        return f'''
+            SELECT {key} AS clave, COUNT(*) AS num_ventas,
+                   SUM(ventas.cantidad) AS cantidad, SUM(ventas.monto_total) AS monto_total
+            FROM ventas
+            WHERE {condition}
+            GROUP BY 1
+        ''', params
+
+    key, group_column, summary_query = CATALOG_GROUPS[group_by]
+    if start is None and end is None:
+        return summary_query, []
+    condition, params = date_range_condition("ventas.fecha", start, end)
+    author_join = "JOIN autores ON autores.id = libros.autor_id" if key.startswith("autores.") else ""
+    return f'''
+        SELECT {key} AS clave, COUNT(*) AS num_ventas,
+               SUM(ventas.cantidad) AS cantidad, SUM(ventas.monto_total) AS monto_total
+        FROM ventas
+        JOIN libros ON libros.id = ventas.libro_id
+        {author_join}
+        WHERE {condition}
+        GROUP BY {group_column}
+    ''', params
+
+
+@instrumented
+def sales_report(group_by="dia", start=None, end=None, top=None):
+    """Totales de ventas agrupados por día, semana, mes, autor o género.
+
+    `start` (incluido) y `end` (excluido) son texto ISO, date o datetime.
+    Las agrupaciones por tiempo se ordenan cronológicamente y las de catálogo
+    por monto; con `top` se devuelven solo los N grupos de mayor monto.
+    Devuelve una lista de ReportRow.
+    """
+    if group_by not in GROUPINGS:
+        raise ValueError(f"Agrupación desconocida: {group_by}")
+    query, params = _grouped_query(group_by, start, end)
+    if group_by in TIME_GROUPS and top is None:
+        order = "clave"
+    else:
+        order = "monto_total DESC, clave"
+
+    with db_cursor() as cursor:
+        cursor.execute(f'''
+            SELECT clave, num_ventas, cantidad, monto_total,
+                   SUM(monto_total) OVER (ORDER BY {order} ROWS UNBOUNDED PRECEDING)
+            FROM ({query})
+            ORDER BY {order}
+            LIMIT ?
+        ''', (*params, -1 if top is None else top))
+        return [ReportRow(*row) for row in cursor.fetchall()]
+
+
+@instrumented
+def sales_totals(start=None, end=None):
+    """Devuelve (num_ventas, cantidad, monto_total) del rango de fechas."""
+    condition, params = date_range_condition("fecha", start, end)
+    with db_cursor() as cursor:
+        cursor.execute(f'''
+            SELECT COUNT(*), COALESCE(SUM(cantidad), 0), COALESCE(SUM(monto_total), 0.0)
+            FROM ventas
+            WHERE {condition}
+        ''', params)
+        return cursor.fetchone()
+
+
+def _per_book_query(start, end):
+    """Consulta (libro_id, num_ventas, cantidad, monto_total) agregada por libro_id, y sus parámetros.
+
+    Sin rango de fechas se lee el resumen por libro; con rango, las ventas
+    se agrupan por libro_id antes de unir los datos del libro.
+    """
+    if start is None and end is None:
+        return '''
+            SELECT libro_id, num_ventas, cantidad, monto_total
+            FROM ventas_por_libro
+            WHERE num_ventas > 0
+        ''', []
+    condition, params = date_range_condition("fecha", start, end)
+    return f'''
+        SELECT libro_id, COUNT(*) AS num_ventas, SUM(cantidad) AS cantidad, SUM(monto_total) AS monto_total
+        FROM ventas
+        WHERE {condition}
+        GROUP BY libro_id
+    ''', params
+
+
+@instrumented
+def sales_by_edition(start=None, end=None, top=None):
+    """Ventas por edición (libro_id), ordenadas por unidades vendidas.
+
+    Dos ediciones con el mismo título aparecen por separado. Devuelve una
+    lista de EditionRow; `top` limita la cantidad de filas.
+    """
+    query, params = _per_book_query(start, end)
+    with db_cursor() as cursor:
+        cursor.execute(f'''
+            SELECT v.libro_id, libros.titulo, autores.nombre, libros.isbn, v.num_ventas, v.cantidad, v.monto_total
+            FROM ({query}) v
+            JOIN libros ON libros.id = v.libro_id
+            JOIN autores ON autores.id = libros.autor_id
+            ORDER BY v.cantidad DESC, v.libro_id
+            LIMIT ?
+        ''', (*params, -1 if top is None else top))
+        return [EditionRow(*row) for row in cursor.fetchall()]
+
+
+@instrumented
+def sales_by_title(start=None, end=None, top=None):
+    """Ventas por título, sumando todas sus ediciones. Devuelve una lista de TitleRow."""
+    query, params = _per_book_query(start, end)
+    with db_cursor() as cursor:
+        cursor.execute(f'''
+            SELECT libros.titulo, COUNT(*), SUM(v.num_ventas), SUM(v.cantidad), SUM(v.monto_total)
+            FROM ({query}) v
+            JOIN libros ON libros.id = v.libro_id
+            GROUP BY libros.titulo
+            ORDER BY 4 DESC, libros.titulo
+            LIMIT ?
+        ''', (*params, -1 if top is None else top))
+        return [TitleRow(*row) for row in cursor.fetchall()]
@@ -0,0 +1,111 @@
+"""Hilo escritor único con agrupamiento de ventas.
+
+Todas las escrituras del servidor pasan por un solo hilo (y por lo tanto por
+una sola conexión), así nunca compiten entre ellas por el bloqueo de
+escritura de SQLite. Las ventas que se acumulan en la cola mientras el hilo
+está ocupado se registran juntas con models.register_sales: con diez cajas
+vendiendo a la vez se hace un commit por tanda en lugar de uno por venta.
+
+La cola es acotada: si el escritor no da abasto, quien encola espera.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from database import models
+from database.connection import close_connection
+
+logger = logging.getLogger(__name__)
+
+# Trabajos que pueden esperar en la cola
+DEFAULT_MAX_PENDING = 1000
+
+# Ventas registradas como máximo en una misma transacción
+DEFAULT_BATCH_SIZE = 200
+
+_SALE = "venta"
+_TASK = "tarea"
+_STOP = object()  # Marca de cierre en la cola
+
+
+class Writer:
+    """Ejecuta las escrituras en un hilo dedicado y devuelve Futures con sus resultados."""
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self.batches = 0
+        self.sales = 0
+        self._thread = threading.Thread(target=self._run, name="libreria-escritor", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Encola `func(*args, **kwargs)` para ejecutarla en el hilo escritor."""
+        future = Future()
+        self._jobs.put((_TASK, (func, args, kwargs), future))
+        return future
+
+    def sell(self, libro_id, cantidad, fecha=None):
+        """Encola una venta; el Future devuelve su SaleResult (ver models.register_sale)."""
+        future = Future()
+        self._jobs.put((_SALE, (libro_id, cantidad, fecha), future))
+        return future
+
+    def close(self):
+        """Termina los trabajos encolados y detiene el hilo."""
+        if self._thread.is_alive():
+            self._jobs.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        following = None  # Trabajo ya leído de la cola que falta procesar
+        while True:
+            job = following or self._jobs.get()
+            following = None
+            if job is _STOP:
+                break
+            kind, payload, future = job
+            if kind == _SALE:
+                following = self._run_sales([(payload, future)])
+            else:
+                self._run_task(payload, future)
+        close_connection()
+
+    def _run_sales(self, batch):
+        """Junta las ventas ya encoladas y las registra; devuelve el trabajo leído de más (o None)."""
+        following = None
+        while len(batch) < self.batch_size:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP or job[0] != _SALE:
+                following = job
+                break
+            batch.append((job[1], job[2]))
+
+        batch = [(sale, future) for sale, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return following
+        try:
+            results = models.register_sales([sale for sale, _ in batch])
+        except Exception as e:
+            logger.exception("Error al registrar %s ventas: %s", len(batch), e)
+            for _, future in batch:
+                future.set_exception(e)
+        else:
+            self.batches += 1
+            self.sales += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        return following
+
+    def _run_task(self, payload, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        func, args, kwargs = payload
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
@@ -1,11 +1,20 @@
-import os
 import tkinter as tk
 import logging
 
 from tkinter import ttk, messagebox, filedialog
-from database.models import insert_book, update_book, fetch_books, search_books, delete_book, fetch_authors, \
-    get_author_by_name, insert_author, fetch_sales, fetch_sales_report, insert_sale
-import csv
+from database.backend import insert_book, update_book, search_books, delete_book, fetch_authors, \
+    get_author_by_name, fetch_sales, fetch_books_page, \
+    BOOK_SORT_COLUMNS, fetch_book_titles, get_book_by_title, register_order, \
+    sales_by_edition, export_csv
+from widgets import DataTable, PagedTable, StatusBar, ReportPreview
+from reporting import book_list_report, get_report
+from printing import PrintQueue, SENT, FAILED
+from tasks import TaskRunner
+from database.exporter import write_rows, EXPORTS
+from database.models import build_search_expression
+
+logger = logging.getLogger(__name__)
+
 
 class MainFrame(tk.Frame):
     """Marco principal que gestiona las diferentes vistas."""
@@ -14,7 +23,7 @@ class MainFrame(tk.Frame):
         super().__init__(root, bg="#F7F7F7")
         self.root = root
         self.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        logging.debug("[DEBUG] Inicializando MainFrame.")
+        logger.debug("Inicializando MainFrame")
         # Encabezado
         header = tk.Frame(self, bg="#2C3E50", height=60)
         header.pack(fill=tk.X)
@@ -34,21 +43,84 @@ class MainFrame(tk.Frame):
         style.configure("TButton", font=("Helvetica", 12), padding=5)
         style.map("TButton", background=[("active", "#3498DB")])
 
-
-
-        # Crear las vistas
-        self.form_view = BookForm(self)
-        self.edit_view = EditView(self)
-        self.author_form = AuthorForm(self)
-        self.sales_view = SalesView(self)  # Instancia la vista de ventas
-
-
-        # Mostrar la vista inicial
-        self.show_form()
+        # Barra de estado y ejecutor de tareas en segundo plano (consultas y archivos)
+        self.status_bar = StatusBar(self)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tasks = TaskRunner(self, status_bar=self.status_bar)
+
+        # Cola de impresión: los reportes se imprimen en su propio hilo
+        self.print_queue = PrintQueue()
+        self._watching_prints = False
+
+        # Las vistas se crean la primera vez que se muestran (ver get_view)
+        self.views = {}
+
+    def get_view(self, name, view_class):
+        """Devuelve la vista indicada, creándola si todavía no existe."""
+        view = self.views.get(name)
+        if view is None:
+            view = view_class(self)
+            self.views[name] = view
+            logger.debug("Vista creada: %s", name)
+        return view
+
+    @property
+    def form_view(self):
+        return self.get_view("form_view", BookForm)
+
+    @property
+    def edit_view(self):
+        return self.get_view("edit_view", EditView)
+
+    @property
+    def author_form(self):
+        return self.get_view("author_form", AuthorForm)
+
+    @property
+    def sales_view(self):
+        return self.get_view("sales_view", SalesView)
+
+    def refresh_books(self):
+        """Recarga la lista de libros si la vista de edición ya fue creada."""
+        if "edit_view" in self.views:
+            self.edit_view.load_books()
+
+    def refresh_authors(self):
+        """Recarga la lista de autores si la vista de autores ya fue creada."""
+        if "author_form" in self.views:
+            self.author_form.load_authors()
+
+    def destroy(self):
+        """Detiene las tareas en segundo plano antes de cerrar."""
+        self.tasks.shutdown()
+        self.print_queue.shutdown()
+        super().destroy()
+
+    def print_report(self, report, title):
+        """Encola un reporte para imprimir; el estado se informa en la barra de estado."""
+        job = self.print_queue.submit(report, title)
+        if not self._watching_prints:
+            self._watching_prints = True
+            self.after(TaskRunner.POLL_INTERVAL, self._watch_prints)
+        return job
+
+    def _watch_prints(self):
+        """Muestra los cambios de estado de las impresiones mientras haya trabajos pendientes."""
+        for job in self.print_queue.poll_updates():
+            self.status_bar.show_message(f"Impresión \"{job.title}\": {job.status}")
+            if job.status == SENT:
+                logger.info("Trabajo de impresión %s enviado: %s", job.id, job.title)
+            elif job.status == FAILED:
+                messagebox.showerror("Imprimir", f"No se pudo imprimir \"{job.title}\".\n{job.error}")
+        if self.print_queue.active:
+            self.after(TaskRunner.POLL_INTERVAL * 4, self._watch_prints)
+        else:
+            self._watching_prints = False
 
     def show_sales_view(self):
         """Muestra la vista de gestión de ventas."""
         self.clear_views()  # Oculta otras vistas
+        self.sales_view.load_sales()  # Solo se actualizan las ventas nuevas
         self.sales_view.pack(fill=tk.BOTH, expand=True)  # Muestra la vista de ventas
 
     def show_books(self):
@@ -59,14 +131,13 @@ class MainFrame(tk.Frame):
     def show_authors(self):
         """Muestra la vista de gestión de autores."""
         self.clear_views()
+        self.author_form.load_authors()
         self.author_form.pack(fill=tk.BOTH, expand=True)
 
     def clear_views(self):
-        """Oculta todas las vistas."""
-        self.form_view.pack_forget()
-        self.edit_view.pack_forget()
-        self.author_form.pack_forget()
-        self.sales_view.pack_forget()
+        """Oculta todas las vistas (solo las que ya fueron creadas)."""
+        for view in self.views.values():
+            view.pack_forget()
 
     def show_form(self):
         """Muestra el formulario para agregar o editar libros."""
@@ -79,7 +150,7 @@ class MainFrame(tk.Frame):
 
     def show_edit_view(self):
         """Muestra la vista de edición."""
-        logging.debug("[DEBUG] Ejecutando show_edit_view() en MainFrame.")
+        logger.debug("Mostrando la vista de edición")
         self.clear_views()
         self.edit_view.load_books()
         self.edit_view.pack(fill=tk.BOTH, expand=True)
@@ -266,11 +337,14 @@ class BookForm(tk.Frame):
             # Crear los datos del libro para enviar al modelo
             book_data = (titulo, autor, genero, isbn, precio, stock)
 
-            print(f"[DEBUG] Datos enviados a insert_book: {book_data}")
+            logger.debug("Datos enviados a insert_book: %s", book_data)
+            new_author = get_author_by_name(autor) is None  # Consulta a la caché
 
             if self.book_id is None:
                 # Insertar un nuevo libro
-                insert_book(book_data)  # El modelo se encarga de todo
+                if insert_book(book_data) is None:  # El modelo se encarga de todo
+                    messagebox.showerror("Error", "No se pudo guardar el libro. Revisa el registro de errores.")
+                    return
                 messagebox.showinfo("Éxito", "Libro guardado correctamente.")
             else:
                 # Actualizar un libro existente
@@ -281,15 +355,16 @@ class BookForm(tk.Frame):
             # Limpiar y actualizar la interfaz
             self.clear_fields()
             self.disable_fields()
-            self.root.edit_view.load_books()  # Actualizar lista de libros
-            self.root.author_form.load_authors()  # Actualizar lista de autores
+            self.root.refresh_books()  # Actualizar lista de libros
+            if new_author:
+                self.root.refresh_authors()  # Actualizar lista de autores
 
         except ValueError as ve:
             messagebox.showerror("Error de validación", "Los campos 'Precio' y 'Stock' deben ser valores numéricos.")
-            print(f"[ERROR] Validación fallida: {ve}")
+            logger.warning("Validación fallida: %s", ve)
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo guardar el libro. Error: {e}")
-            print(f"[ERROR] Error al guardar el libro: {e}")
+            logger.exception("Error al guardar el libro: %s", e)
 
     def load_book_data(self, data):
         """Carga los datos de un libro en el formulario para edición."""
@@ -314,9 +389,9 @@ class EditView(tk.Frame):
     def __init__(self, root=None):
         super().__init__(root, bg="#F7F7F7")
         self.root = root
-        self.books = []
-        self.create_widgets()
-        self.load_books()  # Carga los libros inicialmente
+        self.books = None  # None: catálogo completo; lista: resultados de búsqueda
+        self.order_by = "id"
+        self.create_widgets()  # Los libros se cargan al mostrar la vista
 
     def create_widgets(self):
         """Crea los elementos para buscar, editar y exportar libros."""
@@ -334,7 +409,7 @@ class EditView(tk.Frame):
         search_frame = tk.Frame(self)  # Contenedor para la barra de búsqueda
         search_frame.pack(pady=10, fill=tk.X, expand=True)  # Ajusta el contenedor al ancho completo
 
-        search_label = tk.Label(search_frame, text="Título:", font=("Arial", 12))  # Etiqueta para el campo de búsqueda
+        search_label = tk.Label(search_frame, text="Buscar:", font=("Arial", 12))  # Etiqueta para el campo de búsqueda
         search_label.grid(row=0, column=0, padx=10, pady=5)  # Posiciona la etiqueta
 
         self.search_entry = tk.Entry(search_frame, font=("Arial", 12))  # Campo de entrada para el texto de búsqueda
@@ -391,9 +466,11 @@ class EditView(tk.Frame):
         style.map("Treeview", background=[("selected", "#D5F5E3")],
                   foreground=[("selected", "#34495E")])  # Colores al seleccionar filas
 
-        # Tabla con scrollbars
-        self.table = ttk.Treeview(
+        # Tabla con scrollbars (carga los libros por páginas al desplazarse)
+        self.table = PagedTable(
             table_frame,
+            fetch_page=self.fetch_page,  # Consulta una página de libros
+            runner=self.root.tasks,  # Las consultas se hacen fuera del hilo de Tk
             columns=("ID", "Título", "Autor", "Género", "ISBN", "Precio", "Stock"),  # Columnas de la tabla
             show="headings",  # Oculta la primera columna por defecto
             xscrollcommand=x_scroll.set,  # Vincula el scroll horizontal
@@ -404,14 +481,9 @@ class EditView(tk.Frame):
         x_scroll.config(command=self.table.xview)  # Conecta el scroll horizontal
         y_scroll.config(command=self.table.yview)  # Conecta el scroll vertical
 
-        # Encabezados de las columnas de la tabla
-        self.table.heading("ID", text="ID")
-        self.table.heading("Título", text="Título")
-        self.table.heading("Autor", text="Autor")
-        self.table.heading("Género", text="Género")
-        self.table.heading("ISBN", text="ISBN")
-        self.table.heading("Precio", text="Precio")
-        self.table.heading("Stock", text="Stock")
+        # Encabezados de las columnas de la tabla (clic para ordenar)
+        for column, sort_key in zip(self.table["columns"], BOOK_SORT_COLUMNS):
+            self.table.heading(column, text=column, command=lambda key=sort_key: self.sort_books(key))
 
         # Configuración de las columnas de la tabla
         self.table.column("ID", width=50, anchor="center")  # Ancho y alineación del ID
@@ -476,46 +548,53 @@ class EditView(tk.Frame):
         self.load_books()  # Cargar la lista completa de libros
 
     def load_books(self):
-        """Carga todos los libros en la tabla."""
+        """Carga el catálogo en la tabla; las páginas siguientes se piden al desplazarse."""
+        self.books = None
+        self.table.reload()
 
-        self.clear_table()  # Limpia la tabla antes de insertar nuevos datos
-        self.books = fetch_books()  # Llama a fetch_books para obtener los libros
+    def fetch_page(self, after):
+        """Obtiene la página de libros que sigue a la clave `after`."""
+        return fetch_books_page(after, order_by=self.order_by)
 
-        if not self.books:
-            logging.debug("[DEBUG] No se encontraron libros en la base de datos.")
-
-        for book in self.books:
-            # book contiene: (id, titulo, autor (nombre), genero, isbn, precio, stock)
-            book_id, titulo, autor, genero, isbn, precio, stock = book
-
-            # Inserta los datos con el nombre del autor en lugar de su ID
-            self.table.insert("", "end", values=(book_id, titulo, autor, genero, isbn, precio, stock))
+    def sort_books(self, order_by):
+        """Ordena el catálogo por la columna indicada."""
+        self.order_by = order_by
+        if self.books is None:
+            self.table.reload()
 
     def search_books(self):
-        """Busca libros por título."""
+        """Busca libros por título, autor, género o ISBN."""
         query = self.search_entry.get()
-        self.clear_table()
-        self.books = search_books(query)
-        for book in self.books:
-            self.table.insert("", "end", values=book)
+        if not build_search_expression(query):
+            self.load_books()  # Sin palabras para buscar: catálogo paginado
+            return
+        self.root.tasks.submit(
+            search_books, query,
+            description="Buscando libros...",
+            on_success=self.show_search_results
+        )
+
+    def show_search_results(self, books):
+        """Muestra en la tabla los resultados de la búsqueda."""
+        self.books = books
+        self.table.show_rows(books)
 
     def clear_table(self):
         """Limpia los datos de la tabla."""
-        for row in self.table.get_children():
-            self.table.delete(row)
+        self.table.clear()
 
     def load_book_for_edit(self, event):
         """Carga el libro seleccionado para editar."""
         selected_item = self.table.selection()
         if not selected_item:
-            print("[DEBUG] No se seleccionó ningún libro en la tabla.")
+            logger.debug("No se seleccionó ningún libro en la tabla")
             return  # Asegúrate de que haya un libro seleccionado
 
         # Obtener los datos del libro seleccionado
         selected_item_id = selected_item[0]
         book_data = self.table.item(selected_item_id, "values")
 
-        print(f"[DEBUG] Libro seleccionado: {book_data}")
+        logger.debug("Libro seleccionado: %s", book_data)
 
         # Cambiar a la vista de formulario y cargar los datos
         self.root.show_form()  # Cambiar la vista al formulario
@@ -543,7 +622,12 @@ class EditView(tk.Frame):
 
         # Eliminar el libro de la base de datos
         try:
-            delete_book(book_id)
+            if not delete_book(book_id):
+                messagebox.showerror(
+                    "Error al eliminar",
+                    "No se pudo eliminar el libro. Si tiene ventas registradas no puede eliminarse."
+                )
+                return
             messagebox.showinfo("Eliminar libro", "El libro ha sido eliminado correctamente.")
             self.load_books()  # Recargar los libros en la tabla
         except Exception as e:
@@ -551,10 +635,6 @@ class EditView(tk.Frame):
 
     def export_to_csv(self):
         """Exporta el listado de libros a un archivo CSV."""
-        if not self.books:
-            messagebox.showwarning("Exportar", "No hay datos para exportar.")
-            return
-
         # Seleccionar la ubicación y nombre del archivo
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
@@ -565,143 +645,95 @@ class EditView(tk.Frame):
         if not file_path:
             return  # Si el usuario cancela, salir del método
 
-        try:
-            # Escribir los datos en un archivo CSV
-            with open(file_path, mode="w", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file, delimiter=";")
-                # Escribir los encabezados
-                writer.writerow(["ID", "Título", "Autor", "Género", "ISBN", "Precio", "Stock"])
-                # Escribir los datos
-                for book in self.books:
-                    writer.writerow(book)
-
-            messagebox.showinfo("Exportar", f"Listado exportado correctamente a:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo exportar el archivo. Error: {e}")
-
-    def print_books(self):
-            """Imprime el listado de libros."""
-            confirm = messagebox.askyesno(
-                "Confirmar impresión",
-                "¿Estás seguro de que deseas imprimir el listado de libros?"
-            )
-            if not confirm:
-                return
+        # La consulta y la escritura se hacen en segundo plano
+        self.root.tasks.submit(
+            self.write_csv, file_path,
+            description="Exportando libros...",
+            track_progress=True,
+            on_success=lambda total: self.export_finished(file_path, total),
+            on_error=lambda e: messagebox.showerror("Error", f"No se pudo exportar el archivo. Error: {e}")
+        )
 
-            if not self.books:
-                messagebox.showwarning("Imprimir", "No hay datos para imprimir.")
-                return
+    def write_csv(self, file_path, progress=None, cancel_event=None):
+        """Escribe el listado de libros en un archivo CSV (se ejecuta fuera del hilo de Tk)."""
+        if self.books is None:
+            # Catálogo completo: se exporta directamente desde la base de datos
+            return export_csv("libros", file_path, progress=progress, cancel_event=cancel_event)
+        return write_rows(
+            file_path, EXPORTS["libros"][0], self.books,
+            progress=progress, cancel_event=cancel_event, total=len(self.books)
+        )
 
-            # Crear un archivo temporal con el listado de libros
-            try:
-                # Seleccionar una ubicación temporal para guardar el archivo
-                file_path = filedialog.asksaveasfilename(
-                    defaultextension=".txt",
-                    filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
-                    title="Guardar listado para impresión"
-                )
+    def export_finished(self, file_path, total):
+        """Informa el resultado de la exportación."""
+        if not total:
+            messagebox.showwarning("Exportar", "No hay datos para exportar.")
+            return
+        messagebox.showinfo("Exportar", f"Listado exportado correctamente a:\n{file_path}")
 
-                if not file_path:
-                    return  # Si el usuario cancela, salir del método
+    def print_books(self, report=None):
+        """Imprime el listado de libros (el de la vista previa, si se indica `report`)."""
+        confirm = messagebox.askyesno(
+            "Confirmar impresión",
+            "¿Estás seguro de que deseas imprimir el listado de libros?"
+        )
+        if not confirm:
+            return
 
-                # Escribir los datos en el archivo de texto
-                with open(file_path, mode="w", encoding="utf-8") as file:
-                    file.write("Listado de Libros\n")
-                    file.write("=" * 50 + "\n")
-                    file.write(f"{'ID':<5} {'Título':<30} {'Autor':<20} {'Género':<15} {'Precio':<10} {'Stock':<5}\n")
-                    file.write("=" * 50 + "\n")
-                    for book in self.books:
-                        file.write(
-                            f"{book[0]:<5} {book[1]:<30} {book[2]:<20} {book[3]:<15} "
-                            f"{book[4]:<15} {float(book[5]):<10.2f} {int(book[6]):<5}\n"
-                        )
+        if report is None:
+            # Armar el reporte en segundo plano y después encolarlo
+            self.root.tasks.submit(
+                self.get_books_report,
+                description="Preparando impresión...",
+                on_success=self.print_books_report
+            )
+            return
+        self.print_books_report(report)
 
-                # Abrir el archivo con el programa predeterminado para impresión
-                os.startfile(file_path, "print")
+    def print_books_report(self, report):
+        """Encola el listado de libros en la cola de impresión."""
+        if not report.rows:
+            messagebox.showwarning("Imprimir", "No hay datos para imprimir.")
+            return
+        self.root.print_report(report, "Listado de libros")
 
-                messagebox.showinfo("Imprimir", "El listado ha sido enviado a la impresora.")
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo imprimir el listado. Error: {e}")
+    def get_books_report(self):
+        """Reporte de los libros mostrados; el del catálogo completo sale de la caché de reportes."""
+        if self.books is not None:
+            return book_list_report(self.books)
+        return get_report("libros")
 
     def preview_books(self):
         """Muestra una vista previa del listado de libros antes de imprimir."""
-        if not self.books:
+        # La consulta y los totales se calculan en segundo plano
+        self.root.tasks.submit(
+            self.get_books_report,
+            description="Preparando vista previa...",
+            on_success=self.show_books_preview
+        )
+
+    def show_books_preview(self, report):
+        """Abre la vista previa paginada del listado de libros."""
+        if not report.rows:
             messagebox.showwarning("Vista Previa", "No hay datos para mostrar en la vista previa.")
             return
-
-        # Crear una nueva ventana para la vista previa
-        preview_window = tk.Toplevel(self)
-        preview_window.title("Vista Previa de Impresión")
-        preview_window.geometry("800x600")
-        preview_window.transient(self)  # Hace que la ventana sea modal
-
-        # Título de la vista previa
-        title_label = tk.Label(preview_window, text="Vista Previa del Listado de Libros", font=("Arial", 16, "bold"))
-        title_label.pack(pady=10)
-
-        # Caja de texto para mostrar la vista previa
-        text_area = tk.Text(preview_window, wrap=tk.NONE, font=("Courier", 10))
-        text_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Scrollbars
-        x_scroll = ttk.Scrollbar(preview_window, orient=tk.HORIZONTAL, command=text_area.xview)
-        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        y_scroll = ttk.Scrollbar(preview_window, orient=tk.VERTICAL, command=text_area.yview)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        text_area.config(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
-
-        # Generar el contenido para la vista previa
-        preview_content = "Listado de Libros".center(80, "=") + "\n\n"
-        preview_content += f"{'ID':<5} {'Título':<30} {'Autor':<20} {'Género':<15} {'Precio':<10} {'Stock':<5}\n"
-        preview_content += "-" * 80 + "\n"
-
-        for book in self.books:
-            # Manejar valores correctamente según las columnas
-            book_id = book[0]
-            titulo = book[1]
-            autor = book[2]
-            genero = book[3]
-            isbn = book[4]  # Esto no se usa en el formato
-            precio = float(book[5]) if isinstance(book[5], (float, int)) or book[5].replace('.', '',
-                                                                                            1).isdigit() else 0.0
-            stock = int(book[6]) if isinstance(book[6], int) or book[6].isdigit() else 0
-
-            preview_content += (
-                f"{book_id:<5} {titulo:<30.29} {autor:<20.19} {genero:<15} "
-                f"{precio:<10.2f} {stock:<5}\n"
-            )
-            preview_content += "-" * 80 + "\n"
-
-        preview_content += f"\n{'Total de Libros:':<30} {len(self.books):<5}\n"
-
-        # Insertar contenido en el área de texto
-        text_area.insert(tk.END, preview_content)
-        text_area.config(state=tk.DISABLED)  # Hacer que la vista previa sea de solo lectura
-
-        # Botón para cerrar la vista previa
-        close_button = tk.Button(preview_window, text="Cerrar", command=preview_window.destroy, bg="#A90A0A",
-                                 fg="white")
-        close_button.pack(pady=10)
-
-        # Botón para proceder a imprimir
-        print_button = tk.Button(preview_window, text="Imprimir", command=self.print_books, bg="#3498DB", fg="white")
-        print_button.pack(pady=10)
+        ReportPreview(self, report, title="Vista Previa del Listado de Libros",
+                      on_print=self.print_books, runner=self.root.tasks)
 
 class AuthorForm(tk.Frame):
     """Formulario para la gestión de autores."""
     def __init__(self, root=None):
         super().__init__(root, bg="#F7F7F7")
         self.root = root
-        self.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
-        # Tabla de autores
+        # Tabla de autores (los datos se cargan al mostrar la vista)
         self.create_table()
 
     def create_table(self):
         label = tk.Label(self, text="Lista de Autores", font=("Arial", 18, "bold"), bg="#F7F7F7")
         label.pack(pady=10)
 
-        self.table = ttk.Treeview(self, columns=("ID", "Nombre", "Nacionalidad"))
+        self.table = DataTable(self, columns=("ID", "Nombre", "Nacionalidad"))
         self.table.heading("#0", text="")
         self.table.heading("ID", text="ID")
         self.table.heading("Nombre", text="Nombre")
@@ -709,17 +741,21 @@ class AuthorForm(tk.Frame):
         self.table.column("#0", width=0, stretch=tk.NO)
         self.table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        self.load_authors()
-
     def load_authors(self):
-        self.clear_table()
-        authors = fetch_authors()
-        for author in authors:
-            self.table.insert("", "end", values=author)
+        """Carga los autores en la tabla (la consulta se hace en segundo plano)."""
+        self.root.tasks.submit(
+            fetch_authors,
+            description="Cargando autores...",
+            on_success=self.show_authors,
+            on_error=lambda e: messagebox.showerror("Error", f"No se pudieron cargar los autores. {e}")
+        )
+
+    def show_authors(self, authors):
+        """Muestra los autores en la tabla."""
+        self.table.sync_rows(authors)  # Solo se tocan los autores nuevos o modificados
 
     def clear_table(self):
-        for row in self.table.get_children():
-            self.table.delete(row)
+        self.table.clear()
 
 class SalesView(tk.Frame):
     """Vista para gestionar y visualizar ventas."""
@@ -728,8 +764,7 @@ class SalesView(tk.Frame):
         super().__init__(root, bg="#F7F7F7")
         self.root = root
         self.sales = []
-        self.create_widgets()
-        self.load_sales()
+        self.create_widgets()  # Las ventas se cargan al mostrar la vista
 
     def create_widgets(self):
         """Crea los widgets para la vista de ventas."""
@@ -754,7 +789,7 @@ class SalesView(tk.Frame):
         y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
         # Tabla de ventas
-        self.table = ttk.Treeview(
+        self.table = DataTable(
             table_frame,
             columns=("ID", "Título", "Cantidad", "Fecha", "Monto Total"),
             show="headings",
@@ -807,36 +842,53 @@ class SalesView(tk.Frame):
         preview_button.pack(pady=10)
 
     def load_sales(self):
-        """Carga todas las ventas en la tabla."""
-        self.clear_table()  # Limpia los datos existentes en la tabla
-        self.sales = fetch_sales()  # Obtén las ventas con los títulos de los libros
-        for sale in self.sales:
-            self.table.insert("", "end", values=sale)
+        """Carga todas las ventas en la tabla (la consulta se hace en segundo plano)."""
+        self.root.tasks.submit(
+            fetch_sales,  # Obtén las ventas con los títulos de los libros
+            description="Cargando ventas...",
+            on_success=self.show_sales,
+            on_error=lambda e: messagebox.showerror("Error", f"No se pudieron cargar las ventas. {e}")
+        )
+
+    def show_sales(self, sales):
+        """Muestra las ventas en la tabla."""
+        self.sales = sales
+        # Tras registrar una venta solo se inserta la fila nueva
+        self.table.sync_rows(self.sales)
 
     def clear_table(self):
         """Limpia los datos de la tabla."""
-        for row in self.table.get_children():
-            self.table.delete(row)
+        self.table.clear()
 
     def show_sales_report(self):
-        """Muestra un mensaje con el reporte consolidado de ventas."""
-        report = fetch_sales_report()  # Implementa esta función en models.py
+        """Muestra un mensaje con el reporte consolidado de ventas (una línea por edición)."""
+        self.root.tasks.submit(
+            sales_by_edition,
+            description="Generando reporte de ventas...",
+            on_success=self.display_sales_report
+        )
+
+    def display_sales_report(self, report):
+        """Muestra el reporte consolidado de ventas ya calculado."""
         if not report:
             messagebox.showinfo("Reporte de Ventas", "No hay datos disponibles.")
             return
 
         report_message = "Reporte Consolidado de Ventas\n\n"
         for item in report:
-            titulo, total_vendido, total_ganado = item
-            report_message += f"Título: {titulo}\nCantidad Vendida: {total_vendido}\nTotal Ganado: ${total_ganado:.2f}\n\n"
+            report_message += (
+                f"Título: {item.titulo} ({item.autor}, ISBN {item.isbn})\n"
+                f"Cantidad Vendida: {item.cantidad}\nTotal Ganado: ${item.monto_total:.2f}\n\n"
+            )
 
         messagebox.showinfo("Reporte de Ventas", report_message)
 
     def open_add_sale_form(self):
-        """Abre un formulario para agregar una nueva venta."""
+        """Abre un formulario para agregar una nueva venta (uno o varios libros)."""
         self.add_sale_window = tk.Toplevel(self)
         self.add_sale_window.title("Agregar Venta")
-        self.add_sale_window.geometry("400x300")
+        self.add_sale_window.geometry("600x450")
+        self.cart = []  # Líneas del carrito: (libro_id, titulo, cantidad, precio)
 
         # Crear el formulario
         self.create_add_sale_form(self.add_sale_window)
@@ -848,41 +900,118 @@ class SalesView(tk.Frame):
         book_label.grid(row=0, column=0, padx=10, pady=10)
 
         self.book_combobox = ttk.Combobox(parent, values=self.get_books_titles())
-        self.book_combobox.grid(row=0, column=1, padx=10, pady=10)
+        self.book_combobox.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
 
         # Campo para ingresar la cantidad
         quantity_label = tk.Label(parent, text="Cantidad:")
         quantity_label.grid(row=1, column=0, padx=10, pady=10)
 
         self.quantity_entry = tk.Entry(parent)
-        self.quantity_entry.grid(row=1, column=1, padx=10, pady=10)
+        self.quantity_entry.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
+
+        # Botón para agregar el libro al carrito
+        add_button = tk.Button(
+            parent, text="Agregar al carrito", command=self.add_to_cart, bg="#1C5D8B", fg="white"
+        )
+        add_button.grid(row=0, column=2, rowspan=2, padx=10, pady=10)
+
+        # Carrito
+        self.cart_table = DataTable(
+            parent,
+            key=None,  # Un mismo libro puede aparecer en varias líneas
+            columns=("Título", "Cantidad", "Precio", "Subtotal"),
+            show="headings",
+            height=8
+        )
+        for column in ("Título", "Cantidad", "Precio", "Subtotal"):
+            self.cart_table.heading(column, text=column)
+        self.cart_table.column("Título", width=250, anchor="w")
+        self.cart_table.column("Cantidad", width=80, anchor="center")
+        self.cart_table.column("Precio", width=80, anchor="e")
+        self.cart_table.column("Subtotal", width=100, anchor="e")
+        self.cart_table.grid(row=2, column=0, columnspan=3, padx=10, pady=10, sticky="nsew")
+
+        self.cart_total_label = tk.Label(parent, text="Total: $0.00", font=("Helvetica", 12, "bold"))
+        self.cart_total_label.grid(row=3, column=0, columnspan=2, padx=10, sticky="w")
+
+        remove_button = tk.Button(parent, text="Quitar", command=self.remove_from_cart, bg="#A90A0A", fg="white")
+        remove_button.grid(row=3, column=2, padx=10, pady=5)
 
         # Botón para guardar
         save_button = tk.Button(
-            parent, text="Guardar", command=self.save_sale, bg="#4CAF50", fg="white"
+            parent, text="Confirmar venta", command=self.save_sale, bg="#4CAF50", fg="white"
         )
-        save_button.grid(row=2, column=0, columnspan=2, pady=20)
+        save_button.grid(row=4, column=0, columnspan=3, pady=20)
+
+        parent.columnconfigure(1, weight=1)
+        parent.rowconfigure(2, weight=1)
 
     def get_books_titles(self):
         """Obtiene los títulos de los libros."""
-        books = fetch_books()  # Debe estar definido en models.py
-        return [book[1] for book in books]
+        return fetch_book_titles()
 
-    def save_sale(self):
-        """Guarda una nueva venta en la base de datos."""
+    def add_to_cart(self):
+        """Agrega el libro seleccionado al carrito; devuelve False si los datos no son válidos."""
+        libro = self.book_combobox.get()
         try:
-            libro = self.book_combobox.get()
             cantidad = int(self.quantity_entry.get())
-            fecha = "2024-12-10"  # Usa `datetime` para obtener la fecha actual
+        except ValueError:
+            cantidad = 0
+        if cantidad <= 0:
+            messagebox.showerror("Error", "La cantidad debe ser un número entero positivo.",
+                                 parent=self.add_sale_window)
+            return False
+
+        # Buscar el libro por título en la caché del catálogo
+        libro_data = get_book_by_title(libro)
+        if libro_data is None:
+            messagebox.showerror("Error", f"No se encontró el libro '{libro}'.", parent=self.add_sale_window)
+            return False
+
+        self.cart.append((libro_data[0], libro_data[1], cantidad, libro_data[5]))
+        self.refresh_cart()
+        self.book_combobox.set("")
+        self.quantity_entry.delete(0, tk.END)
+        return True
+
+    def remove_from_cart(self):
+        """Quita del carrito la línea seleccionada."""
+        selected = self.cart_table.selection()
+        if not selected:
+            return
+        index = self.cart_table.index(selected[0])
+        del self.cart[index]
+        self.refresh_cart()
+
+    def refresh_cart(self):
+        """Actualiza la tabla y el total del carrito (precios orientativos)."""
+        self.cart_table.insert_rows([
+            (titulo, cantidad, f"{precio:.2f}", f"{precio * cantidad:.2f}")
+            for _, titulo, cantidad, precio in self.cart
+        ])
+        total = sum(precio * cantidad for _, _, cantidad, precio in self.cart)
+        self.cart_total_label.config(text=f"Total: ${total:.2f}")
 
-            # Obtener el precio del libro desde la base de datos
-            libro_data = next(book for book in fetch_books() if book[1] == libro)
-            precio = libro_data[5]
-            monto_total = cantidad * precio
+    def save_sale(self):
+        """Guarda la venta de todos los libros del carrito en la base de datos."""
+        try:
+            # Si se completó un libro sin agregarlo al carrito, se incluye; si no es
+            # válido no se registra nada, para no dejar afuera esa línea sin avisar
+            if self.book_combobox.get() and self.quantity_entry.get():
+                if not self.add_to_cart():
+                    return
+            if not self.cart:
+                messagebox.showwarning("Venta", "Agrega al menos un libro.", parent=self.add_sale_window)
+                return
 
-            # Guardar la venta
-            insert_sale((libro_data[0], cantidad, fecha, monto_total))  # Defínelo en models.py
-            messagebox.showinfo("Éxito", "Venta registrada correctamente.")
+            # Un solo commit para todo el carrito (los montos usan el precio de la base de datos
+            # y la fecha es el momento actual en formato ISO)
+            result = register_order([(libro_id, cantidad) for libro_id, _, cantidad, _ in self.cart])
+            if not result.ok:
+                messagebox.showerror("Error", f"No se pudo registrar la venta. {result.error}",
+                                     parent=self.add_sale_window)
+                return
+            messagebox.showinfo("Éxito", f"Venta registrada correctamente. Total: ${result.monto_total:.2f}")
             self.load_sales()  # Recargar la tabla de ventas
             self.add_sale_window.destroy()  # Cerrar el formulario
         except Exception as e:
@@ -893,110 +1022,28 @@ class SalesView(tk.Frame):
         if not self.sales:
             messagebox.showwarning("Vista Previa", "No hay datos de ventas para mostrar.")
             return
+        self.root.tasks.submit(
+            get_report, "ventas",
+            description="Preparando vista previa...",
+            on_success=self.show_sales_preview
+        )
 
-        # Crear una nueva ventana para la vista previa
-        preview_window = tk.Toplevel(self)
-        preview_window.title("Vista Previa de Reporte de Ventas")
-        preview_window.geometry("800x600")
-        preview_window.transient(self)  # Hace que la ventana sea modal
-
-        # Título de la vista previa
-        title_label = tk.Label(preview_window, text="Vista Previa del Reporte de Ventas", font=("Arial", 16, "bold"))
-        title_label.pack(pady=10)
-
-        # Caja de texto para mostrar la vista previa
-        text_area = tk.Text(preview_window, wrap=tk.NONE, font=("Courier", 10))
-        text_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Scrollbars
-        x_scroll = ttk.Scrollbar(preview_window, orient=tk.HORIZONTAL, command=text_area.xview)
-        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        y_scroll = ttk.Scrollbar(preview_window, orient=tk.VERTICAL, command=text_area.yview)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        text_area.config(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
-
-        # Generar el contenido para la vista previa
-        preview_content = "Reporte Consolidado de Ventas\n".center(80, "=") + "\n\n"
-        preview_content += f"{'ID':<5} {'Título':<30} {'Cantidad':<10} {'Fecha':<15} {'Monto Total':<15}\n"
-        preview_content += "-" * 80 + "\n"
-
-        # Variables para los totales
-        total_ventas = 0
-        total_unidades = 0
-        monto_total = 0.0
-
-        # Procesar cada venta y generar contenido
-        for sale in self.sales:
-            sale_id, titulo, cantidad, fecha, monto_total_venta = sale
-            preview_content += (
-                f"{sale_id:<5} {titulo:<30.29} {cantidad:<10} {fecha:<15} ${monto_total_venta:<15.2f}\n"
-            )
-            total_ventas += 1
-            total_unidades += cantidad
-            monto_total += monto_total_venta
-
-        # Agregar líneas separadoras
-        preview_content += "-" * 80 + "\n"
-
-        # Agregar los totales al final
-        preview_content += f"\n{'Total de Ventas:':<30} {total_ventas:<5}\n"
-        preview_content += f"{'Total de Unidades Vendidas:':<30} {total_unidades:<5}\n"
-        preview_content += f"{'Monto Total Generado:':<30} ${monto_total:<10.2f}\n"
-
-        # Insertar contenido en el área de texto
-        text_area.insert(tk.END, preview_content)
-        text_area.config(state=tk.DISABLED)  # Hacer que la vista previa sea de solo lectura
-
-        # Botón para cerrar la vista previa
-        close_button = tk.Button(preview_window, text="Cerrar", command=preview_window.destroy, bg="#A90A0A",
-                                 fg="white")
-        close_button.pack(pady=10)
-
-        # Botón para proceder a imprimir
-        print_button = tk.Button(preview_window, text="Imprimir", command=self.print_sales_report, bg="#3498DB",
-                                 fg="white")
-        print_button.pack(pady=10)
-
-    def print_sales_report(self):
-        """Imprime el reporte consolidado de ventas."""
-        try:
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".txt",
-                filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
-                title="Guardar reporte para impresión"
+    def show_sales_preview(self, report):
+        """Abre la vista previa paginada (solo se formatea la página visible)."""
+        ReportPreview(self, report, title="Vista Previa del Reporte de Ventas",
+                      on_print=self.print_sales_report, runner=self.root.tasks)
+
+    def print_sales_report(self, report=None):
+        """Imprime el reporte consolidado de ventas (el de la vista previa, si se indica `report`).
+
+        La impresión se hace en la cola de impresión, así que la caja sigue disponible.
+        """
+        if report is None:
+            self.root.tasks.submit(
+                get_report, "ventas",
+                description="Preparando impresión...",
+                on_success=self.print_sales_report
             )
-
-            if not file_path:
-                return
-
-            with open(file_path, mode="w", encoding="utf-8") as file:
-                file.write("Reporte Consolidado de Ventas\n".center(80, "=") + "\n\n")
-                file.write(f"{'ID':<5} {'Título':<30} {'Cantidad':<10} {'Fecha':<15} {'Monto Total':<15}\n")
-                file.write("-" * 80 + "\n")
-
-                # Variables para los totales
-                total_ventas = 0
-                total_unidades = 0
-                monto_total = 0.0
-
-                # Procesar cada venta
-                for sale in self.sales:
-                    sale_id, titulo, cantidad, fecha, monto_total_venta = sale
-                    file.write(
-                        f"{sale_id:<5} {titulo:<30.29} {cantidad:<10} {fecha:<15} ${monto_total_venta:<15.2f}\n"
-                    )
-                    total_ventas += 1
-                    total_unidades += cantidad
-                    monto_total += monto_total_venta
-
-                # Agregar totales al final
-                file.write("-" * 80 + "\n")
-                file.write(f"\n{'Total de Ventas:':<30} {total_ventas:<5}\n")
-                file.write(f"{'Total de Unidades Vendidas:':<30} {total_unidades:<5}\n")
-                file.write(f"{'Monto Total Generado:':<30} ${monto_total:<10.2f}\n")
-
-            os.startfile(file_path, "print")
-            messagebox.showinfo("Imprimir", "El reporte ha sido enviado a la impresora.")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo imprimir el reporte. Error: {e}")
+            return
+        self.root.print_report(report, "Reporte de ventas")
 
@@ -0,0 +1,141 @@
+"""Configuración del registro (logging) de la aplicación y de la línea de comandos.
+
+Los módulos usan su propio logger (`logging.getLogger(__name__)`) con
+formato diferido (`logger.info("Venta %s", venta_id)`): si el nivel no está
+habilitado el mensaje ni siquiera se arma.
+
+setup_logging() deja un QueueHandler en el logger raíz: el hilo que registra
+solo encola el evento, y un QueueListener en segundo plano lo escribe en un
+archivo rotativo (en texto o una línea JSON por evento) y, desde el nivel
+de consola, en stderr. Así registrar una venta no espera a la terminal ni
+al disco.
+
+Configuración en la sección [log] de libreria.ini.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+
+from config import get_setting, resolve_path
+
+LOG_LEVEL = get_setting("log", "nivel", "INFO", env="LIBRERIA_LOG_LEVEL")
+CONSOLE_LEVEL = get_setting("log", "consola", "WARNING", env="LIBRERIA_LOG_CONSOLE")
+LOG_FORMAT = get_setting("log", "formato", "texto", env="LIBRERIA_LOG_FORMAT")
+LOG_FILE = get_setting("log", "archivo", "logs/libreria.log", env="LIBRERIA_LOG_FILE")
+MAX_BYTES = int(get_setting("log", "tamano_maximo", str(5 * 1024 * 1024)))
+BACKUP_COUNT = int(get_setting("log", "copias", "5"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(threadName)s] %(message)s"
+
+# Atributos propios de LogRecord: el resto son campos pasados con `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea, con los campos pasados en `extra=` incluidos."""
+
+    def format(self, record):
+        data = {
+            "fecha": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "hilo": record.threadName,
+            "mensaje": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["excepcion"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["excepcion"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Encola el evento con el mensaje ya armado y la traza como texto aparte.
+
+    El QueueHandler estándar une la traza al mensaje; así el formato JSON
+    puede guardarla en su propio campo.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _level(name):
+    level = logging.getLevelName(str(name).upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Nivel de log desconocido: {name}")
+    return level
+
+
+def setup_logging(level=None, log_file=None, fmt=None, console_level=None):
+    """Configura el logger raíz; los argumentos reemplazan a la configuración.
+
+    Con `log_file` vacío no se escribe archivo. Se puede llamar más de una
+    vez: cada llamada reemplaza la configuración anterior.
+    """
+    global _listener
+    stop_logging()
+
+    level = _level(level or LOG_LEVEL)
+    console_level = _level(console_level or CONSOLE_LEVEL)
+    log_file = LOG_FILE if log_file is None else log_file
+    fmt = fmt or LOG_FORMAT
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+    handlers = []
+    console = logging.StreamHandler()
+    console.setLevel(console_level)
+    console.setFormatter(formatter if fmt == "json" else logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    handlers.append(console)
+    if log_file:
+        log_file = resolve_path(log_file)
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    # Datos que ningún formato usa: evita calcularlos en cada evento
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(level)
+    events = queue.SimpleQueue()
+    root.addHandler(_QueueHandler(events))
+
+    _listener = logging.handlers.QueueListener(events, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Escribe los eventos pendientes y detiene el hilo del registro."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -1,28 +1,73 @@
+import time
+
+_START = time.perf_counter()  # Antes de importar tkinter y los módulos de la aplicación
+
+from logging_setup import setup_logging
 from database.connection import create_tables
+from database.migrations import MigrationError
+from database.backend import REMOTE
 from form import MainFrame
 from menu import MenuBar
 import tkinter as tk
 import logging
+import sqlite3
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Mide la duración de cada etapa del arranque y la informa en el log."""
+
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.steps = []
+
+    def mark(self, step):
+        now = time.perf_counter()
+        self.steps.append((step, now - self.last))
+        self.last = now
+
+    def report(self):
+        total = time.perf_counter() - self.start
+        detail = ", ".join(f"{step}: {seconds * 1000:.0f} ms" for step, seconds in self.steps)
+        logger.info("Arranque completo en %.0f ms (%s)", total * 1000, detail)
+
 
 def main():
-    # Configuración del logger
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s - %(levelname)s - %(message)s"
-    )
+    setup_logging()  # Nivel, archivo y formato según libreria.ini o LIBRERIA_LOG_*
+    timer = StartupTimer(_START)
+    timer.mark("importaciones")
+
+    if not REMOTE:
+        try:
+            create_tables()  # Crear las tablas al iniciar (en modo cliente las crea el servidor)
+        except (MigrationError, sqlite3.Error) as e:
+            logger.critical("No se pudo preparar la base de datos: %s", e, exc_info=e)
+            print(f"No se pudo preparar la base de datos: {e}", file=sys.stderr)
+            return 1
+    timer.mark("base de datos")
 
-    create_tables()  # Crear las tablas al iniciar
     ventana = tk.Tk()
     ventana.geometry("1000x600")
     ventana.resizable(False, False)
+    timer.mark("ventana")
 
-    # Crear el marco principal
+    # Crear el marco principal (las vistas se crean al mostrarse por primera vez)
     main_frame = MainFrame(ventana)
 
     # Agregar el menú
     MenuBar.add_menu(ventana, main_frame)
+    timer.mark("marco y menú")
+
+    # Vista inicial: la primera página de libros se consulta en segundo plano
     main_frame.show_edit_view()
+    timer.mark("vista inicial")
+
+    # El informe se emite cuando la ventana ya se dibujó
+    ventana.after_idle(lambda: (timer.mark("primer dibujado"), timer.report()))
     ventana.mainloop()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,6 +1,11 @@
 import tkinter as tk
-from tkinter import Toplevel, ttk, messagebox
-from database.models import fetch_books
+from tkinter import Toplevel, ttk, messagebox, filedialog
+from database.backend import fetch_books_page, export_csv, REMOTE
+from database.models import cache_stats
+from database import instrumentation
+from database.importer import import_catalog
+from reporting import report_cache
+from widgets import PagedTable, DataTable
 
 
 class MenuBar:
@@ -16,6 +21,7 @@ class MenuBar:
         menu_ventas = tk.Menu(barra, tearoff=0)
         menu_consultas = tk.Menu(barra, tearoff=0)
         menu_gestion = tk.Menu(barra, tearoff=0)
+        menu_diagnostico = tk.Menu(barra, tearoff=0)
         menu_acerca = tk.Menu(barra, tearoff=0)
 
 
@@ -24,9 +30,17 @@ class MenuBar:
         barra.add_cascade(label='Ventas', menu=menu_ventas)
         barra.add_cascade(label='Consultas', menu=menu_consultas)
         barra.add_cascade(label="Gestión", menu=menu_gestion)
+        barra.add_cascade(label="Diagnóstico", menu=menu_diagnostico)
         barra.add_cascade(label='Acerca de..', menu=menu_acerca)
 
         # Opciones del menú Inicio
+        menu_inicio.add_command(
+            label='Importar catálogo...',
+            command=lambda: MenuBar.import_catalog(main_frame),
+            # En modo cliente se importa en el servidor (python cli.py importar)
+            state=tk.DISABLED if REMOTE else tk.NORMAL
+        )
+        menu_inicio.add_separator()
         menu_inicio.add_command(label='Salir', command=root.destroy)
 
         # Opciones del menú Ventas
@@ -52,11 +66,39 @@ class MenuBar:
             command=lambda: open_book_list(root),
             accelerator="Ctrl+L"
         )
+        menu_consultas.add_separator()
+        menu_consultas.add_command(
+            label="Exportar libros a CSV...",
+            command=lambda: MenuBar.export_table(main_frame, "libros")
+        )
+        menu_consultas.add_command(
+            label="Exportar ventas a CSV...",
+            command=lambda: MenuBar.export_table(main_frame, "ventas")
+        )
+        menu_consultas.add_command(
+            label="Exportar autores a CSV...",
+            command=lambda: MenuBar.export_table(main_frame, "autores")
+        )
 
         # Opciones del menú Gestión
         menu_gestion.add_command(label="Libros", command=main_frame.show_books)
         menu_gestion.add_command(label="Autores", command=main_frame.show_authors)
 
+        # Opciones del menú Diagnóstico
+        menu_diagnostico.add_command(
+            label="Tiempos de consultas",
+            command=lambda: open_diagnostics(root)
+        )
+        menu_diagnostico.add_command(
+            label="Guardar diagnóstico...",
+            command=MenuBar.save_diagnostics
+        )
+        menu_diagnostico.add_separator()
+        menu_diagnostico.add_command(
+            label="Reiniciar estadísticas",
+            command=instrumentation.registry.reset
+        )
+
         # Opciones del menú Acerca de
         menu_acerca.add_command(label='Sobre la Librería', command=MenuBar.show_about)
         menu_acerca.add_command(label='Repositorio', command=MenuBar.open_repository)
@@ -66,6 +108,75 @@ class MenuBar:
         root.bind_all("<Control-e>", lambda event: main_frame.show_edit_view())
         root.bind_all("<Control-l>", lambda event: open_book_list(root))
 
+    @staticmethod
+    def import_catalog(main_frame):
+        """Importa un catálogo CSV/JSON en segundo plano."""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Catálogos", "*.csv *.json *.jsonl"), ("All files", "*.*")],
+            title="Importar catálogo de libros"
+        )
+        if not file_path:
+            return
+
+        def finished(result):
+            message = f"Libros importados: {result.imported}\nFilas rechazadas: {result.rejected}"
+            if result.errors_path:
+                message += f"\n\nDetalle de errores:\n{result.errors_path}"
+            messagebox.showinfo("Importar catálogo", message)
+            main_frame.refresh_books()
+            main_frame.refresh_authors()
+
+        main_frame.tasks.submit(
+            import_catalog, file_path,
+            description="Importando catálogo...",
+            track_progress=True,
+            on_success=finished,
+            on_error=lambda e: messagebox.showerror("Importar catálogo", f"No se pudo importar el archivo. Error: {e}")
+        )
+
+    @staticmethod
+    def export_table(main_frame, kind):
+        """Exporta una tabla completa a CSV en segundo plano."""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            initialfile=f"{kind}.csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title=f"Exportar {kind}"
+        )
+        if not file_path:
+            return
+
+        main_frame.tasks.submit(
+            export_csv, kind, file_path,
+            description=f"Exportando {kind}...",
+            track_progress=True,
+            on_success=lambda total: messagebox.showinfo(
+                "Exportar", f"Se exportaron {total} filas a:\n{file_path}"
+            ),
+            on_error=lambda e: messagebox.showerror("Exportar", f"No se pudo exportar el archivo. Error: {e}")
+        )
+
+    @staticmethod
+    def save_diagnostics():
+        """Guarda las estadísticas de consultas y de las cachés en un archivo JSON."""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            initialfile="diagnostico.json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="Guardar diagnóstico"
+        )
+        if not file_path:
+            return
+        try:
+            instrumentation.dump(file_path, extra={
+                "cache_catalogo": cache_stats(),
+                "cache_reportes": report_cache.stats(),
+            })
+        except OSError as e:
+            messagebox.showerror("Diagnóstico", f"No se pudo guardar el archivo. Error: {e}")
+            return
+        messagebox.showinfo("Diagnóstico", f"Diagnóstico guardado en:\n{file_path}")
+
     @staticmethod
     def show_about():
         """Muestra información sobre la aplicación."""
@@ -110,10 +221,17 @@ def open_book_list(root):
     root.book_list_window.title("Lista de Libros")
     root.book_list_window.geometry("600x400")
 
-    table = ttk.Treeview(
+    y_scroll = ttk.Scrollbar(root.book_list_window, orient=tk.VERTICAL)
+    y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+    # La tabla pide más libros a medida que se desplaza
+    table = PagedTable(
         root.book_list_window,
-        columns=("ID", "Título", "Autor", "Género", "ISBN", "Precio", "Stock")
+        fetch_page=fetch_books_page,
+        columns=("ID", "Título", "Autor", "Género", "ISBN", "Precio", "Stock"),
+        yscrollcommand=y_scroll.set
     )
+    y_scroll.config(command=table.yview)
     table.heading("#0", text="")
     table.heading("ID", text="ID")
     table.heading("Título", text="Título")
@@ -124,12 +242,75 @@ def open_book_list(root):
     table.heading("Stock", text="Stock")
     table.column("#0", width=0, stretch=tk.NO)
 
-    # Poblar la tabla con datos
-    for book in fetch_books():
-        table.insert("", "end", values=book)
-
     table.pack(fill=tk.BOTH, expand=True)
 
+    # Poblar la tabla con la primera página
+    table.reload()
+
+
+# Columnas de las tablas de la ventana de diagnóstico: (título, ancho, clave del diccionario)
+STAT_COLUMNS = (
+    ("Llamadas", 70, "cantidad"),
+    ("Errores", 60, "errores"),
+    ("Media (ms)", 80, "media_ms"),
+    ("p95 (ms)", 80, "p95_ms"),
+    ("Máx (ms)", 80, "max_ms"),
+    ("Total (ms)", 90, "total_ms"),
+    ("Filas", 80, "filas"),
+)
+
+
+def _stats_table(parent, first_column, stats):
+    """Tabla con una fila por función o consulta, ordenada por tiempo total."""
+    columns = (first_column,) + tuple(title for title, _, _ in STAT_COLUMNS)
+    table = DataTable(parent, key=None, columns=columns, show="headings")
+    table.heading(first_column, text=first_column)
+    table.column(first_column, width=380, anchor=tk.W)
+    for title, width, _ in STAT_COLUMNS:
+        table.heading(title, text=title)
+        table.column(title, width=width, anchor=tk.E, stretch=tk.NO)
+    ordered = sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    table.insert_rows([name] + [stat[key] for _, _, key in STAT_COLUMNS] for name, stat in ordered)
+    return table
+
+
+def open_diagnostics(root):
+    """Abre una ventana con los tiempos de las funciones y consultas, y las consultas lentas."""
+    if hasattr(root, "diagnostics_window") and root.diagnostics_window.winfo_exists():
+        root.diagnostics_window.destroy()
+
+    window = root.diagnostics_window = Toplevel(root)
+    window.title("Diagnóstico")
+    window.geometry("900x500")
+
+    snapshot = instrumentation.registry.snapshot()
+    catalog, reports = cache_stats(), report_cache.stats()
+    summary = (
+        f"Desde {snapshot['desde']} · umbral de consulta lenta: {snapshot['umbral_lenta_ms']:g} ms · "
+        f"caché del catálogo: {catalog['hits']} aciertos, {catalog['misses']} fallos · "
+        f"caché de reportes: {reports['aciertos']} aciertos, {reports['fallos']} fallos"
+    )
+    tk.Label(window, text=summary, anchor=tk.W).pack(fill=tk.X, padx=5, pady=5)
+
+    notebook = ttk.Notebook(window)
+    notebook.pack(fill=tk.BOTH, expand=True)
+    notebook.add(_stats_table(notebook, "Función", snapshot["funciones"]), text="Funciones")
+    notebook.add(_stats_table(notebook, "Consulta", snapshot["consultas"]), text="Consultas")
+
+    # Consultas lentas: la más reciente primero, con su plan de ejecución
+    slow = DataTable(notebook, key=None, columns=("Fecha", "ms", "Filas", "Consulta", "Plan"), show="headings")
+    for column, width in (("Fecha", 140), ("ms", 70), ("Filas", 60), ("Consulta", 360), ("Plan", 260)):
+        slow.heading(column, text=column)
+        slow.column(column, width=width, stretch=column in ("Consulta", "Plan"))
+    slow.insert_rows(
+        (entry["fecha"], entry["ms"], entry["filas"], entry["sql"], " | ".join(entry["plan"]))
+        for entry in reversed(snapshot["lentas"])
+    )
+    notebook.add(slow, text=f"Lentas ({len(snapshot['lentas'])})")
+
+    tk.Button(window, text="Actualizar", command=lambda: open_diagnostics(root)).pack(pady=5)
+
+
 def show_sales_view(self):
     """Muestra la vista de ventas."""
     self.clear_views()
@@ -0,0 +1,221 @@
+"""Impresión de reportes en segundo plano, independiente del sistema operativo.
+
+Los trabajos se encolan en una PrintQueue, que los procesa de a uno en un
+hilo propio: arma el archivo de texto del reporte y lo entrega al backend
+configurado. La interfaz nunca espera a la impresora; consulta el estado de
+los trabajos con `poll_updates()`.
+
+Backends (sección [impresion] de libreria.ini):
+    lpr      comando lpr/lp de CUPS (Linux y macOS)
+    windows  os.startfile(archivo, "print")
+    carpeta  copia el archivo a una carpeta (para pruebas o impresoras que la vigilan)
+    auto     el primero disponible de los anteriores
+"""
+import itertools
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+
+from config import get_setting, resolve_path
+
+# Estados de un trabajo de impresión
+QUEUED = "en cola"
+PRINTING = "imprimiendo"
+SENT = "enviado"
+FAILED = "error"
+
+
+class PrintError(Exception):
+    """El backend no pudo entregar el trabajo a la impresora."""
+
+
+class CommandBackend:
+    """Envía el archivo con un comando de impresión (lpr o lp de CUPS)."""
+
+    name = "lpr"
+    keeps_file = False  # lpr copia el archivo a la cola del sistema antes de terminar
+
+    def __init__(self, command=None, printer=None, timeout=60):
+        self.command = command or shutil.which("lpr") or shutil.which("lp") or "lpr"
+        self.printer = printer
+        self.timeout = timeout
+
+    def send(self, file_path, title):
+        program = os.path.basename(self.command)
+        args = [self.command]
+        if program.startswith("lpr"):
+            args += ["-T", title] + (["-P", self.printer] if self.printer else [])
+        else:
+            args += ["-t", title] + (["-d", self.printer] if self.printer else [])
+        args.append(file_path)
+        try:
+            result = subprocess.run(args, capture_output=True, text=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise PrintError(f"No se pudo ejecutar {program}: {e}") from e
+        if result.returncode != 0:
+            raise PrintError(result.stderr.strip() or f"{program} terminó con código {result.returncode}")
+
+
+class WindowsBackend:
+    """Imprime con la aplicación asociada al archivo (solo Windows)."""
+
+    name = "windows"
+    keeps_file = True  # La aplicación abre el archivo después de que startfile vuelve
+
+    def send(self, file_path, title):
+        try:
+            os.startfile(file_path, "print")
+        except OSError as e:
+            raise PrintError(str(e)) from e
+
+
+class FolderBackend:
+    """Copia cada trabajo a una carpeta en lugar de imprimirlo."""
+
+    name = "carpeta"
+    keeps_file = False
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def send(self, file_path, title):
+        os.makedirs(self.directory, exist_ok=True)
+        safe_title = "".join(char if char.isalnum() else "_" for char in title)[:40]
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_title}")
+        target = f"{base}.txt"
+        counter = 1
+        while os.path.exists(target):
+            target = f"{base}-{counter}.txt"
+            counter += 1
+        shutil.copyfile(file_path, target)
+        return target
+
+
+def get_backend():
+    """Crea el backend indicado en la configuración (LIBRERIA_IMPRESION)."""
+    kind = get_setting("impresion", "backend", "auto", env="LIBRERIA_IMPRESION")
+    printer = get_setting("impresion", "impresora", None)
+    directory = resolve_path(get_setting("impresion", "carpeta", "impresiones"))
+    if kind == "auto":
+        if hasattr(os, "startfile"):
+            kind = "windows"
+        elif shutil.which("lpr") or shutil.which("lp"):
+            kind = "lpr"
+        else:
+            kind = "carpeta"
+    if kind == "lpr":
+        return CommandBackend(get_setting("impresion", "comando", None), printer)
+    if kind == "windows":
+        return WindowsBackend()
+    if kind == "carpeta":
+        return FolderBackend(directory)
+    raise ValueError(f"Backend de impresión desconocido: {kind}")
+
+
+class PrintJob:
+    """Trabajo de impresión y su estado."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, document, title):
+        self.id = next(self._ids)
+        self.document = document
+        self.title = title
+        self.status = QUEUED
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    def __repr__(self):
+        return f"PrintJob({self.id}, {self.title!r}, {self.status})"
+
+
+class PrintQueue:
+    """Cola de impresión atendida por un hilo propio.
+
+    `submit()` vuelve de inmediato. Cada cambio de estado se publica en una
+    cola que el hilo de la interfaz lee con `poll_updates()`; así ningún
+    widget se toca desde el hilo de impresión.
+    """
+
+    # Trabajos terminados que se conservan para consultar su estado
+    HISTORY = 50
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.jobs = deque(maxlen=self.HISTORY)
+        self._pending = queue.Queue()
+        self._updates = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, document, title):
+        """Encola un reporte (reporting.Report) o un archivo de texto y devuelve el PrintJob."""
+        job = PrintJob(document, title)
+        self.jobs.append(job)
+        self._updates.put(job)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="libreria-impresion", daemon=True)
+                self._thread.start()
+        self._pending.put(job)
+        return job
+
+    @property
+    def active(self):
+        """Cantidad de trabajos en cola o imprimiéndose."""
+        return sum(1 for job in self.jobs if job.status in (QUEUED, PRINTING))
+
+    def poll_updates(self):
+        """Devuelve los trabajos que cambiaron de estado desde la última consulta."""
+        changed = []
+        while True:
+            try:
+                job = self._updates.get_nowait()
+            except queue.Empty:
+                return changed
+            if job not in changed:
+                changed.append(job)
+
+    def shutdown(self):
+        """Termina el hilo después de los trabajos ya encolados."""
+        self._pending.put(None)
+
+    def _set_status(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        if status in (SENT, FAILED):
+            job.finished = time.time()
+            job.document = None  # Liberar el reporte una vez impreso
+        self._updates.put(job)
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            self._set_status(job, PRINTING)
+            try:
+                self._print(job)
+            except Exception as e:
+                self._set_status(job, FAILED, str(e))
+            else:
+                self._set_status(job, SENT)
+
+    def _print(self, job):
+        if isinstance(job.document, str):
+            self.backend.send(job.document, job.title)
+            return
+        handle, file_path = tempfile.mkstemp(prefix="libreria-", suffix=".txt")
+        os.close(handle)
+        try:
+            job.document.export(file_path, "texto")
+            self.backend.send(file_path, job.title)
+        finally:
+            if not self.backend.keeps_file:
+                os.remove(file_path)
@@ -0,0 +1,356 @@
+"""Reportes de ancho fijo compartidos por la vista previa, la impresión y la exportación.
+
+Un Report se arma una sola vez (consulta y totales en una pasada) y desde
+él se obtienen las páginas de la vista previa, el texto para imprimir y los
+archivos CSV, HTML o PDF. Las líneas se formatean a demanda: la vista previa
+solo formatea la página visible y las salidas a archivo escriben a medida
+que recorren las filas.
+
+get_report() arma los reportes que salen de la base de datos y los guarda
+en una caché por parámetros de consulta, validada con la huella de los datos
+(models.data_fingerprint), así la vista previa y la impresión posterior no
+repiten el trabajo.
+"""
+import html
+import os
+import threading
+from collections import namedtuple, OrderedDict
+
+from database.exporter import write_rows
+from database.backend import fetch_books, fetch_sales, data_fingerprint, sales_by_edition
+
+# Columna de un reporte: alineacion es "<" o ">", formato se aplica al valor antes de alinear
+Column = namedtuple("Column", ["encabezado", "ancho", "alineacion", "formato"])
+
+# Ancho de línea de los reportes impresos
+LINE_WIDTH = 80
+
+# Formatos de archivo según la extensión (ver Report.export)
+EXPORT_FORMATS = {".txt": "texto", ".csv": "csv", ".html": "html", ".htm": "html", ".pdf": "pdf"}
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _money(value):
+    return f"${float(value or 0):.2f}"
+
+
+class Report:
+    """Reporte de ancho fijo dividido en páginas.
+
+    `rows` debe ser una secuencia (lista o tupla): las filas de una página se
+    toman por posición, sin formatear las anteriores. `totals` son líneas
+    (etiqueta, valor) que se agregan después de la última fila.
+    """
+
+    LINES_PER_PAGE = 60
+
+    def __init__(self, title, columns, rows, totals=(), lines_per_page=LINES_PER_PAGE):
+        self.title = title
+        self.columns = columns
+        self.rows = rows
+        self.totals = list(totals)
+        self.lines_per_page = lines_per_page
+        self._header = [
+            f" {title} ".center(LINE_WIDTH, "="),
+            "",
+            self._align([column.encabezado for column in columns]),
+            "-" * LINE_WIDTH,
+        ]
+
+    def _align(self, texts):
+        cells = [
+            f"{text:{column.alineacion}{column.ancho}.{column.ancho}}"
+            for column, text in zip(self.columns, texts)
+        ]
+        return " ".join(cells).rstrip()
+
+    def format_cells(self, row):
+        """Devuelve los valores de una fila ya formateados (sin alinear)."""
+        return [column.formato(value) for column, value in zip(self.columns, row)]
+
+    def format_row(self, row):
+        """Devuelve la línea de texto de una fila."""
+        return self._align(self.format_cells(row))
+
+    @property
+    def rows_per_page(self):
+        # Encabezado arriba y una línea en blanco más el número de página abajo
+        return max(1, self.lines_per_page - len(self._header) - 2)
+
+    def _body_length(self):
+        return len(self.rows) + (len(self.totals) + 2 if self.totals else 0)
+
+    def _body_line(self, index):
+        if index < len(self.rows):
+            return self.format_row(self.rows[index])
+        index -= len(self.rows)
+        if index == 0:
+            return "-" * LINE_WIDTH
+        if index == 1:
+            return ""
+        label, value = self.totals[index - 2]
+        return f"{label:<30} {value}"
+
+    @property
+    def page_count(self):
+        return max(1, -(-self._body_length() // self.rows_per_page))
+
+    def page(self, number):
+        """Devuelve las líneas de la página `number` (empezando en 1)."""
+        if not 1 <= number <= self.page_count:
+            raise IndexError(f"Página fuera de rango: {number}")
+        start = (number - 1) * self.rows_per_page
+        end = min(start + self.rows_per_page, self._body_length())
+        body = [self._body_line(index) for index in range(start, end)]
+        footer = ["", f"Página {number} de {self.page_count}".rjust(LINE_WIDTH)]
+        return self._header + body + footer
+
+    def pages(self):
+        """Genera las páginas una por una."""
+        for number in range(1, self.page_count + 1):
+            yield self.page(number)
+
+    def lines(self):
+        """Genera todas las líneas del reporte, con saltos de página (\\f) entre páginas."""
+        for number, page in enumerate(self.pages(), start=1):
+            if number > 1:
+                yield "\f"
+            yield from page
+
+    def write_text(self, file):
+        """Escribe el reporte paginado en un archivo de texto abierto."""
+        file.writelines(f"{line}\n" for line in self.lines())
+
+    def write_html(self, file):
+        """Escribe el reporte como una tabla HTML en un archivo de texto abierto."""
+        file.write(
+            '<!DOCTYPE html>\n<html lang="es">\n<head><meta charset="utf-8">'
+            f"<title>{html.escape(self.title)}</title></head>\n<body>\n"
+            f"<h1>{html.escape(self.title)}</h1>\n<table border=\"1\" cellspacing=\"0\" cellpadding=\"3\">\n<thead><tr>"
+        )
+        file.write("".join(f"<th>{html.escape(column.encabezado)}</th>" for column in self.columns))
+        file.write("</tr></thead>\n<tbody>\n")
+        aligns = ["right" if column.alineacion == ">" else "left" for column in self.columns]
+        file.writelines(
+            "<tr>" + "".join(
+                f'<td align="{align}">{html.escape(cell)}</td>'
+                for align, cell in zip(aligns, self.format_cells(row))
+            ) + "</tr>\n"
+            for row in self.rows
+        )
+        file.write("</tbody>\n</table>\n")
+        if self.totals:
+            file.write("<table>\n")
+            file.writelines(
+                f"<tr><th align=\"left\">{html.escape(label)}</th><td>{html.escape(str(value))}</td></tr>\n"
+                for label, value in self.totals
+            )
+            file.write("</table>\n")
+        file.write("</body>\n</html>\n")
+
+    def write_pdf(self, file):
+        """Escribe el reporte paginado como PDF (Courier, una página por página del reporte).
+
+        `file` debe estar abierto en modo binario.
+        """
+        _write_pdf(file, self.pages())
+
+    def export(self, file_path, fmt=None):
+        """Guarda el reporte en un archivo; el formato sale de la extensión si no se indica."""
+        fmt = fmt or EXPORT_FORMATS.get(os.path.splitext(file_path)[1].lower(), "texto")
+        if fmt == "csv":
+            # Valores sin formatear, para procesarlos con otras herramientas
+            return write_rows(file_path, [column.encabezado for column in self.columns], self.rows)
+        temp_path = f"{file_path}.tmp"
+        try:
+            if fmt == "pdf":
+                with open(temp_path, "wb") as file:
+                    self.write_pdf(file)
+            else:
+                with open(temp_path, "w", encoding="utf-8", newline="\n") as file:
+                    if fmt == "html":
+                        self.write_html(file)
+                    else:
+                        self.write_text(file)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return len(self.rows)
+
+
+def _pdf_text(line):
+    escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return escaped.encode("cp1252", errors="replace")
+
+
+def _write_pdf(file, pages, font_size=9, leading=11):
+    """PDF mínimo con texto en Courier, sin dependencias externas."""
+    offsets = []
+    position = 0
+
+    def write(data):
+        nonlocal position
+        file.write(data)
+        position += len(data)
+
+    def write_object(number, body):
+        offsets.append((number, position))
+        write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    write(b"%PDF-1.4\n")
+    write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+
+    page_numbers = []
+    number = 4
+    for page in pages:
+        stream = b"BT /F1 %d Tf %d TL 40 800 Td\n" % (font_size, leading)
+        stream += b"".join(b"(" + _pdf_text(line) + b") Tj T*\n" for line in page)
+        stream += b"ET"
+        write_object(number, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        write_object(number + 1, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % number
+        ))
+        page_numbers.append(number + 1)
+        number += 2
+
+    kids = b" ".join(b"%d 0 R" % page for page in page_numbers)
+    write_object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_numbers)))
+    write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    xref_position = position
+    offsets.sort()
+    write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+    write(b"".join(b"%010d 00000 n \n" % offset for _, offset in offsets))
+    write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref_position))
+
+
+BOOK_COLUMNS = [
+    Column("ID", 5, "<", _text),
+    Column("Título", 26, "<", _text),
+    Column("Autor", 18, "<", _text),
+    Column("Género", 12, "<", _text),
+    Column("Precio", 9, ">", _money),
+    Column("Stock", 5, ">", _text),
+]
+
+SALE_COLUMNS = [
+    Column("ID", 6, "<", _text),
+    Column("Título", 30, "<", _text),
+    Column("Cantidad", 8, ">", _text),
+    Column("Fecha", 19, "<", _text),
+    Column("Monto Total", 12, ">", _money),
+]
+
+EDITION_COLUMNS = [
+    Column("ID", 5, "<", _text),
+    Column("Título", 26, "<", _text),
+    Column("Autor", 18, "<", _text),
+    Column("ISBN", 13, "<", _text),
+    Column("Cantidad", 8, ">", _text),
+    Column("Total", 12, ">", _money),
+]
+
+
+def book_list_report(books):
+    """Listado de libros a partir de filas (id, título, autor, género, isbn, precio, stock)."""
+    rows = [(book[0], book[1], book[2], book[3], book[5], book[6]) for book in books]
+    return Report("Listado de Libros", BOOK_COLUMNS, rows, [("Total de Libros:", len(rows))])
+
+
+def sales_list_report(sales):
+    """Reporte de ventas a partir de filas (id, título, cantidad, fecha, monto_total)."""
+    total_units = 0
+    total_amount = 0.0
+    for _, _, cantidad, _, monto_total in sales:
+        total_units += cantidad
+        total_amount += monto_total
+    totals = [
+        ("Total de Ventas:", len(sales)),
+        ("Total de Unidades Vendidas:", total_units),
+        ("Monto Total Generado:", f"${total_amount:.2f}"),
+    ]
+    return Report("Reporte Consolidado de Ventas", SALE_COLUMNS, sales, totals)
+
+
+def edition_sales_report(editions):
+    """Ventas por edición a partir de filas database.reports.EditionRow."""
+    rows = []
+    total_units = 0
+    total_amount = 0.0
+    for edition in editions:
+        rows.append((edition.libro_id, edition.titulo, edition.autor, edition.isbn,
+                     edition.cantidad, edition.monto_total))
+        total_units += edition.cantidad
+        total_amount += edition.monto_total
+    totals = [
+        ("Ediciones vendidas:", len(rows)),
+        ("Total de Unidades Vendidas:", total_units),
+        ("Monto Total Generado:", f"${total_amount:.2f}"),
+    ]
+    return Report("Ventas por Edición", EDITION_COLUMNS, rows, totals)
+
+
+# Reportes que se arman desde la base de datos: nombre -> función(**parámetros) que devuelve un Report
+REPORTS = {
+    "libros": lambda: book_list_report(fetch_books()),
+    "ventas": lambda start=None, end=None: sales_list_report(fetch_sales(start, end)),
+    "ediciones": lambda start=None, end=None, top=None: edition_sales_report(sales_by_edition(start, end, top)),
+}
+
+
+class ReportCache:
+    """Caché LRU de reportes por (nombre, parámetros), válida mientras no cambien los datos."""
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (huella, reporte)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fingerprint):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, fingerprint, report):
+        with self._lock:
+            self._entries[key] = (fingerprint, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"reportes": len(self._entries), "aciertos": self.hits, "fallos": self.misses}
+
+
+report_cache = ReportCache()
+
+
+def get_report(name, **params):
+    """Arma el reporte `name` (ver REPORTS) o lo devuelve de la caché si los datos no cambiaron."""
+    if name not in REPORTS:
+        raise ValueError(f"Reporte desconocido: {name}")
+    key = (name, tuple(sorted(params.items())))
+    fingerprint = data_fingerprint()
+    report = report_cache.get(key, fingerprint)
+    if report is None:
+        report = REPORTS[name](**params)
+        report_cache.put(key, fingerprint, report)
+    return report
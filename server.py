@@ -0,0 +1,460 @@
+"""Servicio HTTP/JSON para que varias cajas compartan una misma base de datos.
+
+Uso:
+    python server.py --host 0.0.0.0 --puerto 8080
+
+Las cajas se conectan con `[cliente] servidor = http://host:8080` en
+libreria.ini (o LIBRERIA_SERVIDOR); ver database/remote.py.
+
+- Las lecturas se atienden en un pool fijo de hilos; cada hilo reutiliza su
+  conexión, así que el servidor nunca abre una conexión por pedido.
+- Todas las escrituras pasan por un único hilo escritor (database/writer.py),
+  que registra juntas las ventas que llegan a la vez: las cajas no compiten
+  por el bloqueo de escritura de SQLite.
+- Las respuestas GET llevan un ETag derivado de models.data_fingerprint();
+  con If-None-Match y sin cambios en los datos se responde 304 sin consultar.
+
+Rutas (todas devuelven JSON salvo /api/exportar):
+    GET    /api/estado
+    GET    /api/huella
+    GET    /api/libros                  ?despues=&limite=&orden= (sin limite: todos)
+    POST   /api/libros
+    GET    /api/libros/buscar           ?q=&limite=
+    GET    /api/libros/titulos
+    GET    /api/libros/por-titulo       ?titulo=
+    GET    /api/libros/por-isbn         ?isbn=
+    GET    /api/libros/stock-bajo       ?minimo=
+    GET    /api/libros/{id}
+    PUT    /api/libros/{id}
+    DELETE /api/libros/{id}
+    GET    /api/autores
+    POST   /api/autores
+    GET    /api/autores/por-nombre      ?nombre=
+    GET    /api/ventas                  ?desde=&hasta=
+    POST   /api/ventas                  {"libro_id", "cantidad"} o {"lineas": [[libro_id, cantidad], ...]}
+    GET    /api/reportes/ventas         ?agrupar=&desde=&hasta=&top=
+    GET    /api/exportar/{tabla}        (CSV)
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+from routes import Mapper
+
+from config import get_setting
+from logging_setup import setup_logging
+from database.connection import create_tables
+from database.migrations import MigrationError
+from database import models
+from database.exporter import iter_export, EXPORTS, DEFAULT_CHUNK_SIZE
+from database.reports import sales_report, sales_by_edition, sales_by_title, GROUPINGS
+from database.writer import Writer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = get_setting("servidor", "host", "127.0.0.1", env="LIBRERIA_SERVIDOR_HOST")
+DEFAULT_PORT = int(get_setting("servidor", "puerto", "8080", env="LIBRERIA_SERVIDOR_PUERTO"))
+DEFAULT_THREADS = int(get_setting("servidor", "hilos", "8"))
+
+# Segundos que un pedido espera el resultado de una escritura
+WRITE_TIMEOUT = 30
+
+# Tamaño máximo aceptado para el cuerpo de un pedido
+MAX_BODY = 1 << 20
+
+STATUS = {
+    200: "200 OK",
+    201: "201 Created",
+    304: "304 Not Modified",
+    400: "400 Bad Request",
+    404: "404 Not Found",
+    409: "409 Conflict",
+    413: "413 Payload Too Large",
+    422: "422 Unprocessable Entity",
+    500: "500 Internal Server Error",
+    503: "503 Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    """Error que se devuelve al cliente con su código HTTP."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def build_mapper():
+    """Rutas de la API (ver el docstring del módulo)."""
+    mapper = Mapper()
+    get, post, put, delete = (dict(method=[method]) for method in ("GET", "POST", "PUT", "DELETE"))
+    book_id = dict(id=r"\d+")
+    mapper.connect("/api/estado", action="status", conditions=get)
+    mapper.connect("/api/huella", action="fingerprint", conditions=get)
+    mapper.connect("/api/libros", action="list_books", conditions=get)
+    mapper.connect("/api/libros", action="create_book", conditions=post)
+    mapper.connect("/api/libros/buscar", action="search_books", conditions=get)
+    mapper.connect("/api/libros/titulos", action="book_titles", conditions=get)
+    mapper.connect("/api/libros/por-titulo", action="book_by_title", conditions=get)
+    mapper.connect("/api/libros/por-isbn", action="book_by_isbn", conditions=get)
+    mapper.connect("/api/libros/stock-bajo", action="low_stock", conditions=get)
+    mapper.connect("/api/libros/{id}", action="get_book", conditions=get, requirements=book_id)
+    mapper.connect("/api/libros/{id}", action="update_book", conditions=put, requirements=book_id)
+    mapper.connect("/api/libros/{id}", action="delete_book", conditions=delete, requirements=book_id)
+    mapper.connect("/api/autores", action="list_authors", conditions=get)
+    mapper.connect("/api/autores", action="create_author", conditions=post)
+    mapper.connect("/api/autores/por-nombre", action="author_by_name", conditions=get)
+    mapper.connect("/api/ventas", action="list_sales", conditions=get)
+    mapper.connect("/api/ventas", action="create_sale", conditions=post)
+    mapper.connect("/api/reportes/ventas", action="sales_report", conditions=get)
+    mapper.connect("/api/exportar/{tabla}", action="export", conditions=get)
+    return mapper
+
+
+def _jsonable(value):
+    """Convierte namedtuples en diccionarios (json los escribiría como listas)."""
+    if hasattr(value, "_asdict"):
+        return {key: _jsonable(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _records(rows, fields):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _book_data(body):
+    """Tupla (titulo, autor, genero, isbn, precio, stock) a partir del JSON recibido."""
+    try:
+        return (
+            str(body["titulo"]), str(body["autor"]), body.get("genero"), body.get("isbn"),
+            float(body["precio"]), int(body["stock"]),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HttpError(400, f"Datos del libro no válidos: {e}")
+
+
+class Request:
+    """Datos de un pedido: variables de la ruta, parámetros de la URL y cuerpo JSON."""
+
+    def __init__(self, environ, route):
+        self.environ = environ
+        self.method = environ["REQUEST_METHOD"]
+        self.route = route
+        self.query = {key: values[0] for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        self.status = 200  # Los manejadores pueden cambiarlo (por ejemplo, 201 al crear)
+
+    def param(self, name, default=None):
+        return self.query.get(name, default)
+
+    def int_param(self, name, default=None):
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise HttpError(400, f"El parámetro '{name}' debe ser un número entero")
+
+    def json(self):
+        try:
+            length = int(self.environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > MAX_BODY:
+            raise HttpError(413, "Pedido demasiado grande")
+        try:
+            body = json.loads(self.environ["wsgi.input"].read(length) or b"{}")
+        except ValueError:
+            raise HttpError(400, "El cuerpo del pedido no es JSON válido")
+        if not isinstance(body, dict):
+            raise HttpError(400, "El cuerpo del pedido debe ser un objeto JSON")
+        return body
+
+
+class ApiApplication:
+    """Aplicación WSGI de la API."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.mapper = build_mapper()
+
+    def __call__(self, environ, start_response):
+        try:
+            route = self.mapper.match(environ=environ)
+            if route is None:
+                raise HttpError(404, "Ruta inexistente")
+            request = Request(environ, route)
+
+            etag = None
+            if request.method == "GET" and route["action"] != "status":
+                etag = self.etag(environ)
+                if etag in environ.get("HTTP_IF_NONE_MATCH", ""):
+                    start_response(STATUS[304], [("ETag", etag)])
+                    return []
+
+            data = getattr(self, route["action"])(request)
+            if route["action"] == "export":
+                return self.send_csv(start_response, *data)
+            status = request.status
+        except HttpError as e:
+            status, data, etag = e.status, {"error": str(e)}, None
+        except sqlite3.IntegrityError as e:
+            status, data, etag = 409, {"error": f"Datos en conflicto: {e}"}, None
+        except Exception as e:
+            logger.exception("Error al atender %s %s", environ.get("REQUEST_METHOD"), environ.get("PATH_INFO"))
+            status, data, etag = 500, {"error": str(e)}, None
+
+        body = json.dumps(_jsonable(data), ensure_ascii=False).encode("utf-8")
+        headers = [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(body)))]
+        if etag is not None:
+            headers += [("ETag", etag), ("Cache-Control", "no-cache")]
+        start_response(STATUS.get(status, f"{status} Error"), headers)
+        return [body]
+
+    @staticmethod
+    def etag(environ):
+        """ETag de un GET: cambia cuando cambian los datos o la URL pedida."""
+        key = repr((models.data_fingerprint(), environ.get("PATH_INFO"), environ.get("QUERY_STRING")))
+        return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+    @staticmethod
+    def send_csv(start_response, tabla, headers, rows):
+        start_response(STATUS[200], [
+            ("Content-Type", "text/csv; charset=utf-8"),
+            ("Content-Disposition", f'attachment; filename="{tabla}.csv"'),
+        ])
+
+        def chunks():
+            # Se escribe por tandas a medida que el servidor envía la respuesta
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, delimiter=";")
+            writer.writerow(headers)
+            for number, row in enumerate(rows, 1):
+                writer.writerow(row)
+                if number % DEFAULT_CHUNK_SIZE == 0:
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue().encode("utf-8")
+
+        return chunks()
+
+    def write(self, future):
+        """Espera el resultado de una escritura encolada en el hilo escritor."""
+        try:
+            return future.result(timeout=WRITE_TIMEOUT)
+        except FutureTimeout:
+            raise HttpError(503, "El escritor de la base de datos no respondió a tiempo")
+
+    # Estado
+    def status(self, request):
+        return {"ventas_registradas": self.writer.sales, "tandas": self.writer.batches}
+
+    def fingerprint(self, request):
+        return {"huella": models.data_fingerprint()}
+
+    # Libros
+    def list_books(self, request):
+        limit = request.int_param("limite")
+        if limit is None:
+            return {"libros": _records(models.fetch_books(), models.BOOK_FIELDS), "siguiente": None}
+        order_by = request.param("orden", "id")
+        if order_by not in models.BOOK_SORT_COLUMNS:
+            raise HttpError(400, f"Orden no válido: {order_by}")
+        after = request.param("despues")
+        if after is not None:
+            try:
+                after = json.loads(after)
+            except ValueError:
+                raise HttpError(400, "El parámetro 'despues' debe ser JSON")
+            after = tuple(after) if isinstance(after, list) else after
+        books, next_key = models.fetch_books_page(after, limit, order_by)
+        return {"libros": _records(books, models.BOOK_FIELDS), "siguiente": next_key}
+
+    def search_books(self, request):
+        books = models.search_books(request.param("q", ""), request.int_param("limite", 500))
+        return {"libros": _records(books, models.BOOK_FIELDS)}
+
+    def book_titles(self, request):
+        return {"titulos": models.fetch_book_titles()}
+
+    def _book(self, book):
+        if book is None:
+            raise HttpError(404, "El libro no existe")
+        return dict(zip(models.BOOK_FIELDS, book))
+
+    def get_book(self, request):
+        return self._book(models.get_book_by_id(int(request.route["id"])))
+
+    def book_by_title(self, request):
+        return self._book(models.get_book_by_title(request.param("titulo", "")))
+
+    def book_by_isbn(self, request):
+        return self._book(models.get_book_by_isbn(request.param("isbn", "")))
+
+    def low_stock(self, request):
+        books = models.fetch_low_stock(request.int_param("minimo", 5))
+        return {"libros": _records(books, models.BOOK_FIELDS)}
+
+    def create_book(self, request):
+        book_id = self.write(self.writer.submit(models.insert_book, _book_data(request.json())))
+        if book_id is None:
+            raise HttpError(422, "No se pudo guardar el libro")
+        request.status = 201
+        return {"id": book_id}
+
+    def update_book(self, request):
+        book_id = int(request.route["id"])
+        data = (*_book_data(request.json()), book_id)
+        self.write(self.writer.submit(models.update_book, book_id, data))
+        return {"id": book_id}
+
+    def delete_book(self, request):
+        book_id = int(request.route["id"])
+        if not self.write(self.writer.submit(models.delete_book, book_id)):
+            if models.get_book_by_id(book_id) is None:
+                raise HttpError(404, "El libro no existe")
+            raise HttpError(409, "No se pudo eliminar el libro: tiene ventas registradas")
+        return {"id": book_id}
+
+    # Autores
+    def list_authors(self, request):
+        return {"autores": _records(models.fetch_authors(), models.AUTHOR_FIELDS)}
+
+    def author_by_name(self, request):
+        author = models.get_author_by_name(request.param("nombre", ""))
+        if author is None:
+            raise HttpError(404, "El autor no existe")
+        return {"id": author[0]}
+
+    def create_author(self, request):
+        body = request.json()
+        if not body.get("nombre"):
+            raise HttpError(400, "Falta el nombre del autor")
+        author_id = self.write(self.writer.submit(models.insert_author, body["nombre"], body.get("nacionalidad")))
+        if author_id is None:
+            raise HttpError(422, "No se pudo guardar el autor")
+        request.status = 201
+        return {"id": author_id}
+
+    # Ventas
+    def list_sales(self, request):
+        sales = models.fetch_sales(request.param("desde"), request.param("hasta"))
+        return {"ventas": _records(sales, models.SALE_FIELDS)}
+
+    def create_sale(self, request):
+        body = request.json()
+        try:
+            fecha = models.normalize_sale_date(body.get("fecha"))
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        if "lineas" in body:
+            try:
+                lines = [(int(libro_id), int(cantidad)) for libro_id, cantidad in body["lineas"]]
+            except (TypeError, ValueError):
+                raise HttpError(400, "Las líneas deben ser pares [libro_id, cantidad]")
+            return self.write(self.writer.submit(models.register_order, lines, fecha))
+        try:
+            libro_id, cantidad = int(body["libro_id"]), body["cantidad"]
+        except (KeyError, TypeError, ValueError):
+            raise HttpError(400, "La venta debe indicar libro_id y cantidad")
+        return self.write(self.writer.sell(libro_id, cantidad, fecha))
+
+    # Reportes
+    def sales_report(self, request):
+        group_by = request.param("agrupar", "edicion")
+        start, end, top = request.param("desde"), request.param("hasta"), request.int_param("top")
+        if group_by == "edicion":
+            rows = sales_by_edition(start, end, top)
+        elif group_by == "titulo":
+            rows = sales_by_title(start, end, top)
+        elif group_by in GROUPINGS:
+            rows = sales_report(group_by, start, end, top)
+        else:
+            raise HttpError(400, f"Agrupación no válida: {group_by}")
+        return {"filas": rows}
+
+    def export(self, request):
+        tabla = request.route["tabla"]
+        if tabla not in EXPORTS:
+            raise HttpError(404, f"Exportación desconocida: {tabla}")
+        return (tabla, *iter_export(tabla))
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGIServer que atiende los pedidos en un pool fijo de hilos.
+
+    A diferencia de ThreadingMixIn (un hilo nuevo por pedido), los hilos se
+    reutilizan y con ellos sus conexiones a la base de datos.
+    """
+
+    def __init__(self, server_address, handler_class, threads=DEFAULT_THREADS):
+        super().__init__(server_address, handler_class)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="libreria-http")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown()
+
+
+class RequestHandler(WSGIRequestHandler):
+    """Registra cada pedido en el log (DEBUG) en lugar de escribirlo en stderr."""
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Dirección a escuchar (por defecto {DEFAULT_HOST}).")
+    parser.add_argument("--puerto", type=int, default=DEFAULT_PORT, help=f"Puerto (por defecto {DEFAULT_PORT}).")
+    parser.add_argument("--hilos", type=int, default=DEFAULT_THREADS, help="Hilos para atender pedidos.")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    try:
+        create_tables()
+    except (MigrationError, sqlite3.Error) as e:
+        logger.critical("No se pudo preparar la base de datos: %s", e, exc_info=e)
+        print(f"No se pudo preparar la base de datos: {e}", file=sys.stderr)
+        return 1
+    writer = Writer()
+    server = PooledWSGIServer((args.host, args.puerto), RequestHandler, threads=args.hilos)
+    server.set_app(ApiApplication(writer))
+    logger.info("Servidor escuchando en http://%s:%s", args.host, args.puerto)
+    print(f"Servidor escuchando en http://{args.host}:{args.puerto} (Ctrl+C para detener)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        writer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
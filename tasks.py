@@ -0,0 +1,140 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Exception):
+    """Se lanza dentro de una tarea cuando el usuario la cancela."""
+
+
+class Task:
+    """Operación que se ejecuta en un hilo de trabajo."""
+
+    def __init__(self, runner, description, on_success=None, on_error=None, on_progress=None):
+        self.runner = runner
+        self.description = description
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+        self.done = False
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Pide la cancelación; la operación la atiende en su próximo punto de control."""
+        self.cancel_event.set()
+
+    def report_progress(self, done, total=None):
+        """Informa el avance desde el hilo de trabajo (se muestra en el hilo de Tk)."""
+        self.runner._post(self.runner._progress, self, done, total)
+
+
+class TaskRunner:
+    """Ejecuta consultas y E/S en un pool de hilos sin bloquear el mainloop de Tk.
+
+    Tkinter no es seguro entre hilos: los hilos de trabajo nunca tocan los
+    widgets, sino que encolan los callbacks y el hilo de Tk los ejecuta al
+    revisar la cola con `after()`.
+    """
+
+    # Milisegundos entre revisiones de la cola mientras hay tareas activas
+    POLL_INTERVAL = 50
+
+    def __init__(self, root, max_workers=2, status_bar=None):
+        self.root = root
+        self.status_bar = status_bar
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="libreria-db")
+        self._callbacks = queue.Queue()
+        self._active = []
+        self._polling = False
+
+    def submit(self, func, *args, description="Procesando...", on_success=None, on_error=None,
+               on_progress=None, track_progress=False, **kwargs):
+        """Ejecuta `func(*args, **kwargs)` en segundo plano y devuelve la tarea.
+
+        Con `track_progress=True` la función recibe además los argumentos
+        `progress` (callable(hechos, total)) y `cancel_event` (threading.Event).
+        `on_success(resultado)` y `on_error(excepción)` se llaman en el hilo de Tk;
+        si la tarea fue cancelada no se llama a ninguno de los dos.
+        """
+        task = Task(self, description, on_success, on_error, on_progress)
+        if track_progress:
+            kwargs["progress"] = task.report_progress
+            kwargs["cancel_event"] = task.cancel_event
+
+        self._active.append(task)
+        if self.status_bar is not None:
+            self.status_bar.task_started(task)
+        self._executor.submit(self._run, task, func, args, kwargs)
+        self._schedule_poll()
+        return task
+
+    def cancel_all(self):
+        """Cancela todas las tareas activas."""
+        for task in self._active:
+            task.cancel()
+
+    def shutdown(self):
+        """Cancela las tareas pendientes y libera los hilos de trabajo."""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, func, args, kwargs):
+        try:
+            if task.cancelled:
+                raise TaskCancelled()
+            result = func(*args, **kwargs)
+        except TaskCancelled:
+            self._post(self._finish, task, None, None)
+        except Exception as e:
+            self._post(self._finish, task, None, e)
+        else:
+            self._post(self._finish, task, result, None)
+
+    def _post(self, callback, *args):
+        self._callbacks.put((callback, args))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                callback, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        if self._active or not self._callbacks.empty():
+            self._schedule_poll()
+
+    def _progress(self, task, done, total):
+        if task.done:
+            return
+        if self.status_bar is not None:
+            self.status_bar.task_progress(task, done, total)
+        if task.on_progress is not None:
+            task.on_progress(done, total)
+
+    def _finish(self, task, result, error):
+        task.done = True
+        self._active.remove(task)
+        if self.status_bar is not None:
+            self.status_bar.task_finished(task)
+        if task.cancelled:
+            return
+        if error is not None:
+            if task.on_error is not None:
+                task.on_error(error)
+            else:
+                logger.error("%s: %s", task.description, error, exc_info=error)
+        elif task.on_success is not None:
+            task.on_success(result)
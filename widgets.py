@@ -0,0 +1,394 @@
+import logging
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+logger = logging.getLogger(__name__)
+
+
+class DataTable(ttk.Treeview):
+    """Treeview con operaciones en bloque para tablas grandes.
+
+    - clear() elimina todas las filas con una sola llamada a Tcl.
+    - insert_rows() inserta por tandas programadas con after() para que la
+      interfaz siga respondiendo mientras se cargan miles de filas.
+    - sync_rows() compara con los datos anteriores y solo toca las filas
+      que cambiaron, usando la columna `key` como identificador
+      (con key=None las filas no tienen identificador y no se puede usar).
+    """
+
+    # Filas insertadas por cada tanda programada con after()
+    CHUNK_SIZE = 500
+
+    def __init__(self, master=None, key=0, **kwargs):
+        self.key = key
+        self._rows = {}  # iid -> valores mostrados (para sync_rows)
+        self._pending = None  # Tanda de inserción programada
+        super().__init__(master, **kwargs)
+
+    def clear(self):
+        """Elimina todas las filas de la tabla."""
+        self._cancel_pending()
+        self._rows.clear()
+        children = self.get_children()
+        if children:
+            self.delete(*children)
+
+    def insert_rows(self, rows, chunk_size=None):
+        """Reemplaza el contenido de la tabla insertando las filas por tandas."""
+        self.clear()
+        self._queue_inserts([("end", self._iid(row), tuple(row)) for row in rows], chunk_size)
+
+    def sync_rows(self, rows, chunk_size=None):
+        """Actualiza la tabla para que muestre `rows`, tocando solo las filas que cambiaron."""
+        self._cancel_pending()
+        wanted = [(self._iid(row), tuple(row)) for row in rows]
+        wanted_ids = {iid for iid, _ in wanted}
+
+        # Eliminar en una sola llamada las filas que ya no están
+        removed = [iid for iid in self._rows if iid not in wanted_ids]
+        if removed:
+            self.delete(*removed)
+            for iid in removed:
+                del self._rows[iid]
+
+        # Actualizar las filas modificadas y preparar las nuevas
+        inserts = []
+        kept = []
+        for position, (iid, values) in enumerate(wanted):
+            if iid in self._rows:
+                kept.append(iid)
+                if self._rows[iid] != values:
+                    self.item(iid, values=values)
+                    self._rows[iid] = values
+            else:
+                inserts.append((position, iid, values))
+
+        # Reordenar solo si cambió el orden relativo de las filas que se conservan
+        if list(self.get_children()) != kept:
+            for position, iid in enumerate(kept):
+                self.move(iid, "", position)
+        self._queue_inserts(inserts, chunk_size)
+
+    def _iid(self, row):
+        return None if self.key is None else str(row[self.key])
+
+    def _queue_inserts(self, inserts, chunk_size):
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        # La primera tanda se inserta de inmediato para que la tabla no quede vacía
+        self._insert_chunk(inserts, 0, chunk_size)
+
+    def _insert_chunk(self, inserts, start, chunk_size):
+        self._pending = None
+        for index, iid, values in inserts[start:start + chunk_size]:
+            iid = self.insert("", index, iid=iid, values=values)
+            self._rows[iid] = values
+        if start + chunk_size < len(inserts):
+            self._pending = self.after(1, self._insert_chunk, inserts, start + chunk_size, chunk_size)
+
+    def _cancel_pending(self):
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+            self._pending = None
+
+
+class PagedTable(DataTable):
+    """Tabla que mantiene solo una ventana de páginas alrededor de la posición visible.
+
+    `fetch_page(clave)` debe devolver (filas, siguiente_clave), con
+    siguiente_clave en None cuando no quedan más filas (ver
+    models.fetch_books_page). Al acercarse al final se pide la página
+    siguiente y, si hay más de MAX_PAGES cargadas, se descarta la primera;
+    al volver hacia arriba se pide de nuevo con su clave y se descarta la
+    última. Así la tabla nunca tiene más de MAX_PAGES páginas de filas, sin
+    importar el tamaño del catálogo; de las páginas descartadas solo se
+    guarda la clave. Si se indica un `runner` (tasks.TaskRunner), las
+    páginas se consultan en segundo plano.
+    """
+
+    # Fracción desplazada a partir de la cual se pide la página siguiente
+    # (o, desde el otro extremo, la anterior)
+    PREFETCH_THRESHOLD = 0.9
+
+    # Páginas que se mantienen en la tabla
+    MAX_PAGES = 5
+
+    def __init__(self, master=None, fetch_page=None, runner=None, yscrollcommand=None, **kwargs):
+        self.fetch_page = fetch_page
+        self.runner = runner
+        self._generation = 0  # Descarta páginas pedidas antes de la última recarga
+        self._user_yscrollcommand = yscrollcommand
+        self._pages = []  # (clave, iids) de las páginas cargadas, en orden
+        self._dropped = []  # Claves de las páginas descartadas por arriba
+        self._next_key = None
+        self._has_more = False
+        self._loading = False
+        super().__init__(master, yscrollcommand=self._on_yscroll, **kwargs)
+
+    def configure(self, cnf=None, **kwargs):
+        """Permite cambiar el yscrollcommand sin perder la carga incremental."""
+        if "yscrollcommand" in kwargs:
+            self._user_yscrollcommand = kwargs.pop("yscrollcommand")
+        return super().configure(cnf, **kwargs)
+
+    config = configure
+
+    def clear(self):
+        """Elimina todas las filas y olvida las páginas cargadas."""
+        super().clear()
+        self._pages = []
+        self._dropped = []
+
+    def reload(self, fetch_page=None):
+        """Vacía la tabla y vuelve a cargar desde la primera página."""
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+        self.clear()
+        self._generation += 1
+        self._loading = False
+        self._next_key = None
+        self._has_more = True
+        self.yview_moveto(0)
+        self.load_more()
+
+    def show_rows(self, rows):
+        """Muestra una lista fija de filas (por ejemplo, resultados de búsqueda)."""
+        self._generation += 1
+        self._loading = False
+        self._has_more = False
+        self.insert_rows(rows)
+
+    def load_more(self):
+        """Agrega la siguiente página al final de la tabla."""
+        if self._has_more:
+            self._load(self._next_key, at_end=True)
+
+    def load_previous(self):
+        """Vuelve a agregar al principio la última página descartada."""
+        if self._dropped:
+            self._load(self._dropped[-1], at_end=False)
+
+    def _load(self, key, at_end):
+        if self._loading or self.fetch_page is None:
+            return
+        self._loading = True
+        generation = self._generation
+        if self.runner is not None:
+            self.runner.submit(
+                self.fetch_page, key,
+                description="Cargando libros...",
+                on_success=lambda page: self._add_page(generation, key, page, at_end),
+                on_error=lambda error: self._page_failed(generation, error)
+            )
+            return
+        try:
+            self._add_page(generation, key, self.fetch_page(key), at_end)
+        finally:
+            self._loading = False
+
+    def _add_page(self, generation, key, page, at_end):
+        if generation != self._generation:
+            return  # La tabla se recargó mientras se consultaba esta página
+        self._loading = False
+        rows, next_key = page
+        top = self._top_index()
+        iids = []
+        for row in rows:
+            iid = self._iid(row)
+            if iid is not None and iid in self._rows:
+                continue  # Un libro modificado puede reaparecer en otra página
+            iid = self.insert("", "end" if at_end else len(iids), iid=iid, values=tuple(row))
+            self._rows[iid] = tuple(row)
+            iids.append(iid)
+
+        if at_end:
+            self._next_key = next_key
+            self._has_more = next_key is not None
+            self._pages.append((key, iids))
+            if len(self._pages) > self.MAX_PAGES:
+                dropped_key, dropped = self._pages.pop(0)
+                self._dropped.append(dropped_key)
+                self._remove(dropped)
+                top -= len(dropped)
+        else:
+            self._dropped.pop()
+            self._pages.insert(0, (key, iids))
+            top += len(iids)
+            if len(self._pages) > self.MAX_PAGES:
+                # La página descartada es la siguiente a pedir al bajar
+                self._next_key, dropped = self._pages.pop()
+                self._has_more = True
+                self._remove(dropped)
+        self._scroll_to(top)
+
+    def _remove(self, iids):
+        if iids:
+            self.delete(*iids)
+        for iid in iids:
+            del self._rows[iid]
+
+    def _top_index(self):
+        """Índice de la primera fila visible."""
+        return round(float(self.yview()[0]) * len(self._rows))
+
+    def _scroll_to(self, index):
+        """Deja la fila `index` arriba, para que agregar o quitar páginas no mueva lo que se ve."""
+        if self._rows:
+            self.yview_moveto(max(0, index) / len(self._rows))
+
+    def _page_failed(self, generation, error):
+        if generation == self._generation:
+            self._loading = False
+            self._has_more = False
+        logger.error("No se pudo cargar la página: %s", error, exc_info=error)
+
+    def _on_yscroll(self, first, last):
+        if self._user_yscrollcommand is not None:
+            self._user_yscrollcommand(first, last)
+        # Diferir la carga para no modificar la tabla dentro del redibujado
+        if self._has_more and float(last) >= self.PREFETCH_THRESHOLD:
+            self.after_idle(self.load_more)
+        elif self._dropped and float(first) <= 1 - self.PREFETCH_THRESHOLD:
+            self.after_idle(self.load_previous)
+
+
+class StatusBar(tk.Frame):
+    """Barra de estado con el avance de las tareas en segundo plano."""
+
+    def __init__(self, master=None, **kwargs):
+        super().__init__(master, bg="#ECF0F1", **kwargs)
+        self._tasks = []
+
+        self.label = tk.Label(self, text="Listo", anchor="w", bg="#ECF0F1", font=("Helvetica", 10))
+        self.label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        self.cancel_button = tk.Button(self, text="Cancelar", command=self.cancel_current, state="disabled")
+        self.cancel_button.pack(side=tk.RIGHT, padx=5, pady=2)
+
+        self.progress = ttk.Progressbar(self, length=200, mode="indeterminate")
+        self.progress.pack(side=tk.RIGHT, padx=5, pady=2)
+
+    def task_started(self, task):
+        self._tasks.append(task)
+        self._refresh()
+
+    def task_progress(self, task, done, total):
+        if not self._tasks or task is not self._tasks[-1]:
+            return
+        if total:
+            self.progress.stop()
+            self.progress.config(mode="determinate", maximum=total, value=done)
+            self.label.config(text=f"{task.description} {done}/{total}")
+        else:
+            self.label.config(text=f"{task.description} {done}")
+
+    def task_finished(self, task):
+        if task in self._tasks:
+            self._tasks.remove(task)
+        self._refresh()
+
+    def show_message(self, text):
+        """Muestra un aviso (por ejemplo, el estado de una impresión) si no hay tareas activas."""
+        if not self._tasks:
+            self.label.config(text=text)
+
+    def cancel_current(self):
+        """Cancela la tarea más reciente."""
+        if self._tasks:
+            self._tasks[-1].cancel()
+
+    def _refresh(self):
+        if not self._tasks:
+            self.progress.stop()
+            self.progress.config(mode="indeterminate", value=0)
+            self.label.config(text="Listo")
+            self.cancel_button.config(state="disabled")
+            return
+        task = self._tasks[-1]
+        pending = f" ({len(self._tasks)} tareas)" if len(self._tasks) > 1 else ""
+        self.label.config(text=task.description + pending)
+        self.progress.config(mode="indeterminate")
+        self.progress.start(10)
+        self.cancel_button.config(state="normal")
+
+
+class ReportPreview(tk.Toplevel):
+    """Ventana de vista previa que muestra un reporte (reporting.Report) página por página.
+
+    Solo se formatea y dibuja la página visible, así que abrir la vista
+    previa de un reporte con miles de filas es inmediato. `on_print(report)`
+    recibe el mismo reporte, sin volver a armarlo; "Guardar como..." lo
+    exporta a texto, CSV, HTML o PDF (en segundo plano si hay `runner`).
+    """
+
+    def __init__(self, master, report, title="Vista Previa", on_print=None, runner=None):
+        super().__init__(master)
+        self.report = report
+        self.runner = runner
+        self.current = 1
+        self.title(title)
+        self.geometry("800x600")
+        self.transient(master)
+
+        tk.Label(self, text=title, font=("Arial", 16, "bold")).pack(pady=10)
+
+        # Navegación entre páginas
+        nav = tk.Frame(self)
+        nav.pack(side=tk.BOTTOM, pady=10)
+        tk.Button(nav, text="«", width=3, command=lambda: self.show_page(1)).pack(side=tk.LEFT)
+        tk.Button(nav, text="Anterior", command=lambda: self.show_page(self.current - 1)).pack(side=tk.LEFT, padx=5)
+        self.page_label = tk.Label(nav, width=20)
+        self.page_label.pack(side=tk.LEFT)
+        tk.Button(nav, text="Siguiente", command=lambda: self.show_page(self.current + 1)).pack(side=tk.LEFT, padx=5)
+        tk.Button(nav, text="»", width=3, command=lambda: self.show_page(self.report.page_count)).pack(side=tk.LEFT)
+        if on_print is not None:
+            tk.Button(nav, text="Imprimir", command=lambda: on_print(self.report), bg="#3498DB",
+                      fg="white").pack(side=tk.LEFT, padx=(20, 5))
+        tk.Button(nav, text="Guardar como...", command=self.save_as).pack(side=tk.LEFT, padx=5)
+        tk.Button(nav, text="Cerrar", command=self.destroy, bg="#A90A0A", fg="white").pack(side=tk.LEFT)
+
+        # Texto de la página visible
+        text_frame = tk.Frame(self)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.text = tk.Text(text_frame, wrap=tk.NONE, font=("Courier", 10))
+        y_scroll = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        x_scroll = ttk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(fill=tk.BOTH, expand=True)
+
+        self.bind("<Prior>", lambda event: self.show_page(self.current - 1))
+        self.bind("<Next>", lambda event: self.show_page(self.current + 1))
+        self.show_page(1)
+
+    def show_page(self, number):
+        """Muestra la página `number` (se ignora si está fuera de rango)."""
+        if not 1 <= number <= self.report.page_count:
+            return
+        self.current = number
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(self.report.page(number)))
+        self.text.config(state=tk.DISABLED)
+        self.page_label.config(text=f"Página {number} de {self.report.page_count}")
+
+    def save_as(self):
+        """Exporta el reporte al archivo elegido (el formato sale de la extensión)."""
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf"), ("HTML", "*.html"), ("CSV", "*.csv"), ("Texto", "*.txt")],
+            title="Guardar reporte"
+        )
+        if not file_path:
+            return
+        done = lambda _: messagebox.showinfo("Guardar", f"Reporte guardado en:\n{file_path}", parent=self)
+        failed = lambda e: messagebox.showerror("Error", f"No se pudo guardar el reporte. {e}", parent=self)
+        if self.runner is None:
+            try:
+                done(self.report.export(file_path))
+            except Exception as e:
+                failed(e)
+            return
+        self.runner.submit(self.report.export, file_path, description="Guardando reporte...",
+                           on_success=done, on_error=failed)